@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+chase_ansi.py - Поток ANSI-изменений поля для удаленных и записанных сеансов
+Между двумя кадрами get_board_string() выводится кратчайшая найденная
+последовательность перемещений курсора и записи изменившихся клеток вместо
+полного кадра. Поток пишется в файл формата asciicast v2 (заголовок JSON,
+затем по строке [время, "o", данные] на кадр) и воспроизводится с любой
+скоростью - в том числе стандартным asciinema play.
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import IO, Iterator, List, Optional, Tuple
+
+from chase_core import board_changes
+from chase_pool import build_game
+
+ESC = '\033['
+# Полный кадр: очистка экрана и курсор в левый верхний угол
+CLEAR = ESC + '2J' + ESC + 'H'
+
+CAST_VERSION = 2
+
+
+def _relative(count: int, code: str) -> str:
+    return ESC + (str(count) if count > 1 else '') + code
+
+
+def cursor_move(row: int, col: int, to_row: int, to_col: int) -> str:
+    """Кратчайшее перемещение курсора (строки и столбцы с нуля)"""
+    options = [f'{ESC}{to_row + 1};{to_col + 1}H']
+    vertical = ''
+    if to_row > row:
+        vertical = _relative(to_row - row, 'B')
+    elif to_row < row:
+        vertical = _relative(row - to_row, 'A')
+    if to_col == col:
+        options.append(vertical)
+    elif to_col > col:
+        options.append(vertical + _relative(to_col - col, 'C'))
+    else:
+        back = col - to_col
+        options.append(vertical + ('\b' * back if back <= 3 else _relative(back, 'D')))
+        options.append(vertical + '\r' + (_relative(to_col, 'C') if to_col else ''))
+    return min(options, key=len)
+
+
+def full_frame(board: str) -> str:
+    """Кадр целиком: очистка экрана и поле (\\r\\n - поток может идти не через tty)"""
+    return CLEAR + board.replace('\n', '\r\n')
+
+
+class AnsiDiffRenderer:
+    """
+    Преобразование последовательных кадров поля в поток ANSI.
+    Первый кадр выводится целиком, последующие - изменениями; курсор
+    отслеживается, чтобы выбирать короткие относительные перемещения.
+    """
+
+    # Сколько неизменившихся клеток дешевле переписать, чем обойти курсором
+    MAX_GAP = 3
+
+    def __init__(self):
+        self._board: Optional[str] = None
+        self._lines: List[str] = []
+        self._cursor: Tuple[int, int] = (0, 0)
+
+    def reset(self):
+        """Следующий кадр будет выведен целиком"""
+        self._board = None
+
+    def render(self, board: str) -> str:
+        """Последовательность, переводящая экран из предыдущего кадра в board"""
+        lines = board.split('\n')
+        if self._board is None or len(board) != len(self._board):
+            output = full_frame(board)
+            self._cursor = (len(lines) - 1, len(lines[-1]))
+        else:
+            output = self._diff(board_changes(self._board, board), lines)
+        self._board = board
+        self._lines = lines
+        return output
+
+    def line(self, row: int, text: str) -> str:
+        """Строка текста под полем (сообщение, подсказка); остаток строки стирается"""
+        output = cursor_move(*self._cursor, row, 0) + text + ESC + 'K'
+        self._cursor = (row, len(text))
+        return output
+
+    def _diff(self, changes, lines: List[str]) -> str:
+        parts = []
+        row, col = self._cursor
+        for change_row, change_col, cell in changes:
+            gap = change_col - col
+            if change_row == row and 0 <= gap <= self.MAX_GAP:
+                # Промежуток переписывается новыми символами - короче перемещения
+                parts.append(lines[row][col:change_col])
+            else:
+                parts.append(cursor_move(row, col, change_row, change_col))
+            parts.append(cell)
+            row, col = change_row, change_col + 1
+        self._cursor = (row, col)
+        return ''.join(parts)
+
+
+class CastWriter:
+    """Запись потока в формате asciicast v2"""
+
+    def __init__(self, stream: IO[str], width: int, height: int, title: str = '',
+                 clock=time.monotonic):
+        self.stream = stream
+        self.clock = clock
+        self.started = clock()
+        header = {'version': CAST_VERSION, 'width': width, 'height': height,
+                  'timestamp': int(time.time())}
+        if title:
+            header['title'] = title
+        stream.write(json.dumps(header) + '\n')
+
+    def write(self, data: str, at: Optional[float] = None):
+        """Событие вывода; at - время от начала записи (по умолчанию - по часам)"""
+        if not data:
+            return
+        if at is None:
+            at = self.clock() - self.started
+        self.stream.write(json.dumps([round(at, 3), 'o', data], separators=(',', ':')) + '\n')
+
+
+def read_cast(stream: IO[str]) -> Tuple[dict, Iterator[Tuple[float, str]]]:
+    """Заголовок записи и события вывода (время, данные)"""
+    header = json.loads(stream.readline())
+    if header.get('version') != CAST_VERSION:
+        raise ValueError(f"Unsupported cast version: {header.get('version')}")
+
+    def events():
+        for line in stream:
+            if line.strip():
+                at, kind, data = json.loads(line)
+                if kind == 'o':
+                    yield at, data
+    return header, events()
+
+
+def play_cast(stream: IO[str], output: IO[str], speed: float = 1.0,
+              max_idle: Optional[float] = None, sleep=time.sleep) -> int:
+    """
+    Воспроизведение записи. speed > 1 ускоряет, speed <= 0 - без пауз;
+    max_idle ограничивает паузу между событиями. Возвращает число событий.
+    """
+    _, events = read_cast(stream)
+    previous = 0.0
+    count = 0
+    for at, data in events:
+        delay = at - previous
+        previous = at
+        if max_idle is not None:
+            delay = min(delay, max_idle)
+        if speed > 0 and delay > 0:
+            sleep(delay / speed)
+        output.write(data)
+        output.flush()
+        count += 1
+    return count
+
+
+def record_game(seed: int, moves: List[int], output: IO[str],
+                interval: float = 0.5) -> Tuple[int, int]:
+    """
+    Запись партии (seed и ходы) с шагом interval секунд между ходами.
+    Возвращает (байт в потоке изменений, байт при выводе полных кадров).
+    """
+    game = build_game(seed)
+    renderer = AnsiDiffRenderer()
+    writer = CastWriter(output, game.cols, game.rows, title=f'chase seed={seed}')
+    board = game.get_board_string()
+    streamed = 0
+    full = 0
+    data = renderer.render(board)
+    writer.write(data, at=0.0)
+    for index, move in enumerate(moves, 1):
+        if game.game_over:
+            break
+        game.process_move(move)
+        board = game.get_board_string()
+        data = renderer.render(board)
+        writer.write(data, at=index * interval)
+        streamed += len(data.encode('utf-8'))
+        # Полный кадр, как print_with_log после каждого хода
+        full += len(board.encode('utf-8')) + 1
+    return streamed, full
+
+
+def parse_moves(text: str) -> List[int]:
+    return [int(move) for move in text.replace(',', ' ').split()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Chase ANSI diff stream recorder and player')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help='Record a scripted game as asciicast')
+    record.add_argument('--seed', type=int, required=True)
+    record.add_argument('--moves', required=True, help='Moves, e.g. "8,6,4,-1"')
+    record.add_argument('--interval', type=float, default=0.5, help='Seconds between moves')
+    record.add_argument('--output', '-o', required=True, help='Cast file')
+
+    play = commands.add_parser('play', help='Replay a cast file')
+    play.add_argument('cast')
+    play.add_argument('--speed', type=float, default=1.0, help='Playback speed (0 = instant)')
+    play.add_argument('--max-idle', type=float, help='Cap pauses between frames, seconds')
+
+    args = parser.parse_args(argv)
+    if args.command == 'record':
+        with open(args.output, 'w', encoding='utf-8') as f:
+            streamed, full = record_game(args.seed, parse_moves(args.moves), f, args.interval)
+        ratio = full / streamed if streamed else 0.0
+        print(f"Saved: {args.output} ({streamed} bytes of moves vs {full} full-frame, {ratio:.1f}x)")
+    else:
+        with open(args.cast, encoding='utf-8') as f:
+            play_cast(f, sys.stdout, args.speed, args.max_idle)
+        sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+chase_batch.py - Пакетный прогон партий терминальной версии
+Файл сценариев - JSON Lines, по партии на строку:
+    {"id": "report-17", "seed": 42, "inputs": ["8", "6", "-1", "N"]}
+inputs - список строк ввода или одна строка через пробел ("8 6 -1 N").
+Партии идут без вывода на экран в пуле процессов; на каждую партию
+выводится строка итогов (исход, число ходов, использован ли прыжок),
+полные логи - по желанию, в отдельный файл на партию.
+"""
+
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Any, Dict, Iterator, Optional, Tuple
+
+from chase_logsink import BufferedFileSink, NullSink, is_safe_log_name
+from chase_terminal import ChaseTerminal
+
+# (номер строки, строка файла сценариев, каталог логов)
+BatchJob = Tuple[int, str, Optional[str]]
+
+
+def game_outcome(terminal: ChaseTerminal) -> str:
+    """Исход последней партии: won, lost, gave_up или interrupted (ввод кончился)"""
+    game = terminal.game
+    if game.game_won:
+        return 'won'
+    if game.game_lost:
+        return 'lost'
+    if game.give_up:
+        return 'gave_up'
+    return 'interrupted'
+
+
+def parse_record(line: str) -> Dict[str, Any]:
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+    seed = record.get('seed')
+    if seed is not None and type(seed) is not int:
+        raise ValueError("seed must be an integer or null")
+    inputs = record.get('inputs', [])
+    if isinstance(inputs, str):
+        inputs = inputs.split()
+    if not isinstance(inputs, list):
+        raise ValueError("inputs must be a list or a string")
+    return {'id': record.get('id'), 'seed': seed, 'inputs': [str(item) for item in inputs]}
+
+
+def play_record(job: BatchJob) -> Dict[str, Any]:
+    """Одна партия без вывода; вызывается в процессе пула"""
+    number, line, log_dir = job
+    summary: Dict[str, Any] = {'line': number}
+    try:
+        record = parse_record(line)
+    except ValueError as e:
+        summary['error'] = str(e)
+        return summary
+    summary.update(id=record['id'] if record['id'] is not None else number, seed=record['seed'])
+
+    if log_dir:
+        name = str(summary['id'])
+        # id, непригодный как имя файла, заменяется номером строки
+        log_name = f"{name if is_safe_log_name(name) else number}.log"
+        summary['log'] = log_name
+        try:
+            sink = BufferedFileSink(os.path.join(log_dir, log_name))
+        except OSError as e:
+            # Лог одной партии не открылся - ошибка только в ее итогах
+            summary['error'] = f"cannot open log: {e}"
+            return summary
+    else:
+        sink = NullSink()
+    try:
+        try:
+            terminal = ChaseTerminal(seed=record['seed'], quiet=True)
+            terminal.run_with_inputs(record['inputs'], log_sink=sink)
+        finally:
+            sink.close()
+    except OSError as e:
+        # Лог пишется пачками: переполнение диска видно уже во время партии
+        summary['error'] = f"cannot write log: {e}"
+        return summary
+    summary.update(
+        outcome=game_outcome(terminal),
+        moves=terminal.game.move_count,
+        jump_used=terminal.game.jump_used,
+        interceptors_destroyed=terminal.game.interceptors_destroyed,
+    )
+    return summary
+
+
+def read_jobs(stream: IO[str], log_dir: Optional[str]) -> Iterator[BatchJob]:
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            yield number, line, log_dir
+
+
+def run_batch(stream: IO[str], output: IO[str], jobs: Optional[int] = None,
+              log_dir: Optional[str] = None, chunk_size: int = 32) -> Dict[str, int]:
+    """
+    Прогон файла сценариев; строки итогов пишутся в output в порядке
+    сценариев. jobs=1 - в текущем процессе. Возвращает число партий по исходам.
+    """
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    counts: Dict[str, int] = {}
+    if jobs == 1:
+        results = map(play_record, read_jobs(stream, log_dir))
+        executor = None
+    else:
+        # Игра использует глобальный random: у каждого процесса он свой
+        executor = ProcessPoolExecutor(jobs)
+        results = executor.map(play_record, read_jobs(stream, log_dir), chunksize=chunk_size)
+    try:
+        for summary in results:
+            output.write(json.dumps(summary) + '\n')
+            outcome = summary.get('outcome', 'error')
+            counts[outcome] = counts.get(outcome, 0) + 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    output.flush()
+    return counts
+
+
+def main_batch(path: str, output_path: Optional[str], jobs: Optional[int],
+               log_dir: Optional[str], stdin: Optional[IO[str]] = None,
+               stdout: Optional[IO[str]] = None, stderr: Optional[IO[str]] = None) -> int:
+    """Запуск из chase_terminal.py --batch; итоги по исходам - в stderr"""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    source = stdin if path == '-' else open(path, encoding='utf-8')
+    output = stdout if not output_path else open(output_path, 'w', encoding='utf-8')
+    try:
+        counts = run_batch(source, output, jobs, log_dir)
+    finally:
+        if source is not stdin:
+            source.close()
+        if output is not stdout:
+            output.close()
+    total = sum(counts.values())
+    details = ', '.join(f'{name}: {count}' for name, count in sorted(counts.items()))
+    print(f"Games: {total} ({details})", file=stderr or sys.stderr)
+    return 1 if counts.get('error') else 0
@@ -0,0 +1,120 @@
+"""
+chase_bots.py - Встроенные стратегии ботов для игры Chase
+Стратегия получает поле (список строк), позицию игрока, список позиций
+перехватчиков (ChaseGame.interceptors) и генератор случайных чисел и
+возвращает код хода, как если бы его ввел игрок.
+Используются нагрузочным тестом и другими автоматическими прогонами.
+"""
+
+import random
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from chase_core import WALL, INTERCEPTOR
+
+# Смещения обычных ходов (как в ChaseGame.process_move)
+MOVE_DELTAS = {
+    1: (1, -1), 2: (1, 0), 3: (1, 1),
+    4: (0, -1), 5: (0, 0), 6: (0, 1),
+    7: (-1, -1), 8: (-1, 0), 9: (-1, 1),
+}
+
+Board = Sequence[str]
+Position = Tuple[int, int]
+Strategy = Callable[[Board, Position, Sequence[Position], random.Random], int]
+
+
+def _sign(value: int) -> int:
+    return (value > 0) - (value < 0)
+
+
+def find_interceptors(board: Board) -> List[Position]:
+    """Живые перехватчики на поле"""
+    return [(row, col)
+            for row, line in enumerate(board)
+            for col, cell in enumerate(line)
+            if cell == INTERCEPTOR]
+
+
+def safe_moves(board: Board, player_pos: Position,
+               interceptors: Sequence[Position] = ()) -> List[int]:
+    """
+    Ходы, не ведущие на стену или перехватчика.
+    Позиции из списка interceptors тоже опасны, даже если клетка выглядит пустой:
+    движок проверяет столкновение по списку, а не по символу на поле.
+    """
+    danger = set(interceptors)
+    moves = []
+    for move, (delta_row, delta_col) in MOVE_DELTAS.items():
+        row, col = player_pos[0] + delta_row, player_pos[1] + delta_col
+        if 0 <= row < len(board) and 0 <= col < len(board[row]):
+            if board[row][col] not in (WALL, INTERCEPTOR) and (row, col) not in danger:
+                moves.append(move)
+    return moves
+
+
+def random_strategy(board: Board, player_pos: Position,
+                    interceptors: Sequence[Position], rng: random.Random) -> int:
+    """Случайный безопасный ход"""
+    moves = safe_moves(board, player_pos, interceptors)
+    return rng.choice(moves) if moves else 0
+
+
+def cautious_strategy(board: Board, player_pos: Position,
+                      interceptors: Sequence[Position], rng: random.Random) -> int:
+    """Безопасный ход, максимально удаляющий от ближайшего перехватчика"""
+    moves = safe_moves(board, player_pos, interceptors)
+    if not moves:
+        return 0
+    active = find_interceptors(board)
+    if not active:
+        return 5 if 5 in moves else moves[0]
+
+    def distance(move: int) -> int:
+        row = player_pos[0] + MOVE_DELTAS[move][0]
+        col = player_pos[1] + MOVE_DELTAS[move][1]
+        return min(max(abs(row - r), abs(col - c)) for r, c in active)
+
+    best = max(map(distance, moves))
+    return rng.choice([move for move in moves if distance(move) == best])
+
+
+def lure_strategy(board: Board, player_pos: Position,
+                  interceptors: Sequence[Position], rng: random.Random) -> int:
+    """
+    Безопасный ход, после которого больше всего перехватчиков шагнет на стену.
+    При равенстве выбирается ход, сохраняющий дистанцию.
+    """
+    moves = safe_moves(board, player_pos, interceptors)
+    if not moves:
+        return 0
+    active = find_interceptors(board)
+
+    def score(move: int) -> Tuple[int, int]:
+        row = player_pos[0] + MOVE_DELTAS[move][0]
+        col = player_pos[1] + MOVE_DELTAS[move][1]
+        zapped = 0
+        nearest = len(board) + len(board[0])
+        for r, c in active:
+            next_row, next_col = r + _sign(row - r), c + _sign(col - c)
+            if board[next_row][next_col] == WALL:
+                zapped += 1
+            nearest = min(nearest, max(abs(row - r), abs(col - c)))
+        return zapped, min(nearest, 3)
+
+    best = max(map(score, moves))
+    return rng.choice([move for move in moves if score(move) == best])
+
+
+STRATEGIES: Dict[str, Strategy] = {
+    'random': random_strategy,
+    'cautious': cautious_strategy,
+    'lure': lure_strategy,
+}
+
+
+def get_strategy(name: str) -> Strategy:
+    """Стратегия по имени"""
+    try:
+        return STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown strategy: {name}. Available: {sorted(STRATEGIES)}") from None
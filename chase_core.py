@@ -3,6 +3,7 @@ chase_core.py - Ядро игры Chase, портированное с BASIC
 Сохранена оригинальная логика игры для обеспечения корректного тестирования.
 """
 
+import copy
 import random
 from typing import List, Tuple, Optional, Dict, Any
 
@@ -12,13 +13,84 @@ WALL = 'X'
 PLAYER = '*'
 INTERCEPTOR = '+'
 
+# Версия правил движка. Партия восстанавливается повтором ходов из seed,
+# поэтому любое изменение генерации поля или process_move должно ее менять.
+# v2: такты реального времени и ходы без хода перехватчиков в истории ходов
+ENGINE_VERSION = 2
+
+# Коды истории ходов помимо обычных ходов -1..10:
+# такт реального времени - ход перехватчиков без хода игрока
+TICK = 11
+# ход игрока без хода перехватчиков (режим реального времени) - код хода + PLAYER_ONLY
+PLAYER_ONLY = 32
+# любой неверный ход: он меняет только счетчик ходов
+INVALID_MOVE = 127
+
+class CountingRandom(random.Random):
+    """
+    Генератор случайных чисел партии, считающий израсходованные 32-битные слова.
+    Состояние такого генератора восстанавливается по паре (seed, draws),
+    что позволяет хранить партию компактно.
+    """
+    
+    def seed(self, a=None, version=2):
+        super().seed(a, version)
+        self.draws = 0
+    
+    def getrandbits(self, k: int) -> int:
+        self.draws += (k + 31) // 32
+        return super().getrandbits(k)
+    
+    def advance(self, draws: int):
+        """Пропуск draws слов - восстановление состояния после seed()"""
+        getrandbits = super().getrandbits
+        for _ in range(draws):
+            getrandbits(32)
+        self.draws += draws
+    
+    def getstate(self):
+        return super().getstate(), self.draws
+    
+    def setstate(self, state):
+        internal_state, self.draws = state
+        super().setstate(internal_state)
+    
+    def __copy__(self) -> 'CountingRandom':
+        clone = type(self).__new__(type(self))
+        clone.setstate(self.getstate())
+        return clone
+
+
+def board_changes(old_board: str, new_board: str) -> List[List[Any]]:
+    """Изменившиеся клетки [[row, col, символ], ...] между двумя строками поля"""
+    changes = []
+    if len(old_board) != len(new_board):
+        return changes
+    stride = new_board.find('\n') + 1 or len(new_board) + 1
+    for index, (old, new) in enumerate(zip(old_board, new_board)):
+        if old != new:
+            changes.append([index // stride, index % stride, new])
+    return changes
+
+
 class ChaseGame:
     """Основной класс игры, инкапсулирующий всю логику"""
     
-    def __init__(self, seed: Optional[int] = None):
-        """Инициализация игры с опциональным сидом для воспроизводимости"""
-        if seed is not None:
-            random.seed(seed)
+    def __init__(self, seed: Optional[int] = None, rng: Optional[random.Random] = None):
+        """
+        Инициализация игры с опциональным сидом для воспроизводимости
+        
+        Args:
+            seed: Seed для генератора случайных чисел
+            rng: Собственный генератор партии. Если не задан, используется
+                 глобальный модуль random (как в терминальной версии)
+        """
+        if rng is None:
+            if seed is not None:
+                random.seed(seed)
+            rng = random
+        self.rng = rng
+        self.seed = seed
         
         # Инициализация игрового поля (10x20)
         self.rows = 10
@@ -43,6 +115,12 @@ class ChaseGame:
         self.move_count = 0
         self.interceptors_destroyed = 0
         
+        # Введенные ходы - по ним партия воспроизводится из seed
+        self.move_history = []
+        
+        # Период тактов партии реального времени, мс (None - пошаговая партия)
+        self.tick_ms: Optional[int] = None
+        
         # Инициализация игры
         self._initialize_game()
     
@@ -51,7 +129,7 @@ class ChaseGame:
         # Сначала заполняем поле случайными 'X' (строка 190-290)
         for row in range(self.rows):
             for col in range(self.cols):
-                x = random.randint(0, 9)  # В BASIC: INT(10*RND(1))
+                x = self.rng.randint(0, 9)  # В BASIC: INT(10*RND(1))
                 if x == 5:  # 10% вероятность стены
                     self.board[row][col] = WALL
                 else:
@@ -68,8 +146,8 @@ class ChaseGame:
         
         # Размещаем игрока (строки 410-420)
         while True:
-            row = random.randint(1, self.rows-2)  # 2+8*RND(1) в BASIC
-            col = random.randint(1, self.cols-2)  # 2+18*RND(1) в BASIC
+            row = self.rng.randint(1, self.rows-2)  # 2+8*RND(1) в BASIC
+            col = self.rng.randint(1, self.cols-2)  # 2+18*RND(1) в BASIC
             if self.board[row][col] == EMPTY:
                 self.board[row][col] = PLAYER
                 self.player_pos = (row, col)
@@ -80,8 +158,8 @@ class ChaseGame:
         self.interceptors = []
         for _ in range(5):
             while True:
-                row = random.randint(1, self.rows-2)
-                col = random.randint(1, self.cols-2)
+                row = self.rng.randint(1, self.rows-2)
+                col = self.rng.randint(1, self.cols-2)
                 if self.board[row][col] == EMPTY:
                     self.board[row][col] = INTERCEPTOR
                     self.interceptors.append((row, col))
@@ -155,7 +233,7 @@ class ChaseGame:
             # Перехватчик исчезает с поля
             return False
     
-    def process_move(self, move: int) -> Dict[str, Any]:
+    def process_move(self, move: int, advance_interceptors: bool = True) -> Dict[str, Any]:
         """
         Обработка хода игрока
         Возвращает словарь с результатом хода
@@ -166,6 +244,11 @@ class ChaseGame:
         890: Проверка на стену (если стена - смерть)
         900-910: Установка новой позиции игрока
         920: GOTO 1070 (движение перехватчиков)
+        
+        Args:
+            move: Код хода (-1..10)
+            advance_interceptors: False - только ход игрока; перехватчики
+                                  двигаются по тактам (режим реального времени)
         """
         result = {
             'valid_move': True,
@@ -182,6 +265,12 @@ class ChaseGame:
             return result
         
         self.move_count += 1
+        if not -1 <= move <= 10:
+            self.move_history.append(INVALID_MOVE)
+        elif advance_interceptors:
+            self.move_history.append(move)
+        else:
+            self.move_history.append(move + PLAYER_ONLY)
         
         # Сохраняем старую позицию игрока
         old_row, old_col = self.player_pos
@@ -192,8 +281,8 @@ class ChaseGame:
             self.jump_used = True
             
             # Ищем случайную позицию как в оригинале (строки 870-880)
-            new_row = random.randint(1, self.rows-2)  # 2+8*RND(1)
-            new_col = random.randint(1, self.cols-2)  # 2+18*RND(1)
+            new_row = self.rng.randint(1, self.rows-2)  # 2+8*RND(1)
+            new_col = self.rng.randint(1, self.cols-2)  # 2+18*RND(1)
             
             # НЕ устанавливаем сразу позицию игрока!
             # В оригинале проверка происходит в строке 890
@@ -256,6 +345,40 @@ class ChaseGame:
         self.board[new_pos[0]][new_pos[1]] = PLAYER
         self.player_pos = new_pos
         
+        if not advance_interceptors:
+            return result
+        return self._advance_interceptors(result)
+    
+    def tick(self) -> Dict[str, Any]:
+        """
+        Такт реального времени: перехватчики делают ход, игрок стоит на месте.
+        Ходом игрока не считается (move_count не меняется), но записывается
+        в историю, чтобы партия восстанавливалась повтором.
+        """
+        result = {
+            'valid_move': True,
+            'message': '',
+            'player_destroyed': False,
+            'game_over': False,
+            'game_won': False
+        }
+        if self.game_over:
+            result['valid_move'] = False
+            result['message'] = 'Game is already over'
+            return result
+        self.move_history.append(TICK)
+        return self._advance_interceptors(result)
+    
+    def replay_move(self, code: int) -> Dict[str, Any]:
+        """Применение кода из move_history (ход, такт или ход без перехватчиков)"""
+        if code == TICK:
+            return self.tick()
+        if PLAYER_ONLY - 1 <= code <= PLAYER_ONLY + 10:
+            return self.process_move(code - PLAYER_ONLY, advance_interceptors=False)
+        return self.process_move(code)
+    
+    def _advance_interceptors(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Ход перехватчиков и проверка исхода (строки 1070-1250 BASIC)"""
         # Ключевое исправление: Движение перехватчиков происходит ВСЕГДА
         # после хода игрока, включая прыжок (строки 1070-1130)
         player_destroyed = False
@@ -331,6 +454,23 @@ class ChaseGame:
                 result['game_over'] = True
             
             return result
+        
+        return result
+    
+    def copy(self) -> 'ChaseGame':
+        """
+        Быстрая копия партии без повторной генерации поля.
+        Начальная расстановка (original_*) не изменяется во время игры,
+        поэтому разделяется между копиями.
+        """
+        clone = ChaseGame.__new__(ChaseGame)
+        clone.__dict__.update(self.__dict__)
+        clone.board = [row.copy() for row in self.board]
+        clone.interceptors = self.interceptors.copy()
+        clone.move_history = self.move_history.copy()
+        if self.rng is not random:
+            clone.rng = copy.copy(self.rng)
+        return clone
     
     def get_board_string(self) -> str:
         """Возвращает текстовое представление игрового поля"""
@@ -366,6 +506,7 @@ class ChaseGame:
             self.give_up = False
             self.move_count = 0
             self.interceptors_destroyed = 0
+            self.move_history = []
     
     def get_instructions(self) -> str:
         """Возвращает инструкции игры"""
@@ -0,0 +1,149 @@
+"""
+chase_curses.py - Терминальная версия с инкрементальной отрисовкой через curses
+Заголовок, инструкции и поле рисуются один раз; после каждого хода
+перерисовываются только изменившиеся клетки поля и строка сообщения.
+Экран не очищается и не перерисовывается целиком, внешние команды
+(clear/cls) не запускаются - на медленных SSH-каналах это заметно.
+"""
+
+from typing import List, Optional
+
+from chase_core import ChaseGame, board_changes
+from chase_terminal import HEADER_LINES, parse_move
+
+# Раскладка экрана: поле слева, инструкции справа от него, под ними -
+# сообщение (до двух строк) и строка ввода. Помещается в 80x24.
+BOARD_TOP = 4
+INSTRUCTIONS_LEFT = 23
+MESSAGE_TOP = 19
+MESSAGE_LINES = 2
+PROMPT_ROW = 22
+MIN_SIZE = (PROMPT_ROW + 1, 80)
+
+
+class TerminalTooSmall(RuntimeError):
+    """Окно терминала меньше раскладки экрана"""
+
+
+class CursesRenderer:
+    """
+    Отрисовка партии в окне curses. Окно - любой объект с методами
+    addstr, move, clrtoeol и refresh (stdscr или его замена в тестах).
+    """
+
+    def __init__(self, screen):
+        self.screen = screen
+        self._board: Optional[str] = None
+        self._message: List[str] = []
+
+    def draw_frame(self, game: ChaseGame):
+        """Статическая часть экрана и поле целиком (один раз за сеанс)"""
+        # Пустые строки после заголовка заменяет отступ BOARD_TOP
+        for row, line in enumerate(line for line in HEADER_LINES if line.strip()):
+            self.screen.addstr(row, 0, line)
+        for row, line in enumerate(game.get_instructions().split('\n')):
+            self.screen.addstr(BOARD_TOP + row, INSTRUCTIONS_LEFT, line)
+        board = game.get_board_string()
+        for row, line in enumerate(board.split('\n')):
+            self.screen.addstr(BOARD_TOP + row, 0, line)
+        self._board = board
+        self._message = []
+        self.screen.refresh()
+
+    def update(self, game: ChaseGame, message: str = '') -> int:
+        """
+        Перерисовка изменившихся клеток и сообщения после хода.
+        Возвращает число перерисованных клеток.
+        """
+        board = game.get_board_string()
+        changes = board_changes(self._board, board)
+        for row, col, cell in changes:
+            self.screen.addstr(BOARD_TOP + row, col, cell)
+        self._board = board
+        self.show_message(message)
+        self.screen.refresh()
+        return len(changes)
+
+    def show_message(self, message: str):
+        lines = message.split('\n')[:MESSAGE_LINES] if message else []
+        if lines == self._message:
+            return
+        for index in range(MESSAGE_LINES):
+            self.screen.move(MESSAGE_TOP + index, 0)
+            self.screen.clrtoeol()
+            if index < len(lines):
+                self.screen.addstr(MESSAGE_TOP + index, 0, lines[index])
+        self._message = lines
+
+
+class CursesTerminal:
+    """Игровой цикл терминальной версии поверх CursesRenderer"""
+
+    def __init__(self, screen, seed: Optional[int] = None):
+        self.screen = screen
+        self.game = ChaseGame(seed)
+        self.renderer = CursesRenderer(screen)
+
+    def read_line(self, prompt: str) -> Optional[str]:
+        """Строка ввода с эхом; None - ввод прерван"""
+        import curses
+
+        self.screen.move(PROMPT_ROW, 0)
+        self.screen.clrtoeol()
+        self.screen.addstr(PROMPT_ROW, 0, prompt)
+        curses.echo()
+        try:
+            return self.screen.getstr(PROMPT_ROW, len(prompt), 16).decode('ascii', 'replace').strip()
+        except KeyboardInterrupt:
+            return None
+        finally:
+            curses.noecho()
+
+    def read_move(self) -> Optional[int]:
+        while True:
+            text = self.read_line("YOUR MOVE? ")
+            if text is None:
+                return None
+            move, error = parse_move(text)
+            if move is not None:
+                return move
+            if error:
+                self.renderer.show_message(error)
+
+    def ask(self, prompt: str) -> bool:
+        while True:
+            text = self.read_line(prompt)
+            if text is None:
+                return False
+            if text.upper() in ('Y', 'N'):
+                return text.upper() == 'Y'
+            self.renderer.show_message("Please enter Y or N")
+
+    def run(self):
+        rows, cols = self.screen.getmaxyx()
+        if rows < MIN_SIZE[0] or cols < MIN_SIZE[1]:
+            raise TerminalTooSmall(f"Terminal must be at least {MIN_SIZE[1]}x{MIN_SIZE[0]}")
+        self.renderer.draw_frame(self.game)
+        while True:
+            while not self.game.game_over:
+                move = self.read_move()
+                if move is None:
+                    return
+                result = self.game.process_move(move)
+                self.renderer.update(self.game, result['message'])
+            if not self.ask("ANOTHER GAME (Y/N)? "):
+                return
+            if self.ask("SAME SETUP (Y/N)? "):
+                self.game.reset_to_original()
+            else:
+                # Новая расстановка: без seed, иначе получим то же поле
+                self.game = ChaseGame()
+            # Рамка и инструкции не меняются - перерисовываются только клетки поля
+            self.renderer.update(self.game)
+
+
+def run_curses(seed: Optional[int] = None):
+    """Запуск игры в curses (восстанавливает терминал и при ошибке)"""
+    import curses
+
+    curses.wrapper(lambda screen: CursesTerminal(screen, seed).run())
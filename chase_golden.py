@@ -0,0 +1,144 @@
+"""
+chase_golden.py - Хранилище эталонных логов с адресацией по содержимому
+Нормализованный лог (generate_golden_master.normalize_log) хранится один
+раз под хешем своего содержимого - objects/ab/cdef...; манифест сопоставляет
+сценарию хеш. Одинаковые логи (например, сотни сдач "GIVE UP, EH.") лишнего
+места не занимают. Проверка сравнивает хеши, полный diff строится только
+при несовпадении.
+"""
+
+import difflib
+import hashlib
+import json
+import os
+import tempfile
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MANIFEST = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# Сколько строк diff показывать при несовпадении
+DIFF_LINES = 40
+
+
+def log_bytes(lines: Iterable[str]) -> bytes:
+    """Каноническое содержимое лога: строки через \\n с завершающим \\n"""
+    return ''.join(line + '\n' for line in lines).encode('utf-8')
+
+
+def log_digest(lines: Iterable[str]) -> str:
+    return hashlib.blake2b(log_bytes(lines), digest_size=16).hexdigest()
+
+
+def diff_message(expected: List[str], actual: List[str], limit: int = DIFF_LINES) -> str:
+    """Начало unified diff эталона и нового лога"""
+    diff = list(islice(difflib.unified_diff(expected, actual, 'golden', 'current', lineterm=''),
+                       limit + 1))
+    if len(diff) > limit:
+        diff[limit:] = ['...']
+    return '\n'.join(diff)
+
+
+def _write_atomic(path: str, data: bytes):
+    """Запись через временный файл: параллельные процессы не видят половину файла"""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+class GoldenStore:
+    """
+    Каталог root: objects/ - логи по хешу, manifest.json - сценарий -> хеш.
+    Объекты неизменяемы, поэтому put безопасен из нескольких процессов;
+    манифест читается при первом обращении и пишется только save().
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.objects = os.path.join(root, 'objects')
+        os.makedirs(self.objects, exist_ok=True)
+        self._manifest: Optional[Dict[str, str]] = None
+
+    @property
+    def manifest(self) -> Dict[str, str]:
+        if self._manifest is None:
+            path = os.path.join(self.root, MANIFEST)
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') != MANIFEST_VERSION:
+                    raise ValueError(f"Unsupported manifest version: {data.get('version')}")
+                self._manifest = data['scenarios']
+            else:
+                self._manifest = {}
+        return self._manifest
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.objects, digest[:2], digest[2:])
+
+    def put(self, lines: List[str]) -> str:
+        """Сохранение лога (если такого еще нет); возвращает хеш"""
+        data = log_bytes(lines)
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_atomic(path, data)
+        return digest
+
+    def get(self, digest: str) -> List[str]:
+        with open(self.object_path(digest), encoding='utf-8') as f:
+            return f.read().split('\n')[:-1]
+
+    def record(self, name: str, lines: List[str]) -> str:
+        digest = self.put(lines)
+        self.manifest[name] = digest
+        return digest
+
+    def save(self):
+        data = {'version': MANIFEST_VERSION, 'scenarios': dict(sorted(self.manifest.items()))}
+        _write_atomic(os.path.join(self.root, MANIFEST),
+                      (json.dumps(data, indent=0) + '\n').encode('utf-8'))
+
+    def check(self, expected: Optional[str], lines: List[str]) -> Tuple[bool, str]:
+        """Сравнение лога с эталоном по хешу; diff - только при несовпадении"""
+        if expected is None:
+            return False, "Эталон не найден в манифесте"
+        if log_digest(lines) == expected:
+            return True, "Логи идентичны"
+        return False, diff_message(self.get(expected), lines)
+
+    def verify(self, name: str, lines: List[str]) -> Tuple[bool, str]:
+        return self.check(self.manifest.get(name), lines)
+
+    def prune(self) -> int:
+        """Удаление логов, на которые не ссылается манифест; возвращает их число"""
+        referenced = set(self.manifest.values())
+        removed = 0
+        for prefix in os.listdir(self.objects):
+            directory = os.path.join(self.objects, prefix)
+            # Посторонние файлы (.DS_Store и т.п.) - не каталоги объектов
+            if not os.path.isdir(directory):
+                continue
+            for rest in os.listdir(directory):
+                # .tmp-* - объект, который другой процесс еще записывает
+                if rest.startswith('.'):
+                    continue
+                if prefix + rest not in referenced:
+                    os.unlink(os.path.join(directory, rest))
+                    removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Число сценариев, уникальных логов и их общий размер"""
+        unique = set(self.manifest.values())
+        size = sum(os.path.getsize(self.object_path(digest)) for digest in unique
+                   if os.path.exists(self.object_path(digest)))
+        return {'scenarios': len(self.manifest), 'objects': len(unique), 'bytes': size}
@@ -0,0 +1,144 @@
+"""
+chase_hint.py - Подсказка следующего хода
+Для каждого безопасного хода (и прыжка) оценивается вероятность продержаться
+horizon ходов: партия копируется и доигрывается осторожным ботом по правилам
+ChaseGame.process_move. Оценки уточняются по кругу, пока не исчерпан бюджет
+времени; по истечении срока возвращается лучший найденный ход.
+Завершенные оценки кэшируются по хешу позиции, поэтому повторные позиции
+(например, после SAME SETUP) получают ответ сразу.
+Доигрывание моделирует пошаговую партию; для партий реального времени
+(перехватчики ходят по такту, а не после хода) подсказка не дается.
+"""
+
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from chase_bots import cautious_strategy, safe_moves
+from chase_core import ChaseGame
+
+# Прыжок - случайный ход; его исход в подсказке не подсматривается
+JUMP = 0
+
+
+def state_key(game: ChaseGame) -> bytes:
+    """
+    Хеш позиции: поле, игрок и список перехватчиков (включая исчезнувших).
+    Состояние генератора не входит: прыжок оценивается как случайный.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(game.get_board_string().encode('ascii'))
+    digest.update(repr((game.player_pos, game.interceptors)).encode('ascii'))
+    return digest.digest()
+
+
+class _Estimate:
+    """Накопленная оценка выживания для одного хода"""
+    __slots__ = ('move', 'survived', 'samples', 'exact')
+
+    def __init__(self, move: int):
+        self.move = move
+        self.survived = 0
+        self.samples = 0
+        self.exact = False
+
+    @property
+    def probability(self) -> float:
+        return self.survived / self.samples if self.samples else 0.0
+
+    @property
+    def rank(self) -> Tuple[float, int, bool]:
+        # При равенстве лучше ход с большим числом проб, затем - не прыжок
+        return self.probability, self.samples, self.move != JUMP
+
+
+class HintEngine:
+    """Поиск подсказки с ограничением по времени и кэшем по позиции"""
+
+    def __init__(self, horizon: int = 12, rollouts: int = 16, cache_size: int = 4096):
+        """
+        Args:
+            horizon: Сколько ходов доигрывается после подсказанного
+            rollouts: Сколько доигрываний на ход для завершенной оценки
+            cache_size: Сколько позиций хранить в кэше
+        """
+        self.horizon = horizon
+        self.rollouts = rollouts
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[bytes, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _rollout(self, game: ChaseGame, move: int, seed: int) -> Tuple[bool, bool]:
+        """Одно доигрывание: (выжил ли, был ли исход детерминирован)"""
+        rng = random.Random(seed)
+        sim = game.copy()
+        sim.rng = rng
+        sim.process_move(move)
+        if sim.game_over:
+            return not sim.game_lost, move != JUMP
+        for _ in range(self.horizon):
+            sim.process_move(cautious_strategy(sim.board, sim.player_pos, sim.interceptors, rng))
+            if sim.game_over:
+                break
+        return not sim.game_lost, False
+
+    def _search(self, game: ChaseGame, key: bytes, deadline: float) -> Tuple[List[_Estimate], bool]:
+        moves = safe_moves(game.board, game.player_pos, game.interceptors)
+        estimates = [_Estimate(move) for move in moves] + [_Estimate(JUMP)]
+        base_seed = int.from_bytes(key[:8], 'little')
+        for index in range(self.rollouts):
+            for estimate in estimates:
+                if estimate.exact:
+                    continue
+                if time.perf_counter() >= deadline and any(e.samples for e in estimates):
+                    return estimates, False
+                survived, exact = self._rollout(
+                    game, estimate.move, base_seed ^ (index << 8 | estimate.move + 1)
+                )
+                estimate.survived += survived
+                estimate.samples += 1
+                estimate.exact = exact
+        return estimates, True
+
+    def hint(self, game: ChaseGame, budget: float = 0.1) -> Dict[str, Any]:
+        """
+        Рекомендуемый ход и оценка вероятности выжить
+
+        Args:
+            game: Партия (не изменяется)
+            budget: Бюджет времени поиска, секунды
+        """
+        started = time.perf_counter()
+        if game.game_over:
+            return {'move': None, 'survival': 0.0, 'complete': True, 'cached': False,
+                    'candidates': {}, 'rollouts': 0, 'elapsed_ms': 0.0}
+
+        key = state_key(game)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is not None:
+            return dict(cached, cached=True,
+                        elapsed_ms=round((time.perf_counter() - started) * 1000, 3))
+
+        estimates, complete = self._search(game, key, started + budget)
+        best = max(estimates, key=lambda estimate: estimate.rank)
+        result = {
+            'move': best.move,
+            'survival': round(best.probability, 4),
+            'complete': complete,
+            'cached': False,
+            'candidates': {str(e.move): round(e.probability, 4) for e in estimates if e.samples},
+            'rollouts': sum(e.samples for e in estimates),
+        }
+        if complete:
+            with self._lock:
+                self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        return result
@@ -0,0 +1,84 @@
+"""
+chase_json.py - Быстрая сериализация ответов веб-версии в JSON
+Ответы игрового сервиса - плоские словари с фиксированным набором ключей
+из строк, чисел, флагов и позиций. Вместо jsonify (с преобразованием
+кортежей и общим обходом объектов) ответ собирается по шаблону,
+закэшированному для набора ключей, из заранее подготовленных фрагментов.
+Если установлен orjson, используется он.
+"""
+
+import json
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Dict, Tuple
+
+try:
+    import orjson
+except ImportError:  # Необязательная зависимость
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'fragments'
+
+# Шаблоны '{"k1":%s,"k2":%s,...}' по набору ключей ответа
+_TEMPLATES: Dict[Tuple[str, ...], str] = {}
+
+# Фрагменты '[row,col]' по позиции - их немного, кэш ограничен размером поля
+_POSITIONS: Dict[Tuple[int, int], str] = {}
+
+
+def _position(pos: Tuple[int, int]) -> str:
+    fragment = _POSITIONS.get(pos)
+    if fragment is None:
+        fragment = _POSITIONS[pos] = '[%d,%d]' % tuple(pos)
+    return fragment
+
+
+def _encode_bool(value: bool) -> str:
+    return 'true' if value else 'false'
+
+
+def _encode_none(value: None) -> str:
+    return 'null'
+
+
+def _encode_tuple(value: tuple) -> str:
+    if len(value) == 2:
+        return _position(value)
+    return _encode_other(value)
+
+
+def _encode_list(value: list) -> str:
+    if value and type(value[0]) is tuple:
+        return '[' + ','.join(map(_position, value)) + ']'
+    return _encode_other(value)
+
+
+def _encode_other(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'))
+
+
+_ENCODERS: Dict[type, Callable[[Any], str]] = {
+    bool: _encode_bool,
+    type(None): _encode_none,
+    str: encode_basestring_ascii,
+    int: str,
+    tuple: _encode_tuple,
+    list: _encode_list,
+}
+
+
+def _encode_object(payload: Dict[str, Any]) -> bytes:
+    keys = tuple(payload)
+    template = _TEMPLATES.get(keys)
+    if template is None:
+        template = '{' + ','.join(encode_basestring_ascii(key) + ':%s' for key in keys) + '}'
+        _TEMPLATES[keys] = template
+    values = tuple([_ENCODERS.get(type(value), _encode_other)(value)
+                    for value in payload.values()])
+    return (template % values).encode('ascii')
+
+
+def dumps(payload: Dict[str, Any]) -> bytes:
+    """Сериализация ответа в байты JSON"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return _encode_object(payload)
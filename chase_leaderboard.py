@@ -0,0 +1,264 @@
+"""
+chase_leaderboard.py - Таблица рекордов веб-версии
+Результаты завершенных партий (seed, число ходов, исход, использован ли
+прыжок) пишутся пакетами в индексированную таблицу SQLite. Топ-N по seed
+и общий топ отдаются из кэша в памяти, который при поступлении новых
+результатов обновляется точечно, без повторного запроса к базе.
+"""
+
+import bisect
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+OUTCOMES = ('won', 'lost', 'abandoned')
+
+# Ранг результата: победы по возрастанию числа ходов, затем поражения
+# и сдавшиеся по убыванию числа ходов (кто дольше продержался)
+_TIER = 1 << 32
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS results ('
+    ' id INTEGER PRIMARY KEY,'
+    ' seed INTEGER NOT NULL,'
+    ' move_count INTEGER NOT NULL,'
+    ' outcome TEXT NOT NULL,'
+    ' jump_used INTEGER NOT NULL,'
+    ' score INTEGER NOT NULL,'
+    ' finished_at REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS results_rank ON results (score, jump_used, id)',
+    'CREATE INDEX IF NOT EXISTS results_seed_rank ON results (seed, score, jump_used, id)',
+)
+
+_COLUMNS = 'id, seed, move_count, outcome, jump_used, score, finished_at'
+
+
+def rank_score(outcome: str, move_count: int) -> int:
+    """Очки для сортировки: меньше - лучше"""
+    if outcome == 'won':
+        return move_count
+    tier = OUTCOMES.index(outcome)
+    return tier * _TIER + (_TIER - 1 - move_count)
+
+
+class Result(NamedTuple):
+    """Результат одной партии"""
+    id: int
+    seed: int
+    move_count: int
+    outcome: str
+    jump_used: bool
+    score: int
+    finished_at: float
+
+    @property
+    def sort_key(self) -> Tuple[int, bool, int]:
+        return self.score, self.jump_used, self.id
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'seed': self.seed,
+            'move_count': self.move_count,
+            'outcome': self.outcome,
+            'jump_used': self.jump_used,
+            'finished_at': self.finished_at,
+        }
+
+
+def outcome_of(response: Dict[str, Any]) -> str:
+    """Исход партии по ответу игрового сервиса"""
+    if response.get('game_won'):
+        return 'won'
+    if response.get('game_lost'):
+        return 'lost'
+    return 'abandoned'
+
+
+class Leaderboard:
+    """
+    Таблица рекордов с отложенной пакетной записью и кэшем топ-N.
+
+    Кэш хранит отсортированные списки лучших результатов (до cache_depth)
+    для общего топа и для недавно запрошенных seed. Новый результат
+    вставляется в уже закэшированные списки бинарным поиском; если он
+    не попадает в топ - списки не меняются.
+    """
+
+    def __init__(self, path: str = ':memory:', cache_depth: int = 100,
+                 cached_seeds: int = 1024, flush_interval: float = 0.5,
+                 batch_size: int = 256):
+        self.path = path
+        self.cache_depth = cache_depth
+        self.cached_seeds = cached_seeds
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._next_id: Optional[int] = None
+        self._pending: List[Result] = []
+        # None - общий топ; ключи-seed упорядочены по давности запроса
+        self._global: Optional[List[Result]] = None
+        self._by_seed: 'OrderedDict[int, List[Result]]' = OrderedDict()
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._stopped = False
+
+    # ------------------------------------------------------------------
+    # База данных
+    # ------------------------------------------------------------------
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            if self.path != ':memory:':
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self._next_id = (conn.execute('SELECT MAX(id) FROM results').fetchone()[0] or 0) + 1
+            self._conn = conn
+        return self._conn
+
+    def _query(self, seed: Optional[int]) -> List[Result]:
+        """Топ из базы; вызывается под _db_lock"""
+        if seed is None:
+            sql = (f'SELECT {_COLUMNS} FROM results '
+                   'ORDER BY score, jump_used, id LIMIT ?')
+            args: Tuple[Any, ...] = (self.cache_depth,)
+        else:
+            sql = (f'SELECT {_COLUMNS} FROM results WHERE seed = ? '
+                   'ORDER BY score, jump_used, id LIMIT ?')
+            args = (seed, self.cache_depth)
+        rows = self._connection().execute(sql, args).fetchall()
+        return [Result(row[0], row[1], row[2], row[3], bool(row[4]), row[5], row[6])
+                for row in rows]
+
+    def _write_pending(self):
+        """Запись накопленных результатов; вызывается под _db_lock"""
+        with self._lock:
+            batch = self._pending
+            self._pending = []
+        if not batch:
+            return
+        conn = self._connection()
+        conn.executemany(
+            f'INSERT INTO results ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(r.id, r.seed, r.move_count, r.outcome, int(r.jump_used), r.score,
+              r.finished_at) for r in batch]
+        )
+        conn.commit()
+
+    def flush(self):
+        """Запись накопленных результатов одной транзакцией"""
+        with self._db_lock:
+            self._write_pending()
+
+    def _ensure_worker(self):
+        if self._worker is None and not self._stopped:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._flush_loop, name='chase-leaderboard-flush', daemon=True
+                    )
+                    self._worker.start()
+
+    def _flush_loop(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """Остановка фоновой записи, сброс результатов и закрытие базы"""
+        self._stopped = True
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ------------------------------------------------------------------
+    # Запись и чтение
+    # ------------------------------------------------------------------
+
+    def _merge(self, entries: List[Result], result: Result):
+        """Вставка результата в закэшированный топ, если он туда попадает"""
+        if len(entries) >= self.cache_depth and result.sort_key >= entries[-1].sort_key:
+            return
+        keys = [entry.sort_key for entry in entries]
+        entries.insert(bisect.bisect(keys, result.sort_key), result)
+        del entries[self.cache_depth:]
+
+    def record(self, seed: int, move_count: int, outcome: str,
+               jump_used: bool, finished_at: Optional[float] = None) -> Result:
+        """Учет завершенной партии (запись в базу - отложенная)"""
+        if outcome not in OUTCOMES:
+            raise ValueError(f"Unknown outcome: {outcome}")
+        if self._next_id is None:
+            with self._db_lock:
+                self._connection()
+        with self._lock:
+            result_id = self._next_id
+            self._next_id += 1
+            result = Result(result_id, seed, move_count, outcome, bool(jump_used),
+                            rank_score(outcome, move_count),
+                            time.time() if finished_at is None else finished_at)
+            self._pending.append(result)
+            if self._global is not None:
+                self._merge(self._global, result)
+            entries = self._by_seed.get(seed)
+            if entries is not None:
+                self._merge(entries, result)
+            backlog = len(self._pending)
+        self._ensure_worker()
+        if backlog >= self.batch_size:
+            self._wakeup.set()
+        return result
+
+    def record_response(self, response: Dict[str, Any]) -> Optional[Result]:
+        """Учет партии по ответу хода; незавершенные партии пропускаются"""
+        if not response.get('game_over'):
+            return None
+        return self.record(response['seed'], response['move_count'],
+                           outcome_of(response), response.get('jump_used', False))
+
+    def top(self, seed: Optional[int] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Лучшие результаты по seed или общие"""
+        limit = max(0, min(limit, self.cache_depth))
+        with self._lock:
+            entries = self._global if seed is None else self._by_seed.get(seed)
+            if entries is not None:
+                if seed is not None:
+                    self._by_seed.move_to_end(seed)
+                return [entry.to_dict() for entry in entries[:limit]]
+
+        # Промах кэша: накопленное уходит в базу и выполняется один запрос.
+        # _db_lock не дает фоновой записи вклиниться между ними, а результаты,
+        # пришедшие после записи, вливаются в ответ из очереди.
+        with self._db_lock:
+            self._write_pending()
+            entries = self._query(seed)
+            with self._lock:
+                for result in self._pending:
+                    if seed is None or result.seed == seed:
+                        self._merge(entries, result)
+                if seed is None:
+                    self._global = entries
+                else:
+                    self._by_seed[seed] = entries
+                    while len(self._by_seed) > self.cached_seeds:
+                        self._by_seed.popitem(last=False)
+                return [entry.to_dict() for entry in entries[:limit]]
+
+    def count(self) -> int:
+        """Число записанных результатов"""
+        with self._db_lock:
+            self._write_pending()
+            return self._connection().execute('SELECT COUNT(*) FROM results').fetchone()[0]
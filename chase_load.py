@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+chase_load.py - Нагрузочный тест HTTP API веб-версии Chase
+Много одновременных игроков-ботов вызывают /api/new_game и /api/move
+через пул keep-alive соединений. Отчет: пропускная способность и
+задержки p50/p95/p99 по каждому эндпоинту, с сохранением в JSON.
+Работает с локально запущенным сервером без доступа к сети.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from chase_bots import STRATEGIES, get_strategy
+from chase_stats import percentile
+
+
+class ConnectionPool:
+    """Пул постоянных HTTP/1.1 соединений к одному серверу"""
+
+    def __init__(self, host: str, port: int, size: int, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._idle: 'queue.LifoQueue[http.client.HTTPConnection]' = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(self._connect())
+
+    def _connect(self) -> http.client.HTTPConnection:
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method: str, path: str,
+                payload: Optional[Dict[str, Any]] = None) -> Tuple[int, Dict[str, Any]]:
+        """Запрос с JSON-телом; разорванное сервером соединение открывается заново"""
+        body = json.dumps(payload) if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        conn = self._idle.get()
+        try:
+            for attempt in range(2):
+                try:
+                    conn.request(method, path, body=body, headers=headers)
+                    response = conn.getresponse()
+                    data = response.read()
+                    if response.will_close:
+                        conn.close()
+                    break
+                except (http.client.RemoteDisconnected, ConnectionError,
+                        http.client.CannotSendRequest, http.client.ResponseNotReady):
+                    conn.close()
+                    conn = self._connect()
+                    if attempt:
+                        raise
+            return response.status, json.loads(data) if data else {}
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class LoadStats:
+    """Задержки и ошибки по эндпоинтам"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.games_finished = 0
+        # Партии, прерванные ошибкой запроса: не входят в games_finished
+        self.games_failed = 0
+
+    def record_game(self, ok: bool):
+        with self._lock:
+            if ok:
+                self.games_finished += 1
+            else:
+                self.games_failed += 1
+
+    def record(self, endpoint: str, latency: float, ok: bool):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(latency)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        total = 0
+        for endpoint, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            total += len(ordered)
+            endpoints[endpoint] = {
+                'requests': len(ordered),
+                'errors': self.errors.get(endpoint, 0),
+                'throughput_rps': round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+                'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+                'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+                'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+                'max_ms': round(ordered[-1] * 1000, 3),
+            }
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'requests': total,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+            'games_finished': self.games_finished,
+            'games_failed': self.games_failed,
+            'games_per_s': round(self.games_finished / elapsed, 2) if elapsed else 0.0,
+            'endpoints': endpoints,
+        }
+
+
+def _timed(pool: ConnectionPool, stats: LoadStats, endpoint: str,
+           path: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    started = time.perf_counter()
+    try:
+        status, data = pool.request('POST', path, payload)
+    except (OSError, http.client.HTTPException, ValueError):
+        stats.record(endpoint, time.perf_counter() - started, False)
+        return None
+    stats.record(endpoint, time.perf_counter() - started, status < 400)
+    return data if status < 400 else None
+
+
+def play_games(pool: ConnectionPool, stats: LoadStats, strategy_name: str,
+               games: int, max_moves: int, rng: random.Random):
+    """Один симулируемый игрок: несколько партий подряд"""
+    strategy = get_strategy(strategy_name)
+    for _ in range(games):
+        state = _timed(pool, stats, 'new_game', '/api/new_game', {'seed': None})
+        if state is None:
+            stats.record_game(False)
+            continue
+        game_id = state['game_id']
+        for _ in range(max_moves):
+            move = strategy(state['board'].split('\n'), tuple(state['player_pos']),
+                            [tuple(pos) for pos in state['interceptors']], rng)
+            data = _timed(pool, stats, 'move', '/api/move', {'game_id': game_id, 'move': move})
+            if data is None:
+                stats.record_game(False)
+                break
+            state = data
+            if data['game_over']:
+                stats.record_game(True)
+                break
+        else:
+            # Лимит ходов исчерпан - сдаемся, чтобы партия завершилась
+            data = _timed(pool, stats, 'move', '/api/move', {'game_id': game_id, 'move': -1})
+            stats.record_game(data is not None)
+
+
+def run_load(url: str, players: int = 16, games: int = 5, max_moves: int = 50,
+             strategy: str = 'lure', seed: int = 0) -> Dict[str, Any]:
+    """Запуск нагрузки и сбор отчета"""
+    parts = urlsplit(url)
+    pool = ConnectionPool(parts.hostname or 'localhost', parts.port or 80, size=players)
+    stats = LoadStats()
+    threads = [
+        threading.Thread(
+            target=play_games,
+            args=(pool, stats, strategy, games, max_moves, random.Random(seed + index)),
+            name=f'chase-load-{index}',
+        )
+        for index in range(players)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    pool.close()
+
+    report = stats.report(elapsed)
+    report['config'] = {
+        'url': url, 'players': players, 'games_per_player': games,
+        'max_moves': max_moves, 'strategy': strategy,
+    }
+    return report
+
+
+def start_local_server(host: str = '127.0.0.1', port: int = 0):
+    """
+    Запуск chase_web в фоновом потоке (многопоточный сервер с keep-alive).
+    Возвращает (server, url); остановка - server.shutdown().
+    """
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    # Сессии и рекорды локального прогона не нужно сохранять на диск
+    os.environ.setdefault('CHASE_SESSION_DB', ':memory:')
+    os.environ.setdefault('CHASE_LEADERBOARD_DB', ':memory:')
+    # Все запросы идут с одного адреса: ограничение частоты мешало бы замеру
+    os.environ.setdefault('CHASE_RATE_IP', '0')
+    os.environ.setdefault('CHASE_RATE_SESSION', '0')
+    import chase_web
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server(host, port, chase_web.app, threaded=True,
+                         request_handler=KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, name='chase-load-server', daemon=True)
+    thread.start()
+    return server, f'http://{host}:{server.server_port}'
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"Requests: {report['requests']} in {report['elapsed_s']}s "
+          f"({report['throughput_rps']} req/s), games finished: {report['games_finished']} "
+          f"({report['games_per_s']}/s), failed: {report['games_failed']}")
+    print(f"{'endpoint':<12}{'requests':>10}{'errors':>8}{'rps':>10}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, row in report['endpoints'].items():
+        print(f"{endpoint:<12}{row['requests']:>10}{row['errors']:>8}{row['throughput_rps']:>10}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Chase web API load generator')
+    parser.add_argument('--url', help='Target server, e.g. http://127.0.0.1:5000 '
+                                      '(default: start chase_web locally)')
+    parser.add_argument('--players', type=int, default=16, help='Concurrent simulated players')
+    parser.add_argument('--games', type=int, default=5, help='Games per player')
+    parser.add_argument('--max-moves', type=int, default=50, help='Move limit per game')
+    parser.add_argument('--strategy', default='lure', choices=sorted(STRATEGIES))
+    parser.add_argument('--seed', type=int, default=0, help='Seed for bot decisions')
+    parser.add_argument('--output', default='load_results.json', help='JSON report file')
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_local_server()
+        print(f"Started local server at {url}")
+    try:
+        report = run_load(url, args.players, args.games, args.max_moves,
+                          args.strategy, args.seed)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    print_report(report)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+chase_logsink.py - Приемники лога терминальной версии
+Лог партии (print_with_log) пишется в приемник: список в памяти (как раньше),
+кольцевой буфер последних строк, файл с записью пачками, файл с ротацией
+по размеру или пустой приемник. Файловые приемники держат в памяти не больше
+batch_size строк, поэтому длинные автоматические прогоны не растят память.
+"""
+
+import os
+import re
+from collections import deque
+from typing import IO, List, Optional, Union
+
+# Имя, пригодное как имя файла лога: буквы, цифры, _.- (и не скрытый файл)
+SAFE_ID_RE = re.compile(r'^[\w.-]{1,100}$')
+
+
+def is_safe_log_name(name: str) -> bool:
+    return bool(SAFE_ID_RE.match(name)) and name[0] != '.'
+
+
+class LogSink:
+    """Базовый приемник: строки лога без завершающего перевода строки"""
+
+    def write(self, line: str):
+        raise NotImplementedError
+
+    def lines(self) -> List[str]:
+        """Строки, сохраненные в памяти (у файловых приемников - пусто)"""
+        return []
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self) -> 'LogSink':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class NullSink(LogSink):
+    """Лог не сохраняется"""
+
+    def write(self, line: str):
+        pass
+
+
+class ListSink(LogSink):
+    """Все строки в памяти (поведение по умолчанию, для тестов)"""
+
+    def __init__(self):
+        self._lines: List[str] = []
+
+    def write(self, line: str):
+        self._lines.append(line)
+
+    def lines(self) -> List[str]:
+        return self._lines.copy()
+
+
+class RingBufferSink(LogSink):
+    """Последние capacity строк"""
+
+    def __init__(self, capacity: int = 1000):
+        self._lines: deque = deque(maxlen=capacity)
+
+    def write(self, line: str):
+        self._lines.append(line)
+
+    def lines(self) -> List[str]:
+        return list(self._lines)
+
+
+class BufferedFileSink(LogSink):
+    """
+    Запись в файл или открытый поток пачками по batch_size строк.
+    Файл по пути открывается в режиме mode: 'w' - лог заменяет прежний
+    (повторный прогон не дописывает вторую партию), 'a' - дописывается.
+    Поток, переданный открытым (например, sys.stdout), не закрывается.
+    """
+
+    def __init__(self, target: Union[str, IO[str]], batch_size: int = 256, mode: str = 'w'):
+        if mode not in ('w', 'a'):
+            raise ValueError(f"mode must be 'w' or 'a', not {mode!r}")
+        if isinstance(target, str):
+            self.stream: IO[str] = open(target, mode, encoding='utf-8')
+            self._owned = True
+        else:
+            self.stream = target
+            self._owned = False
+        self.batch_size = batch_size
+        self._pending: List[str] = []
+
+    def write(self, line: str):
+        self._pending.append(line)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def _write_pending(self) -> int:
+        """Запись накопленных строк; возвращает число записанных байт (оценка)"""
+        data = '\n'.join(self._pending) + '\n'
+        self._pending.clear()
+        self.stream.write(data)
+        return len(data)
+
+    def flush(self):
+        if self._pending:
+            self._write_pending()
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+        if self._owned:
+            self.stream.close()
+
+
+class RotatingFileSink(BufferedFileSink):
+    """
+    Файл с ротацией по размеру: при превышении max_bytes файл переименовывается
+    в path.1 (path.1 - в path.2 и т.д.), хранится backup_count старых файлов.
+    Размер проверяется при записи пачки, поэтому файл может превысить
+    max_bytes не больше чем на одну пачку.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 10 * 2**20, backup_count: int = 3,
+                 batch_size: int = 256, mode: str = 'w'):
+        super().__init__(path, batch_size, mode)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._size = self.stream.tell()
+
+    def _rotate(self):
+        self.stream.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f'{self.path}.{index}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.path}.{index + 1}')
+        if self.backup_count > 0:
+            os.replace(self.path, f'{self.path}.1')
+        self.stream = open(self.path, 'w', encoding='utf-8')
+        self._size = 0
+
+    def flush(self):
+        if self._pending:
+            if self._size >= self.max_bytes:
+                self._rotate()
+            self._size += self._write_pending()
+        self.stream.flush()
+
+
+def open_sink(path: Optional[str], max_bytes: int = 0, backup_count: int = 3,
+              mode: str = 'w') -> LogSink:
+    """Приемник по настройкам командной строки: нет пути - NullSink"""
+    if not path:
+        return NullSink()
+    if max_bytes > 0:
+        return RotatingFileSink(path, max_bytes, backup_count, mode=mode)
+    return BufferedFileSink(path, mode=mode)
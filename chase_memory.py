@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+chase_memory.py - Замер памяти хранилища сессий веб-версии
+Хранилище заполняется завершенными партиями (как после нагрузки, когда
+большинство партий брошено или закончено) и память считается через
+tracemalloc: без сжатия (живые ChaseGame) и со сжатием до (seed, ходы).
+Результат приводится к 100 000 сессий.
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict
+
+from chase_bots import cautious_strategy
+from chase_pool import build_game
+from chase_sessions import SessionBackend, SessionStore
+
+PER_SESSIONS = 100_000
+
+
+class NullBackend(SessionBackend):
+    """Бэкенд без записи: для замера нужна только память горячего уровня"""
+
+    def load(self, game_id):
+        return None
+
+    def save_many(self, items):
+        pass
+
+    def delete(self, game_id):
+        pass
+
+
+def bot_moves(seed: int, moves: int):
+    """Ходы партии, сыгранной осторожным ботом и затем брошенной"""
+    game = build_game(seed)
+    rng = random.Random(seed)
+    while not game.game_over and game.move_count < moves:
+        game.process_move(cautious_strategy(game.board, game.player_pos, game.interceptors, rng))
+    if not game.game_over:
+        game.process_move(-1)
+    return game.move_history
+
+
+def replay(seed: int, moves):
+    game = build_game(seed)
+    for move in moves:
+        game.process_move(move)
+    return game
+
+
+def measure(sessions: int, moves: int, compact: bool) -> Dict[str, Any]:
+    """Память горячего уровня хранилища с sessions завершенными партиями"""
+    store = SessionStore(NullBackend(), hot_capacity=sessions + 1,
+                         flush_interval=3600, batch_size=sessions + 1, compact=compact)
+    ids = [store.new_id() for _ in range(sessions)]
+    # Ходы бота считаются заранее: под tracemalloc только сборка партий и запись
+    histories = [bot_moves(index, moves) for index in range(sessions)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for index, game_id in enumerate(ids):
+        store.put(game_id, replay(index, histories[index]))
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+
+    # Стоимость обратного восстановления сжатой партии
+    started = time.perf_counter()
+    sample = ids[:min(200, sessions)]
+    for game_id in sample:
+        store.get(game_id)
+    rehydrate_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+    store.close()
+    return {
+        'compact': compact,
+        'sessions': sessions,
+        'bytes_per_session': round(used / sessions, 1),
+        'mb_per_100k': round(used / sessions * PER_SESSIONS / 2**20, 1),
+        'get_us': round(rehydrate_us, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Chase session store memory benchmark')
+    parser.add_argument('--sessions', type=int, default=1000,
+                        help='Sessions to store (result is scaled to 100k)')
+    parser.add_argument('--moves', type=int, default=40, help='Moves per game before giving up')
+    parser.add_argument('--output', help='Optional JSON report file')
+    args = parser.parse_args(argv)
+
+    report = {
+        'before': measure(args.sessions, args.moves, compact=False),
+        'after': measure(args.sessions, args.moves, compact=True),
+    }
+    for name, row in report.items():
+        print(f"{name:<8} {row['bytes_per_session']:>10} B/session "
+              f"{row['mb_per_100k']:>8} MB per 100k sessions, get {row['get_us']} us")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+chase_metrics.py - Метрики веб-версии в текстовом формате Prometheus
+Счетчики, датчики и гистограммы с метками без внешних зависимостей.
+"""
+
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Границы гистограммы задержек, секунды
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: LabelValues,
+                   extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Монотонно растущий счетчик"""
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterable[str]:
+        if not self._values and not self.label_names:
+            yield f'{self.name} 0'
+        for key, value in sorted(self._values.items()):
+            yield f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}'
+
+
+class Gauge(Counter):
+    """Значение, которое может расти и убывать"""
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Гистограмма с кумулятивными корзинами (_bucket, _sum, _count)"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Для каждой метки: счетчики корзин (последняя - +Inf), сумма
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterable[str]:
+        bounds = self.buckets + (float('inf'),)
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, ('le', _format_value(bound)))
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.label_names, key)
+            yield f'{self.name}_sum{labels} {_format_value(total[0])}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class Registry:
+    """Набор метрик одного процесса"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        """Текстовый формат экспозиции Prometheus 0.0.4"""
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+
+class ChaseMetrics:
+    """Метрики HTTP-слоя и игрового движка веб-версии"""
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self.registry = registry = Registry()
+        self.requests = registry.counter(
+            'chase_http_requests_total', 'HTTP requests by endpoint and status',
+            ('endpoint', 'method', 'status'))
+        self.errors = registry.counter(
+            'chase_http_errors_total', 'HTTP responses with status >= 400 or unhandled exceptions',
+            ('endpoint', 'status'))
+        self.latency = registry.histogram(
+            'chase_http_request_duration_seconds', 'Request latency by endpoint',
+            ('endpoint',))
+        self.slow_requests = registry.counter(
+            'chase_http_slow_requests_total', 'Requests slower than the slow-request threshold',
+            ('endpoint',))
+        self.rate_limited = registry.counter(
+            'chase_rate_limited_total', 'Requests rejected by the per-IP or per-session rate limit',
+            ('scope', 'endpoint'))
+        self.overloaded = registry.counter(
+            'chase_overload_rejected_total', 'Requests rejected because the request queue was full',
+            ('endpoint',))
+        self.in_flight = registry.gauge(
+            'chase_requests_in_flight', 'Rate-limited requests being processed')
+        self.queued = registry.gauge(
+            'chase_requests_queued', 'Requests waiting for a processing slot')
+        self.moves = registry.counter(
+            'chase_moves_total', 'Moves processed by the engine')
+        self.games_created = registry.counter(
+            'chase_games_created_total', 'Games created')
+        self.games_finished = registry.counter(
+            'chase_games_finished_total', 'Finished games by outcome (won, lost, abandoned)',
+            ('outcome',))
+        self.live_sessions = registry.gauge(
+            'chase_live_sessions', 'Game sessions held in memory')
+        self.compact_sessions = registry.gauge(
+            'chase_compact_sessions', 'Finished or idle sessions held compacted as seed and moves')
+        self.realtime_games = registry.gauge(
+            'chase_realtime_games', 'Real-time games receiving interceptor ticks')
+        self.session_bytes = registry.gauge(
+            'chase_session_bytes', 'Estimated memory bytes held per live session (average)')
+
+    def record_request(self, endpoint: str, method: str, status: int, duration: float):
+        self.requests.inc(endpoint=endpoint, method=method, status=status)
+        self.latency.observe(duration, endpoint=endpoint)
+        if status >= 400:
+            self.errors.inc(endpoint=endpoint, status=status)
+
+    def record_move(self, response: Dict):
+        """Учет хода по ответу игрового сервиса"""
+        self.moves.inc()
+        self.record_finish(response)
+
+    def record_finish(self, response: Dict):
+        """Учет окончания партии (после хода или такта реального времени)"""
+        if response.get('game_over'):
+            if response.get('game_won'):
+                outcome = 'won'
+            elif response.get('game_lost'):
+                outcome = 'lost'
+            else:
+                # Игрок сдался (-1)
+                outcome = 'abandoned'
+            self.games_finished.inc(outcome=outcome)
+
+    def update_sessions(self, stats: Dict):
+        self.live_sessions.set(stats.get('live_sessions', 0))
+        self.compact_sessions.set(stats.get('compact_sessions', 0))
+        self.realtime_games.set(stats.get('realtime_games', 0))
+        self.session_bytes.set(stats.get('session_bytes', 0))
+
+    def update_backpressure(self, active: int, waiting: int):
+        self.in_flight.set(active)
+        self.queued.set(waiting)
+
+    def render(self) -> str:
+        return self.registry.render()
@@ -0,0 +1,119 @@
+"""
+chase_pool.py - Пул заранее сгенерированных игровых полей для веб-версии
+Генерация поля (200 клеток + расстановка) выполняется в фоновом потоке,
+а запрос /api/new_game только забирает готовую партию из очереди.
+"""
+
+import random
+import threading
+from collections import OrderedDict, deque
+from typing import Optional
+
+from chase_core import ChaseGame, CountingRandom
+
+
+def build_game(seed: int) -> ChaseGame:
+    """Создание партии с собственным генератором (не трогает глобальный random)"""
+    return ChaseGame(seed, rng=CountingRandom(seed))
+
+
+class BoardPool:
+    """
+    Ограниченный пул готовых партий без seed и LRU-кэш партий по seed.
+
+    Партии без seed получают случайный seed при генерации, поэтому
+    любую выданную партию можно воспроизвести.
+    """
+
+    def __init__(self, size: int = 32, seed_cache_size: int = 256):
+        """
+        Args:
+            size: Сколько готовых партий держать в очереди
+            seed_cache_size: Сколько эталонных партий по seed хранить в кэше
+        """
+        self.size = size
+        self.seed_cache_size = seed_cache_size
+        self._ready = deque()
+        self._seeded: 'OrderedDict[int, ChaseGame]' = OrderedDict()
+        self._seeded_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._seed_source = random.SystemRandom()
+        self._worker: Optional[threading.Thread] = None
+        self._stopped = False
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Запуск фонового потока пополнения (идемпотентно)"""
+        with self._start_lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stopped = False
+            self._worker = threading.Thread(
+                target=self._refill_loop, name='chase-board-pool', daemon=True
+            )
+            self._worker.start()
+            self._wakeup.set()
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        """Остановка фонового потока"""
+        self._stopped = True
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+    def fill(self):
+        """Синхронное заполнение пула до полного размера (для прогрева)"""
+        while len(self._ready) < self.size:
+            self._ready.append(self._generate())
+
+    def acquire(self, seed: Optional[int] = None) -> ChaseGame:
+        """
+        Выдача новой партии
+
+        Args:
+            seed: Seed партии. Без seed партия берется из очереди готовых.
+        """
+        if seed is not None:
+            return self._acquire_seeded(seed)
+
+        if self._worker is None:
+            self.start()
+        try:
+            game = self._ready.popleft()
+        except IndexError:
+            # Пул пуст (всплеск нагрузки) - генерируем на месте
+            game = self._generate()
+        self._wakeup.set()
+        return game
+
+    def _acquire_seeded(self, seed: int) -> ChaseGame:
+        """Выдача копии эталонной партии из LRU-кэша по seed"""
+        with self._seeded_lock:
+            template = self._seeded.get(seed)
+            if template is not None:
+                self._seeded.move_to_end(seed)
+
+        if template is None:
+            template = build_game(seed)
+            with self._seeded_lock:
+                self._seeded[seed] = template
+                while len(self._seeded) > self.seed_cache_size:
+                    self._seeded.popitem(last=False)
+
+        return template.copy()
+
+    def _generate(self) -> ChaseGame:
+        """Генерация партии со случайным seed"""
+        return build_game(self._seed_source.getrandbits(32))
+
+    def _refill_loop(self):
+        """Фоновое пополнение очереди готовых партий"""
+        while not self._stopped:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while not self._stopped and len(self._ready) < self.size:
+                self._ready.append(self._generate())
+
+    def __len__(self) -> int:
+        return len(self._ready)
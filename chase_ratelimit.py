@@ -0,0 +1,105 @@
+"""
+chase_ratelimit.py - Ограничение частоты запросов и противодавление
+Корзины токенов по ключу (сессия, IP) и ограничение числа одновременно
+обрабатываемых запросов с короткой очередью ожидания. Лишние запросы
+отклоняются сразу, до любой работы с ChaseGame, чтобы один агрессивный
+клиент не ухудшал задержки остальных.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+
+class RateLimiter:
+    """
+    Корзины токенов по ключу: rate токенов в секунду, емкость burst.
+    Число ключей ограничено (LRU), чтобы поток новых IP не занимал память.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000,
+                 clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or burst <= 0:
+            raise ValueError("rate and burst must be positive")
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock
+        # ключ -> (токены, время последнего пополнения)
+        self._buckets: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """
+        Списание cost токенов. Возвращает 0, если запрос разрешен,
+        иначе - через сколько секунд хватит токенов.
+        Запрос дороже емкости корзины проходит при полной корзине.
+        """
+        cost = min(cost, self.burst)
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class Backpressure:
+    """
+    Не больше max_active запросов в обработке и max_waiting в очереди.
+    Запрос из очереди ждет свободного места не дольше wait_timeout;
+    при заполненной очереди запрос отклоняется сразу.
+    """
+
+    def __init__(self, max_active: int, max_waiting: int, wait_timeout: float = 1.0):
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.active = 0
+        self.waiting = 0
+        self._condition = threading.Condition()
+
+    def enter(self) -> bool:
+        """Занять место; False - сервер перегружен, запрос нужно отклонить"""
+        with self._condition:
+            if self.active < self.max_active:
+                self.active += 1
+                return True
+            if self.waiting >= self.max_waiting:
+                return False
+            self.waiting += 1
+            try:
+                admitted = self._condition.wait_for(
+                    lambda: self.active < self.max_active, self.wait_timeout
+                )
+            finally:
+                self.waiting -= 1
+            if admitted:
+                self.active += 1
+            return admitted
+
+    def leave(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+
+def retry_after_header(wait: float) -> str:
+    """Значение Retry-After: целые секунды, не меньше 1"""
+    return str(max(1, int(wait + 0.999)))
+
+
+def optional_limiter(rate: float, burst: float) -> Optional[RateLimiter]:
+    """Ограничитель или None, если он выключен (rate <= 0)"""
+    return RateLimiter(rate, burst) if rate > 0 else None
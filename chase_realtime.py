@@ -0,0 +1,108 @@
+"""
+chase_realtime.py - Режим реального времени терминальной версии
+Перехватчики ходят по такту (ChaseGame.tick), независимо от того, ввел ли
+игрок ход; ход игрока перехватчиков не двигает. Клавиши читаются без
+ожидания Enter и без блокировки, экран обновляется потоком ANSI-изменений.
+"""
+
+import os
+import sys
+import time
+from typing import IO, Callable, Optional
+
+from chase_ansi import AnsiDiffRenderer
+from chase_core import ChaseGame
+
+# Клавиша -> код хода; q - сдаться
+KEYS = {str(digit): digit for digit in range(10)}
+KEYS['q'] = -1
+
+HELP_LINE = "1-9 MOVE  0 JUMP  Q GIVE UP"
+
+
+class Keyboard:
+    """
+    Ввод по одной клавише без блокировки: read(timeout) ждет не дольше
+    timeout секунд и возвращает клавишу или None. На время работы терминал
+    переводится в режим без буферизации строк (POSIX) или опрашивается msvcrt.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdin
+        self._saved = None
+
+    def __enter__(self) -> 'Keyboard':
+        if os.name != 'nt':
+            import termios
+            import tty
+            fd = self.stream.fileno()
+            self._saved = termios.tcgetattr(fd)
+            tty.setcbreak(fd)
+        return self
+
+    def __exit__(self, *exc):
+        if self._saved is not None:
+            import termios
+            termios.tcsetattr(self.stream.fileno(), termios.TCSADRAIN, self._saved)
+            self._saved = None
+
+    def read(self, timeout: float) -> Optional[str]:
+        if os.name == 'nt':
+            import msvcrt
+            deadline = time.monotonic() + timeout
+            while True:
+                if msvcrt.kbhit():
+                    return msvcrt.getwch()
+                if time.monotonic() >= deadline:
+                    return None
+                time.sleep(0.01)
+        import select
+        ready, _, _ = select.select([self.stream], [], [], timeout)
+        if not ready:
+            return None
+        return os.read(self.stream.fileno(), 1).decode('ascii', 'replace') or None
+
+
+def play_realtime(game: ChaseGame, keyboard, output: IO[str], tick: float = 1.0,
+                  clock: Callable[[], float] = time.monotonic) -> ChaseGame:
+    """
+    Игровой цикл: ожидание клавиши до ближайшего такта, затем такт.
+    keyboard - объект с read(timeout), как у Keyboard.
+    """
+    renderer = AnsiDiffRenderer()
+    status_row = game.rows + 1
+
+    def draw(message: str):
+        output.write(renderer.render(game.get_board_string()))
+        output.write(renderer.line(status_row, message.replace('\n', ' ')))
+        output.flush()
+
+    draw(HELP_LINE)
+    next_tick = clock() + tick
+    while not game.game_over:
+        key = keyboard.read(max(0.0, next_tick - clock()))
+        if key is not None:
+            move = KEYS.get(key.lower())
+            if move is not None:
+                result = game.process_move(move, advance_interceptors=False)
+                draw(result['message'] or HELP_LINE)
+        if not game.game_over and clock() >= next_tick:
+            result = game.tick()
+            if result['message']:
+                draw(result['message'])
+            else:
+                output.write(renderer.render(game.get_board_string()))
+                output.flush()
+            next_tick += tick
+            # Такты не накапливаются, если цикл отстал (например, терминал был занят)
+            if next_tick < clock():
+                next_tick = clock() + tick
+    output.write('\r\n')
+    output.flush()
+    return game
+
+
+def run_realtime(seed: Optional[int] = None, tick: float = 1.0):
+    """Партия реального времени в текущем терминале"""
+    with Keyboard() as keyboard:
+        play_realtime(ChaseGame(seed), keyboard, sys.stdout, tick)
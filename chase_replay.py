@@ -0,0 +1,78 @@
+"""
+chase_replay.py - Воспроизведение записанной партии
+Партия восстанавливается из seed и списка введенных ходов через
+ChaseGame.replay_move (ходы и такты реального времени); события строятся
+лениво, по одному на код истории, и отдаются как NDJSON (строка JSON
+на событие).
+"""
+
+import re
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+import chase_json
+from chase_pool import build_game
+
+# Единица диапазона для заголовка Range: "moves=k-" или "moves=k-n"
+RANGE_UNIT = 'moves'
+_RANGE_RE = re.compile(r'^\s*moves\s*=\s*(\d+)\s*-\s*(\d*)\s*$')
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+class RangeNotSatisfiable(ValueError):
+    """Запрошенный диапазон ходов вне записанной партии"""
+
+
+def parse_range(header: Optional[str], total: int) -> Optional[Tuple[int, int]]:
+    """
+    Диапазон событий (start, end) включительно из заголовка Range.
+    Событие 0 - начальная расстановка, событие k - состояние после k-го хода.
+    None - заголовка нет (или единица не moves), нужна вся партия.
+    """
+    if not header or not header.strip().startswith(RANGE_UNIT):
+        return None
+    match = _RANGE_RE.match(header)
+    if match is None:
+        raise RangeNotSatisfiable(f"Malformed range: {header}")
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else total
+    if start > total or end < start:
+        raise RangeNotSatisfiable(f"Range {start}-{end} outside 0-{total}")
+    return start, min(end, total)
+
+
+def _event(index: int, move: Optional[int], game, message: str) -> Dict[str, Any]:
+    return {
+        'move': index,
+        'input': move,
+        'message': message,
+        'board': game.get_board_string(),
+        'player_pos': game.player_pos,
+        'interceptors': game.interceptors,
+        'game_over': game.game_over,
+        'game_won': game.game_won,
+        'game_lost': game.game_lost,
+    }
+
+
+def replay_events(seed: int, moves: Sequence[int], start: int = 0,
+                  end: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    События партии с start по end включительно.
+    Ходы до start применяются без построения событий.
+    """
+    end = len(moves) if end is None else min(end, len(moves))
+    game = build_game(seed)
+    if start == 0:
+        yield _event(0, None, game, '')
+    for index, move in enumerate(moves[:end], start=1):
+        result = game.replay_move(move)
+        if index >= start:
+            yield _event(index, move, game, result['message'])
+
+
+def ndjson_stream(seed: int, moves: Sequence[int], start: int = 0,
+                  end: Optional[int] = None) -> Iterator[bytes]:
+    """События воспроизведения как строки NDJSON"""
+    for event in replay_events(seed, moves, start, end):
+        yield chase_json.dumps(event) + b'\n'
@@ -0,0 +1,320 @@
+"""
+chase_service.py - Игровой сервис веб-версии без привязки к Flask
+Создание партий, ходы и чтение состояния по id партии.
+Используется как напрямую из chase_web.py, так и внутри процессов-шардов.
+
+Ходы одной партии выполняются под ее блокировкой, а после каждого хода
+публикуется неизменяемый снимок состояния. Чтение состояния берет снимок
+без блокировок: оно не ждет ходов и не видит частично примененный ход.
+
+Партии реального времени (tick_ms) получают такты перехватчиков от одного
+на процесс колеса таймеров; ход игрока в них перехватчиков не двигает.
+Период тактов хранится в самой партии (и в сессии), поэтому после
+перезапуска или вытеснения таймер заводится заново при загрузке партии.
+"""
+
+import re
+import threading
+import zlib
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from chase_core import ChaseGame
+from chase_hint import HintEngine
+from chase_pool import BoardPool
+from chase_sessions import SessionStore, SQLiteBackend
+from chase_timewheel import Timer, TimingWheel
+
+# Формат id партии (uuid4().hex)
+GAME_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+# Число блокировок партий: id распределяются по ним хешем, поэтому память
+# не растет с числом партий, а разные партии почти никогда не ждут друг друга
+LOCK_STRIPES = 1024
+
+# Допустимый период такта партий реального времени, миллисекунды
+MIN_TICK_MS = 100
+MAX_TICK_MS = 10000
+
+
+def is_game_id(value: Any) -> bool:
+    """Проверка, что строка похожа на id партии"""
+    return isinstance(value, str) and GAME_ID_RE.match(value) is not None
+
+
+class GameSnapshot(NamedTuple):
+    """Состояние партии после хода; не изменяется после публикации"""
+    board: str
+    player_pos: Tuple[int, int]
+    interceptors: Tuple[Tuple[int, int], ...]
+    game_over: bool
+    game_won: bool
+    game_lost: bool
+    jump_used: bool
+    move_count: int
+    seed: Optional[int]
+    # Номер состояния: растет с каждым ходом и тактом (длина истории партии)
+    version: int
+
+    @classmethod
+    def of(cls, game: ChaseGame) -> 'GameSnapshot':
+        return cls(game.get_board_string(), game.player_pos, tuple(game.interceptors),
+                   game.game_over, game.game_won, game.game_lost, game.jump_used,
+                   game.move_count, game.seed, len(game.move_history))
+
+    def positions(self) -> List[Tuple[int, int]]:
+        # Список, а не кортеж: в JSON перехватчики - массив позиций
+        return list(self.interceptors)
+
+
+class GameService:
+    """Операции над партиями поверх пула полей и хранилища сессий"""
+
+    def __init__(self, session_db: str = ':memory:', pool_size: int = 32,
+                 snapshot_capacity: int = 10000):
+        self.board_pool = BoardPool(size=pool_size)
+        self.sessions = SessionStore(SQLiteBackend(session_db))
+        self.hints = HintEngine()
+        self.snapshot_capacity = snapshot_capacity
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        # Чтение - dict.get без блокировки; запись и вытеснение - под _publish_lock
+        self._snapshots: Dict[str, GameSnapshot] = {}
+        self._publish_lock = threading.Lock()
+        # Партии реального времени: id -> таймер тактов (меняется под блокировкой партии)
+        self._realtime: Dict[str, Timer] = {}
+        self._wheel: Optional[TimingWheel] = None
+        self._wheel_lock = threading.Lock()
+        # Вызывается после такта: (id партии, ответ как у move)
+        self.on_update: Optional[Callable[[str, Dict[str, Any]], None]] = None
+
+    def _lock(self, game_id: str) -> threading.Lock:
+        return self._locks[zlib.crc32(game_id.encode('ascii')) % LOCK_STRIPES]
+
+    def _publish(self, game_id: str, game: ChaseGame) -> GameSnapshot:
+        """Публикация снимка; старейшие снимки вытесняются сверх snapshot_capacity"""
+        snapshot = GameSnapshot.of(game)
+        with self._publish_lock:
+            self._snapshots.pop(game_id, None)
+            self._snapshots[game_id] = snapshot
+            while len(self._snapshots) > self.snapshot_capacity:
+                del self._snapshots[next(iter(self._snapshots))]
+        return snapshot
+
+    def _create(self, seed: Optional[int] = None,
+                game_id: Optional[str] = None) -> Tuple[str, ChaseGame]:
+        game = self.board_pool.acquire(seed)
+        if not is_game_id(game_id):
+            game_id = self.sessions.new_id()
+        self.sessions.put(game_id, game)
+        return game_id, game
+
+    def _load(self, game_id: str) -> Optional[ChaseGame]:
+        """
+        Партия из хранилища; у партии реального времени без таймера (после
+        перезапуска процесса) таймер заводится снова. Вызывается под блокировкой партии.
+        """
+        game = self.sessions.get(game_id)
+        if (game is not None and game.tick_ms is not None and not game.game_over
+                and game_id not in self._realtime):
+            self._arm(game_id, game.tick_ms)
+        return game
+
+    def _arm(self, game_id: str, tick_ms: int):
+        """Таймер тактов партии; вызывается под блокировкой партии"""
+        # Первый такт не раньше MIN_TICK_MS, timer к тому времени уже присвоен;
+        # tick() сверяет его с _realtime под той же блокировкой
+        timer = self.wheel.schedule(tick_ms / 1000, lambda: self.tick(game_id, timer), repeat=True)
+        self._disarm(game_id)
+        self._realtime[game_id] = timer
+
+    def _disarm(self, game_id: str):
+        previous = self._realtime.pop(game_id, None)
+        if previous is not None:
+            previous.cancel()
+
+    def _get_or_create(self, game_id: Optional[str]) -> Tuple[str, ChaseGame]:
+        """
+        Партия по id. Неизвестный id получает новую партию под тем же id,
+        чтобы маршрутизация по id между шардами оставалась стабильной.
+        Вызывается под блокировкой партии, если id задан.
+        """
+        game = self._load(game_id) if is_game_id(game_id) else None
+        if game is None:
+            return self._create(game_id=game_id)
+        return game_id, game
+
+    def _snapshot(self, game_id: Optional[str]) -> Tuple[str, GameSnapshot]:
+        """Опубликованный снимок; при его отсутствии партия читается под блокировкой"""
+        if is_game_id(game_id):
+            snapshot = self._snapshots.get(game_id)
+            if snapshot is not None:
+                return game_id, snapshot
+            with self._lock(game_id):
+                game_id, game = self._get_or_create(game_id)
+                return game_id, self._publish(game_id, game)
+        game_id, game = self._create()
+        return game_id, self._publish(game_id, game)
+
+    @property
+    def wheel(self) -> TimingWheel:
+        """Колесо тактов; создается и запускается с первой партией реального времени"""
+        if self._wheel is None:
+            with self._wheel_lock:
+                if self._wheel is None:
+                    wheel = TimingWheel()
+                    wheel.start()
+                    self._wheel = wheel
+        return self._wheel
+
+    def new_game(self, seed: Optional[int] = None, game_id: Optional[str] = None,
+                 tick_ms: Optional[int] = None) -> Dict[str, Any]:
+        """Создание новой партии; tick_ms - партия реального времени с таким тактом"""
+        if tick_ms is not None and not MIN_TICK_MS <= tick_ms <= MAX_TICK_MS:
+            raise ValueError(f"tick_ms must be in {MIN_TICK_MS}..{MAX_TICK_MS}")
+        if not is_game_id(game_id):
+            game_id = self.sessions.new_id()
+        with self._lock(game_id):
+            game = self.board_pool.acquire(seed)
+            game.tick_ms = tick_ms
+            self.sessions.put(game_id, game)
+            snapshot = self._publish(game_id, game)
+            # Прежняя партия с тем же id больше не получает тактов
+            self._disarm(game_id)
+            if tick_ms is not None:
+                self._arm(game_id, tick_ms)
+        return {
+            'success': True,
+            'game_id': game_id,
+            'board': snapshot.board,
+            'player_pos': snapshot.player_pos,
+            'interceptors': snapshot.positions(),
+            'tick_ms': tick_ms
+        }
+
+    def move(self, game_id: Optional[str], move: int) -> Dict[str, Any]:
+        """
+        Выполнение хода (ходы одной партии выполняются по очереди).
+        created=True - партии с таким id не было, ход сделан в новой.
+        """
+        if not is_game_id(game_id):
+            game_id = self.sessions.new_id()
+        with self._lock(game_id):
+            game = self._load(game_id)
+            created = game is None
+            if created:
+                game_id, game = self._create(game_id=game_id)
+            result = game.process_move(move, advance_interceptors=game.tick_ms is None)
+            self.sessions.put(game_id, game)
+            snapshot = self._publish(game_id, game)
+        return dict(self._response(game_id, result, snapshot), created=created)
+
+    def tick(self, game_id: str, timer: Optional[Timer] = None) -> bool:
+        """
+        Такт партии реального времени (из колеса таймеров; timer - сработавший
+        таймер). Возвращает False, когда такты больше не нужны: партия окончена
+        или удалена, либо таймер уже заменен (новая партия под тем же id).
+        """
+        with self._lock(game_id):
+            if timer is not None and self._realtime.get(game_id) is not timer:
+                return False
+            game = self.sessions.get(game_id)
+            if game is None or game.game_over:
+                response = None
+            else:
+                result = game.tick()
+                self.sessions.put(game_id, game)
+                response = self._response(game_id, result, self._publish(game_id, game))
+            if response is None or response['game_over']:
+                self._realtime.pop(game_id, None)
+        if response is not None and self.on_update is not None:
+            self.on_update(game_id, response)
+        return response is not None and not response['game_over']
+
+    @staticmethod
+    def _response(game_id: str, result: Dict[str, Any], snapshot: GameSnapshot) -> Dict[str, Any]:
+        return {
+            'success': result['valid_move'],
+            'game_id': game_id,
+            'message': result['message'],
+            'board': snapshot.board,
+            'game_over': result['game_over'],
+            'game_won': result.get('game_won', False),
+            'game_lost': result.get('player_destroyed', False),
+            'player_pos': snapshot.player_pos,
+            'interceptors': snapshot.positions(),
+            'move_count': snapshot.move_count,
+            'jump_used': snapshot.jump_used,
+            'seed': snapshot.seed,
+            'version': snapshot.version
+        }
+
+    def view(self, game_id: str) -> Optional[Dict[str, Any]]:
+        """Полный снимок существующей партии для зрителей (None, если партии нет)"""
+        if not is_game_id(game_id):
+            return None
+        snapshot = self._snapshots.get(game_id)
+        if snapshot is None:
+            with self._lock(game_id):
+                game = self._load(game_id)
+                if game is None:
+                    return None
+                snapshot = self._publish(game_id, game)
+        return {
+            'move_count': snapshot.move_count,
+            'player_pos': snapshot.player_pos,
+            'interceptors': snapshot.positions(),
+            'message': '',
+            'game_over': snapshot.game_over,
+            'game_won': snapshot.game_won,
+            'board': snapshot.board,
+            'version': snapshot.version
+        }
+
+    def hint(self, game_id: str, budget: float) -> Optional[Dict[str, Any]]:
+        """
+        Подсказка хода в пределах бюджета времени (None, если партии нет).
+        Для партии реального времени - отказ с success=False: доигрывания
+        оценивают пошаговую партию, а не игру по тактам.
+        """
+        if not is_game_id(game_id):
+            return None
+        # Поиск идет по копии, чтобы не держать блокировку партии все время поиска
+        with self._lock(game_id):
+            game = self._load(game_id)
+            if game is None:
+                return None
+            if game.tick_ms is not None:
+                return {'success': False, 'game_id': game_id,
+                        'message': 'Hints are not available for real-time games'}
+            game = game.copy()
+        return dict(self.hints.hint(game, budget), game_id=game_id)
+
+    def history(self, game_id: str) -> Optional[Dict[str, Any]]:
+        """Seed и введенные ходы партии для воспроизведения (None, если партии нет)"""
+        if not is_game_id(game_id):
+            return None
+        with self._lock(game_id):
+            game = self._load(game_id)
+            if game is None:
+                return None
+            return {'seed': game.seed, 'moves': list(game.move_history)}
+
+    def state(self, game_id: Optional[str]) -> Dict[str, Any]:
+        """Текущее состояние партии"""
+        game_id, snapshot = self._snapshot(game_id)
+        return {
+            'game_id': game_id,
+            'board': snapshot.board,
+            'game_over': snapshot.game_over,
+            'player_pos': snapshot.player_pos,
+            'move_count': snapshot.move_count
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Служебная статистика сервиса"""
+        return dict(self.sessions.stats(), realtime_games=len(self._realtime))
+
+    def close(self):
+        if self._wheel is not None:
+            self._wheel.stop()
+        self.board_pool.stop()
+        self.sessions.close()
@@ -0,0 +1,533 @@
+"""
+chase_sessions.py - Хранилище игровых сессий веб-версии
+Горячий уровень в памяти, подключаемый бэкенд (SQLite для локального
+запуска и тестов) и отложенная пакетная запись (write-behind).
+Партии хранятся в компактном двоичном виде, а не как JSON get_game_state().
+"""
+
+import array
+import random
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from chase_core import (ChaseGame, CountingRandom, ENGINE_VERSION, INVALID_MOVE, TICK,
+                        EMPTY, WALL, PLAYER, INTERCEPTOR)
+
+# ============================================================================
+# ДВОИЧНОЕ КОДИРОВАНИЕ ПАРТИИ
+# ============================================================================
+
+FORMAT_VERSION = 3
+
+# Версия 1 - без истории ходов; такие записи читаются с пустой историей.
+# Версия 2 - без периода тактов; такие партии читаются пошаговыми
+_SUPPORTED_VERSIONS = (1, 2, 3)
+
+# Сжатая запись: только (seed, версия движка, ходы), партия восстанавливается
+# повтором ходов. Первый байт отличает ее от полной записи.
+COMPACT_FORMAT = 0x43
+_COMPACT_HEADER = struct.Struct('<BBq')
+# Сжатая партия реального времени: после заголовка - период тактов, мс
+COMPACT_REALTIME_FORMAT = 0x52
+_COMPACT_REALTIME_HEADER = struct.Struct('<BBqH')
+
+# Флаги состояния
+FLAG_GAME_OVER = 1
+FLAG_GAME_WON = 2
+FLAG_GAME_LOST = 4
+FLAG_GIVE_UP = 8
+FLAG_JUMP_USED = 16
+FLAG_HAS_SEED = 32
+
+# version, flags, seed, draws, move_count, interceptors_destroyed,
+# rows, cols, player(row, col), original_player(row, col),
+# число перехватчиков, число исходных перехватчиков
+_HEADER = struct.Struct('<BBqIHBBBBBBBBB')
+
+# Период тактов (версия 3), мс; 0 - пошаговая партия
+_TICK = struct.Struct('<H')
+
+# История ходов (версия 2): число ходов и по байту со знаком на ход
+_MOVES = struct.Struct('<I')
+
+# Коды вне диапазона байта - заведомо неверные ходы, они меняют только
+# счетчик ходов, поэтому хранятся одним неверным кодом
+_INVALID_MOVE = INVALID_MOVE
+
+# Версии движка, чьи сжатые записи восстанавливаются повтором: правила ходов
+# в v2 не менялись, добавились только коды тактов реального времени
+REPLAYABLE_ENGINES = (1, ENGINE_VERSION)
+
+# Клетка поля кодируется двумя битами
+_CELL_TO_DIGIT = str.maketrans({EMPTY: '0', WALL: '1', PLAYER: '2', INTERCEPTOR: '3'})
+_BITS_TO_CELL = {'00': EMPTY, '01': WALL, '10': PLAYER, '11': INTERCEPTOR}
+
+
+class SessionFormatError(ValueError):
+    """Запись сессии повреждена или имеет неизвестную версию"""
+
+
+def _pack_board(board, cells: int) -> bytes:
+    digits = ''.join(''.join(row) for row in board).translate(_CELL_TO_DIGIT)
+    return int(digits, 4).to_bytes((cells + 3) // 4, 'little')
+
+
+def _unpack_board(data: bytes, rows: int, cols: int):
+    bits = format(int.from_bytes(data, 'little'), f'0{rows * cols * 2}b')
+    cells = [_BITS_TO_CELL[bits[i:i + 2]] for i in range(0, len(bits), 2)]
+    return [cells[row * cols:(row + 1) * cols] for row in range(rows)]
+
+
+def _pack_positions(positions) -> bytes:
+    return bytes(coord for pos in positions for coord in pos)
+
+
+def _unpack_positions(data: bytes):
+    return [(data[i], data[i + 1]) for i in range(0, len(data), 2)]
+
+
+def _move_codes(moves) -> bytes:
+    return array.array(
+        'b', [move if -128 <= move < 127 else _INVALID_MOVE for move in moves]
+    ).tobytes()
+
+
+def _pack_moves(moves) -> bytes:
+    codes = _move_codes(moves)
+    return _MOVES.pack(len(codes)) + codes
+
+
+def _unpack_moves(data: bytes):
+    (count,) = _MOVES.unpack_from(data)
+    codes = array.array('b')
+    codes.frombytes(data[_MOVES.size:_MOVES.size + count])
+    return codes.tolist()
+
+
+def encode_game(game: ChaseGame) -> bytes:
+    """
+    Компактное двоичное представление партии (~140 байт и по байту на ход
+    против ~2 КБ JSON).
+    Генератор случайных чисел сохраняется как (seed, число израсходованных слов).
+    """
+    flags = 0
+    if game.game_over:
+        flags |= FLAG_GAME_OVER
+    if game.game_won:
+        flags |= FLAG_GAME_WON
+    if game.game_lost:
+        flags |= FLAG_GAME_LOST
+    if game.give_up:
+        flags |= FLAG_GIVE_UP
+    if game.jump_used:
+        flags |= FLAG_JUMP_USED
+    if game.seed is not None:
+        flags |= FLAG_HAS_SEED
+
+    cells = game.rows * game.cols
+    header = _HEADER.pack(
+        FORMAT_VERSION, flags,
+        game.seed if game.seed is not None else 0,
+        getattr(game.rng, 'draws', 0),
+        game.move_count, game.interceptors_destroyed,
+        game.rows, game.cols,
+        game.player_pos[0], game.player_pos[1],
+        game.original_player_pos[0], game.original_player_pos[1],
+        len(game.interceptors), len(game.original_interceptors),
+    )
+    return b''.join((
+        header,
+        _pack_positions(game.interceptors),
+        _pack_positions(game.original_interceptors),
+        _pack_board(game.board, cells),
+        _pack_board(game.original_board, cells),
+        _TICK.pack(game.tick_ms or 0),
+        _pack_moves(game.move_history),
+    ))
+
+
+def compact_game(game: ChaseGame) -> Optional[bytes]:
+    """
+    Сжатая запись партии: seed, версия движка и ходы (~40 байт вместо
+    нескольких КБ живого объекта). None, если партия не восстанавливается
+    повтором: нет своего seed или история ходов неполна (запись версии 1).
+    """
+    if game.seed is None or not isinstance(game.rng, CountingRandom):
+        return None
+    if len(game.move_history) - game.move_history.count(TICK) != game.move_count:
+        return None
+    if game.tick_ms:
+        header = _COMPACT_REALTIME_HEADER.pack(COMPACT_REALTIME_FORMAT, ENGINE_VERSION,
+                                               game.seed, game.tick_ms)
+    else:
+        header = _COMPACT_HEADER.pack(COMPACT_FORMAT, ENGINE_VERSION, game.seed)
+    return header + _move_codes(game.move_history)
+
+
+def is_compact(entry) -> bool:
+    """Запись хранилища - сжатая партия, а не живой ChaseGame"""
+    return type(entry) is bytes
+
+
+def rehydrate_game(data: bytes) -> ChaseGame:
+    """Восстановление партии из compact_game() повтором ходов"""
+    if data[0] == COMPACT_REALTIME_FORMAT:
+        _, engine, seed, tick_ms = _COMPACT_REALTIME_HEADER.unpack_from(data)
+        offset = _COMPACT_REALTIME_HEADER.size
+    else:
+        _, engine, seed = _COMPACT_HEADER.unpack_from(data)
+        tick_ms = 0
+        offset = _COMPACT_HEADER.size
+    if engine not in REPLAYABLE_ENGINES:
+        raise SessionFormatError(
+            f"Compacted session from engine v{engine} cannot be replayed by v{ENGINE_VERSION}"
+        )
+    codes = array.array('b')
+    codes.frombytes(data[offset:])
+    game = ChaseGame(seed, rng=CountingRandom(seed))
+    game.tick_ms = tick_ms or None
+    # В v1 такта не было: код 11 был просто неверным ходом
+    apply = game.process_move if engine == 1 else game.replay_move
+    for move in codes:
+        apply(move)
+    return game
+
+
+def decode_game(data: bytes) -> ChaseGame:
+    """Восстановление партии из encode_game() или compact_game()"""
+    if data and data[0] in (COMPACT_FORMAT, COMPACT_REALTIME_FORMAT):
+        return rehydrate_game(data)
+    if not data or data[0] not in _SUPPORTED_VERSIONS:
+        raise SessionFormatError(f"Unsupported session format: {data[:1]!r}")
+
+    (version, flags, seed, draws, move_count, destroyed, rows, cols,
+     player_row, player_col, original_row, original_col,
+     n_interceptors, n_original) = _HEADER.unpack_from(data)
+
+    offset = _HEADER.size
+    interceptors = _unpack_positions(data[offset:offset + 2 * n_interceptors])
+    offset += 2 * n_interceptors
+    original_interceptors = _unpack_positions(data[offset:offset + 2 * n_original])
+    offset += 2 * n_original
+    board_size = (rows * cols + 3) // 4
+    board = _unpack_board(data[offset:offset + board_size], rows, cols)
+    offset += board_size
+    original_board = _unpack_board(data[offset:offset + board_size], rows, cols)
+    offset += board_size
+    tick_ms = 0
+    if version >= 3:
+        (tick_ms,) = _TICK.unpack_from(data, offset)
+        offset += _TICK.size
+    move_history = _unpack_moves(data[offset:]) if version >= 2 else []
+
+    game = ChaseGame.__new__(ChaseGame)
+    if flags & FLAG_HAS_SEED:
+        game.seed = seed
+        game.rng = CountingRandom(seed)
+        game.rng.advance(draws)
+    else:
+        # Партия на глобальном генераторе - его состояние не сохраняется
+        game.seed = None
+        game.rng = random
+    game.rows = rows
+    game.cols = cols
+    game.board = board
+    game.original_board = original_board
+    game.player_pos = (player_row, player_col)
+    game.original_player_pos = (original_row, original_col)
+    game.interceptors = interceptors
+    game.original_interceptors = original_interceptors
+    game.game_over = bool(flags & FLAG_GAME_OVER)
+    game.game_won = bool(flags & FLAG_GAME_WON)
+    game.game_lost = bool(flags & FLAG_GAME_LOST)
+    game.give_up = bool(flags & FLAG_GIVE_UP)
+    game.jump_used = bool(flags & FLAG_JUMP_USED)
+    game.move_count = move_count
+    game.interceptors_destroyed = destroyed
+    game.move_history = move_history
+    game.tick_ms = tick_ms or None
+    return game
+
+
+def game_memory_size(game) -> int:
+    """Оценка памяти партии в байтах (строки-клетки интернированы и не учитываются)"""
+    if is_compact(game):
+        return sys.getsizeof(game)
+    size = sys.getsizeof(game) + sys.getsizeof(game.__dict__)
+    for board in (game.board, game.original_board):
+        size += sys.getsizeof(board) + sum(sys.getsizeof(row) for row in board)
+    for positions in (game.interceptors, game.original_interceptors):
+        size += sys.getsizeof(positions) + sum(sys.getsizeof(pos) for pos in positions)
+    # Малые целые кэшируются интерпретатором - считается только список
+    size += sys.getsizeof(game.move_history)
+    if game.rng is not random:
+        size += sys.getsizeof(game.rng)
+    return size
+
+
+# ============================================================================
+# БЭКЕНДЫ ХРАНЕНИЯ
+# ============================================================================
+
+class SessionBackend:
+    """Интерфейс постоянного хранилища сессий (ключ - id партии, значение - байты)"""
+
+    def load(self, game_id: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def save_many(self, items: Iterable[Tuple[str, bytes]]):
+        raise NotImplementedError
+
+    def delete(self, game_id: str):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteBackend(SessionBackend):
+    """Хранение сессий в SQLite (локальный запуск и тесты)"""
+
+    def __init__(self, path: str = ':memory:'):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Соединение открывается лениво, чтобы импорт не создавал файлов
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS sessions ('
+                ' game_id TEXT PRIMARY KEY,'
+                ' state BLOB NOT NULL,'
+                ' updated REAL NOT NULL)'
+            )
+        return self._conn
+
+    def load(self, game_id: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT state FROM sessions WHERE game_id = ?', (game_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_many(self, items: Iterable[Tuple[str, bytes]]):
+        now = time.time()
+        rows = [(game_id, state, now) for game_id, state in items]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO sessions (game_id, state, updated) VALUES (?, ?, ?)',
+                    rows,
+                )
+
+    def delete(self, game_id: str):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM sessions WHERE game_id = ?', (game_id,))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# ============================================================================
+# ХРАНИЛИЩЕ СЕССИЙ
+# ============================================================================
+
+class SessionStore:
+    """
+    Горячий LRU-уровень живых партий перед бэкендом.
+
+    Изменения не пишутся в бэкенд сразу: id помечается «грязным», а фоновый
+    поток раз в flush_interval (или при накоплении batch_size изменений)
+    кодирует и записывает их одной транзакцией.
+
+    Завершенные партии и партии без обращений дольше idle_after секунд
+    хранятся в памяти сжатыми (compact_game) и при чтении прозрачно
+    восстанавливаются повтором ходов.
+    """
+
+    def __init__(self, backend: SessionBackend, hot_capacity: int = 10000,
+                 flush_interval: float = 0.5, batch_size: int = 256,
+                 idle_after: Optional[float] = 300.0, compact: bool = True):
+        self.backend = backend
+        self.hot_capacity = hot_capacity
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.idle_after = idle_after
+        self.compact = compact
+        # id -> ChaseGame или сжатая запись (bytes)
+        self._hot: 'OrderedDict[str, Any]' = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._dirty = set()
+        self._pending: Dict[str, bytes] = {}  # Вытесненные, но не записанные
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._stopped = False
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def create(self, game: ChaseGame) -> str:
+        """Регистрация новой партии, возвращает ее id"""
+        game_id = self.new_id()
+        self.put(game_id, game)
+        return game_id
+
+    def get(self, game_id: str) -> Optional[ChaseGame]:
+        """Партия по id: из памяти (со сжатой - повтором ходов), иначе из бэкенда"""
+        with self._lock:
+            entry = self._hot.get(game_id)
+            if entry is not None:
+                self._hot.move_to_end(game_id)
+                self._last_used[game_id] = time.monotonic()
+                if not is_compact(entry):
+                    return entry
+                data = entry
+            else:
+                data = self._pending.get(game_id)
+
+        if data is None:
+            data = self.backend.load(game_id)
+            if data is None:
+                return None
+
+        game = decode_game(data)
+        if entry is not None and game.game_over:
+            # Завершенная партия остается сжатой, изменения придут через put()
+            return game
+        with self._lock:
+            # Другой поток мог успеть загрузить ту же партию
+            existing = self._hot.get(game_id)
+            if existing is not None and not is_compact(existing):
+                return existing
+            self._insert(game_id, game)
+        return game
+
+    def put(self, game_id: str, game: ChaseGame):
+        """Сохранение изменений партии (запись в бэкенд - отложенная)"""
+        entry = self._compacted(game) if game.game_over else game
+        with self._lock:
+            self._insert(game_id, entry)
+            self._dirty.add(game_id)
+            self._pending.pop(game_id, None)
+            backlog = len(self._dirty) + len(self._pending)
+        self._ensure_worker()
+        if backlog >= self.batch_size:
+            self._wakeup.set()
+
+    def delete(self, game_id: str):
+        with self._lock:
+            self._hot.pop(game_id, None)
+            self._last_used.pop(game_id, None)
+            self._dirty.discard(game_id)
+            self._pending.pop(game_id, None)
+        self.backend.delete(game_id)
+
+    def _compacted(self, game: ChaseGame):
+        if not self.compact:
+            return game
+        data = compact_game(game)
+        return data if data is not None else game
+
+    @staticmethod
+    def _encoded(entry) -> bytes:
+        return entry if is_compact(entry) else encode_game(entry)
+
+    def _insert(self, game_id: str, entry):
+        self._hot[game_id] = entry
+        self._hot.move_to_end(game_id)
+        self._last_used[game_id] = time.monotonic()
+        while len(self._hot) > self.hot_capacity:
+            evicted_id, evicted = self._hot.popitem(last=False)
+            self._last_used.pop(evicted_id, None)
+            if evicted_id in self._dirty:
+                self._dirty.discard(evicted_id)
+                self._pending[evicted_id] = self._encoded(evicted)
+
+    def compact_idle(self, now: Optional[float] = None) -> int:
+        """Сжатие партий без обращений дольше idle_after; возвращает их число"""
+        if not self.compact or self.idle_after is None:
+            return 0
+        cutoff = (time.monotonic() if now is None else now) - self.idle_after
+        compacted = []
+        with self._lock:
+            # Порядок _hot - от давно использованных к недавним
+            for game_id, entry in self._hot.items():
+                if self._last_used.get(game_id, 0.0) > cutoff:
+                    break
+                if not is_compact(entry):
+                    data = compact_game(entry)
+                    if data is not None:
+                        compacted.append((game_id, data))
+            for game_id, data in compacted:
+                self._hot[game_id] = data
+        return len(compacted)
+
+    def flush(self):
+        """Запись всех накопленных изменений одним пакетом"""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending
+                self._pending = {}
+                for game_id in self._dirty:
+                    batch[game_id] = self._encoded(self._hot[game_id])
+                self._dirty = set()
+            self.backend.save_many(batch.items())
+
+    def _ensure_worker(self):
+        if self._worker is None and not self._stopped:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._flush_loop, name='chase-session-flush', daemon=True
+                    )
+                    self._worker.start()
+
+    def _flush_loop(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            self.compact_idle()
+
+    def close(self):
+        """Остановка фоновой записи, сброс изменений и закрытие бэкенда"""
+        self._stopped = True
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        self.flush()
+        self.backend.close()
+
+    def stats(self, sample: int = 32) -> Dict[str, int]:
+        """Число партий в памяти (из них сжатых) и средний объем памяти на партию"""
+        with self._lock:
+            live = len(self._hot)
+            compacted = sum(1 for entry in self._hot.values() if is_compact(entry))
+            recent = list(self._hot.values())[-sample:] if live else []
+        average = sum(map(game_memory_size, recent)) // len(recent) if recent else 0
+        return {'live_sessions': live, 'compact_sessions': compacted, 'session_bytes': average}
+
+    def __len__(self) -> int:
+        return len(self._hot)
@@ -0,0 +1,242 @@
+"""
+chase_shard.py - Шардирование партий по процессам-воркерам
+Каждая партия живет в памяти ровно одного процесса. Владелец определяется
+консистентным хешированием id партии, а маршрутизатор в процессе веб-сервера
+пересылает запросы владельцу через multiprocessing.Pipe. Такты партий
+реального времени идут в процессе-владельце; их результаты возвращаются
+по отдельному одностороннему каналу в ShardRouter.on_update.
+"""
+
+import bisect
+import hashlib
+import multiprocessing
+import os
+import threading
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+from chase_service import GameService, is_game_id
+from chase_sessions import SessionStore
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Консистентное хеширование с виртуальными узлами"""
+
+    def __init__(self, nodes: List[int], replicas: int = 64):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: List[int] = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: int):
+        for replica in range(self.replicas):
+            point = _hash(f"{node}:{replica}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def node_for(self, key: str) -> int:
+        """Узел-владелец ключа (первая точка кольца по часовой стрелке)"""
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+def shard_db_path(session_db: str, index: int) -> str:
+    """Файл сессий шарда: chase_sessions.db -> chase_sessions.2.db"""
+    if session_db == ':memory:':
+        return session_db
+    root, ext = os.path.splitext(session_db)
+    return f"{root}.{index}{ext}"
+
+
+def _worker_main(conn, updates, session_db: str):
+    """
+    Цикл процесса-шарда: выполнение вызовов GameService из канала conn;
+    результаты тактов (из потока колеса таймеров) уходят в канал updates
+    """
+    service = GameService(session_db=session_db)
+    updates_lock = threading.Lock()
+
+    def send_update(game_id: str, response: Dict[str, Any]):
+        with updates_lock:
+            try:
+                updates.send((game_id, response))
+            except (BrokenPipeError, OSError):
+                pass
+
+    service.on_update = send_update
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+            method, args = message
+            try:
+                conn.send((True, getattr(service, method)(*args)))
+            except Exception:
+                conn.send((False, traceback.format_exc()))
+    finally:
+        service.close()
+        updates.close()
+
+
+class ShardError(RuntimeError):
+    """Ошибка при выполнении вызова в процессе-шарде"""
+
+
+class _Shard:
+    """Процесс-шард и канал к нему (один вызов в канале одновременно)"""
+
+    def __init__(self, context, index: int, session_db: str,
+                 on_update: Callable[[str, Dict[str, Any]], None]):
+        self.index = index
+        self.conn, child_conn = context.Pipe()
+        self.updates, child_updates = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, child_updates, shard_db_path(session_db, index)),
+            name=f'chase-shard-{index}',
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        child_updates.close()
+        self.lock = threading.Lock()
+        self.on_update = on_update
+        self.reader = threading.Thread(target=self._read_updates,
+                                       name=f'chase-shard-{index}-updates', daemon=True)
+        self.reader.start()
+
+    def _read_updates(self):
+        """Поток чтения результатов тактов; завершается, когда шард закрывает канал"""
+        while True:
+            try:
+                game_id, response = self.updates.recv()
+            except (EOFError, OSError):
+                break
+            self.on_update(game_id, response)
+
+    def call(self, method: str, *args) -> Any:
+        with self.lock:
+            self.conn.send((method, args))
+            ok, payload = self.conn.recv()
+        if not ok:
+            raise ShardError(payload)
+        return payload
+
+    def stop(self, timeout: float = 5.0):
+        with self.lock:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.reader.join(timeout)
+        self.conn.close()
+        self.updates.close()
+
+
+class ShardRouter:
+    """
+    Маршрутизатор запросов к шардам с тем же интерфейсом, что и GameService.
+    Процессы запускаются лениво при первом вызове. on_update, как и у
+    GameService, получает результаты тактов (из потоков чтения шардов).
+    """
+
+    def __init__(self, workers: int, session_db: str = ':memory:'):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.workers = workers
+        self.session_db = session_db
+        self.ring = HashRing(list(range(workers)))
+        self._shards: Optional[List[_Shard]] = None
+        self._start_lock = threading.Lock()
+        self.on_update: Optional[Callable[[str, Dict[str, Any]], None]] = None
+
+    def start(self):
+        with self._start_lock:
+            if self._shards is None:
+                # spawn: веб-процесс многопоточный, fork с потоками небезопасен
+                context = multiprocessing.get_context('spawn')
+                self._shards = [_Shard(context, index, self.session_db, self._updated)
+                                for index in range(self.workers)]
+
+    def _updated(self, game_id: str, response: Dict[str, Any]):
+        if self.on_update is not None:
+            self.on_update(game_id, response)
+
+    def owner(self, game_id: str) -> int:
+        """Номер шарда, владеющего партией"""
+        return self.ring.node_for(game_id)
+
+    def _call(self, game_id: str, method: str, *args) -> Any:
+        if self._shards is None:
+            self.start()
+        return self._shards[self.owner(game_id)].call(method, *args)
+
+    @staticmethod
+    def _route_id(game_id: Optional[str]) -> str:
+        # id назначается до маршрутизации, чтобы партия сразу попала к владельцу
+        return game_id if is_game_id(game_id) else SessionStore.new_id()
+
+    def new_game(self, seed: Optional[int] = None, game_id: Optional[str] = None,
+                 tick_ms: Optional[int] = None) -> Dict[str, Any]:
+        # Такты партий реального времени идут в колесе процесса-владельца
+        game_id = self._route_id(game_id)
+        return self._call(game_id, 'new_game', seed, game_id, tick_ms)
+
+    def move(self, game_id: Optional[str], move: int) -> Dict[str, Any]:
+        game_id = self._route_id(game_id)
+        return self._call(game_id, 'move', game_id, move)
+
+    def view(self, game_id: str) -> Optional[Dict[str, Any]]:
+        if not is_game_id(game_id):
+            return None
+        return self._call(game_id, 'view', game_id)
+
+    def hint(self, game_id: str, budget: float) -> Optional[Dict[str, Any]]:
+        if not is_game_id(game_id):
+            return None
+        return self._call(game_id, 'hint', game_id, budget)
+
+    def history(self, game_id: str) -> Optional[Dict[str, Any]]:
+        if not is_game_id(game_id):
+            return None
+        return self._call(game_id, 'history', game_id)
+
+    def state(self, game_id: Optional[str]) -> Dict[str, Any]:
+        game_id = self._route_id(game_id)
+        return self._call(game_id, 'state', game_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Сводная статистика по всем шардам"""
+        if self._shards is None:
+            return {'live_sessions': 0, 'compact_sessions': 0, 'realtime_games': 0,
+                    'session_bytes': 0, 'shards': []}
+        per_shard = [shard.call('stats') for shard in self._shards]
+        live = sum(stats['live_sessions'] for stats in per_shard)
+        held = sum(stats['live_sessions'] * stats['session_bytes'] for stats in per_shard)
+        return {
+            'live_sessions': live,
+            'compact_sessions': sum(stats.get('compact_sessions', 0) for stats in per_shard),
+            'realtime_games': sum(stats.get('realtime_games', 0) for stats in per_shard),
+            'session_bytes': held // live if live else 0,
+            'shards': per_shard,
+        }
+
+    def close(self):
+        with self._start_lock:
+            if self._shards is not None:
+                for shard in self._shards:
+                    shard.stop()
+                self._shards = None
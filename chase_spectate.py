@@ -0,0 +1,276 @@
+"""
+chase_spectate.py - Трансляция партии зрителям
+Каждый ход кодируется один раз (дельта изменившихся клеток + снимок),
+а готовые байты раздаются всем подписчикам через asyncio-очереди.
+Медленный зритель не копит очередь: при переполнении она заменяется
+последним снимком, а зритель, отстающий раз за разом, отключается.
+
+Ходы и такты одной партии публикуются из разных потоков. Дельта строится
+под блокировкой канала и только от непосредственно предыдущего состояния
+(по номеру version); устаревший результат отбрасывается, а после пропуска
+зрители получают полный снимок.
+
+Ограничение: поток /api/spectate занимает поток WSGI-сервера на все время
+просмотра (в asyncio идет только раздача), поэтому число одновременных
+зрителей на процесс не больше числа его рабочих потоков. max_viewers
+ограничивает их явно: сверх лимита open() бросает TooManyViewers, и
+сервер отвечает 503, а не исчерпывает потоки. Для тысяч зрителей - больше
+процессов за балансировщиком.
+"""
+
+import asyncio
+import threading
+from typing import Any, Dict, Optional, Set
+
+import chase_json
+from chase_core import board_changes
+
+# Маркер закрытия подписки
+CLOSED = b''
+
+
+def sse_event(kind: str, payload: Dict[str, Any]) -> bytes:
+    """Событие в формате Server-Sent Events"""
+    return b'event: ' + kind.encode('ascii') + b'\ndata: ' + chase_json.dumps(payload) + b'\n\n'
+
+
+class TooManyViewers(RuntimeError):
+    """Достигнут лимит одновременных зрителей процесса"""
+
+
+class Subscriber:
+    """Зритель одной партии со своей ограниченной очередью"""
+
+    def __init__(self, game_id: str, queue_size: int, max_overflows: int):
+        self.game_id = game_id
+        # Место в лимите зрителей уже возвращено (close() вызывается повторно)
+        self.released = False
+        self.queue: 'asyncio.Queue[bytes]' = asyncio.Queue(maxsize=queue_size)
+        self.max_overflows = max_overflows
+        self.overflows = 0
+        self.closed = False
+
+    def offer(self, event: bytes, snapshot: bytes):
+        """Постановка события; при переполнении - перескок к последнему снимку"""
+        if self.closed:
+            return
+        if not self.queue.full():
+            self.queue.put_nowait(event)
+            return
+
+        self.overflows += 1
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        if self.overflows > self.max_overflows:
+            self.close()
+        else:
+            self.queue.put_nowait(snapshot)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            if self.queue.full():
+                self.queue.get_nowait()
+            self.queue.put_nowait(CLOSED)
+
+    async def get(self) -> bytes:
+        event = await self.queue.get()
+        if self.queue.empty():
+            # Зритель догнал трансляцию
+            self.overflows = 0
+        return event
+
+
+class _Channel:
+    """Подписчики партии и ее последнее известное состояние"""
+
+    def __init__(self):
+        self.subscribers: Set[Subscriber] = set()
+        # board и version - под lock: публикуют потоки ходов и колеса тактов
+        self.lock = threading.Lock()
+        self.board: Optional[str] = None
+        self.version: Optional[int] = None
+        self.snapshot: Optional[bytes] = None
+
+
+class Broadcaster:
+    """
+    Раздача событий партий зрителям. Цикл asyncio работает в отдельном
+    потоке; publish() безопасно вызывать из потоков веб-сервера.
+    max_viewers - лимит одновременных зрителей (0 - без ограничения).
+    """
+
+    def __init__(self, queue_size: int = 16, max_overflows: int = 3, max_viewers: int = 0):
+        self.queue_size = queue_size
+        self.max_overflows = max_overflows
+        self.max_viewers = max_viewers
+        self.total_viewers = 0
+        self._viewers_lock = threading.Lock()
+        self._channels: Dict[str, _Channel] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(
+                        target=loop.run_forever, name='chase-spectate', daemon=True
+                    )
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    def has_viewers(self, game_id: str) -> bool:
+        return game_id in self._channels
+
+    def viewers(self, game_id: str) -> int:
+        channel = self._channels.get(game_id)
+        return len(channel.subscribers) if channel else 0
+
+    # ------------------------------------------------------------------
+    # Публикация (из потоков веб-сервера)
+    # ------------------------------------------------------------------
+
+    def publish(self, game_id: str, response: Dict[str, Any]):
+        """
+        Публикация результата хода или такта. Событие кодируется один раз
+        здесь, раздача выполняется в цикле asyncio. response['version'] -
+        номер состояния: результат не новее опубликованного отбрасывается,
+        а дельта строится только от предыдущего номера, иначе - снимок.
+        """
+        channel = self._channels.get(game_id)
+        if channel is None:
+            return
+        board = response['board']
+        version = response.get('version')
+        common = {
+            'move_count': response.get('move_count'),
+            'version': version,
+            'player_pos': response['player_pos'],
+            'interceptors': response['interceptors'],
+            'message': response['message'],
+            'game_over': response['game_over'],
+            'game_won': response.get('game_won', False),
+        }
+        with channel.lock:
+            if version is not None and channel.version is not None and version <= channel.version:
+                return
+            snapshot = sse_event('snapshot', dict(common, game_id=game_id, board=board))
+            # Без номеров (оба None) - дельта от последнего поля, как раньше
+            in_sequence = (version is None and channel.version is None
+                           or None not in (version, channel.version) and version == channel.version + 1)
+            if channel.board is None or not in_sequence:
+                event = snapshot
+            else:
+                event = sse_event('delta', dict(common, changes=board_changes(channel.board, board)))
+            channel.board = board
+            channel.version = version
+            # Под блокировкой: события попадают в цикл в порядке номеров
+            self.loop.call_soon_threadsafe(self._fanout, game_id, event, snapshot)
+
+    def _fanout(self, game_id: str, event: bytes, snapshot: bytes):
+        channel = self._channels.get(game_id)
+        if channel is None:
+            return
+        channel.snapshot = snapshot
+        for subscriber in list(channel.subscribers):
+            subscriber.offer(event, snapshot)
+            if subscriber.closed:
+                self._remove(subscriber)
+
+    # ------------------------------------------------------------------
+    # Подписка (внутри цикла asyncio)
+    # ------------------------------------------------------------------
+
+    async def subscribe(self, game_id: str,
+                        initial: Optional[Dict[str, Any]] = None) -> Subscriber:
+        """Новый зритель; первым событием получает текущий снимок партии"""
+        channel = self._channels.get(game_id)
+        if channel is None:
+            channel = self._channels[game_id] = _Channel()
+        if channel.snapshot is None and initial is not None:
+            with channel.lock:
+                if channel.board is None:
+                    channel.board = initial['board']
+                    channel.version = initial.get('version')
+            channel.snapshot = sse_event('snapshot', dict(initial, game_id=game_id))
+
+        subscriber = Subscriber(game_id, self.queue_size, self.max_overflows)
+        channel.subscribers.add(subscriber)
+        if channel.snapshot is not None:
+            subscriber.queue.put_nowait(channel.snapshot)
+        return subscriber
+
+    def _remove(self, subscriber: Subscriber):
+        channel = self._channels.get(subscriber.game_id)
+        if channel is not None:
+            channel.subscribers.discard(subscriber)
+            if not channel.subscribers:
+                del self._channels[subscriber.game_id]
+
+    async def unsubscribe(self, subscriber: Subscriber):
+        subscriber.closed = True
+        self._remove(subscriber)
+
+    # ------------------------------------------------------------------
+    # Мост для синхронного (WSGI) кода
+    # ------------------------------------------------------------------
+
+    def open(self, game_id: str, initial: Optional[Dict[str, Any]] = None) -> Subscriber:
+        """Новый зритель; TooManyViewers - лимит max_viewers исчерпан"""
+        with self._viewers_lock:
+            if self.max_viewers and self.total_viewers >= self.max_viewers:
+                raise TooManyViewers(f"{self.total_viewers} viewers already connected")
+            self.total_viewers += 1
+        try:
+            return asyncio.run_coroutine_threadsafe(self.subscribe(game_id, initial), self.loop).result()
+        except BaseException:
+            with self._viewers_lock:
+                self.total_viewers -= 1
+            raise
+
+    def next_event(self, subscriber: Subscriber, timeout: float) -> Optional[bytes]:
+        """Следующее событие зрителя или None по истечении timeout"""
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(subscriber.get(), timeout), self.loop
+        )
+        try:
+            return future.result()
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self, subscriber: Subscriber):
+        """Отключение зрителя; повторный вызов ничего не делает"""
+        with self._viewers_lock:
+            if subscriber.released:
+                return
+            subscriber.released = True
+            self.total_viewers -= 1
+        asyncio.run_coroutine_threadsafe(self.unsubscribe(subscriber), self.loop).result()
+
+    def stream(self, game_id: str, initial: Optional[Dict[str, Any]] = None,
+               heartbeat: float = 15.0):
+        """Открытие зрителя и его события (см. events)"""
+        return self.events(self.open(game_id, initial), heartbeat)
+
+    def events(self, subscriber: Subscriber, heartbeat: float = 15.0):
+        """
+        Генератор SSE-байтов открытого зрителя для потокового ответа Flask.
+        Занимает поток WSGI-сервера, пока зритель подключен (см. ограничение
+        в начале модуля); зритель закрывается и при выходе из генератора.
+        """
+        try:
+            while True:
+                event = self.next_event(subscriber, heartbeat)
+                if event is None:
+                    yield b': keep-alive\n\n'
+                elif event == CLOSED:
+                    break
+                else:
+                    yield event
+        finally:
+            self.close(subscriber)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+chase_startup.py - Замер холодного старта веб-версии Chase
+Каждый прогон - новый процесс интерпретатора: импорт chase_web,
+create_app(), необязательный прогрев и первые запросы через тестовый
+клиент. Отчет: медиана и максимум времени до первого ответа по фазам.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+# Код дочернего процесса; время отсчитывается от запуска интерпретатора
+_CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+import chase_web
+imported = time.perf_counter()
+app = chase_web.create_app({'CHASE_WARM_UP': %(warm_up)r})
+created = time.perf_counter()
+client = app.test_client()
+response = client.post('/api/new_game', json={'seed': None})
+assert response.status_code == 200, response.status_code
+first = time.perf_counter()
+client.get('/')
+page = time.perf_counter()
+app.extensions['chase'].close()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_response_ms': (first - created) * 1000,
+    'first_page_ms': (page - first) * 1000,
+}))
+'''
+
+
+def run_once(warm_up: bool) -> Dict[str, float]:
+    """Один холодный старт в отдельном процессе"""
+    env = dict(os.environ, CHASE_SESSION_DB=':memory:', CHASE_LEADERBOARD_DB=':memory:')
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', _CHILD % {'warm_up': warm_up}],
+        check=True, capture_output=True, text=True, env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    ).stdout
+    total = (time.perf_counter() - started) * 1000
+    phases = json.loads(output.strip().splitlines()[-1])
+    # Время до первого ответа с учетом запуска интерпретатора
+    phases['time_to_first_response_ms'] = total - phases['first_page_ms']
+    return phases
+
+
+def summarize(runs: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        phase: {
+            'median': round(statistics.median(run[phase] for run in runs), 2),
+            'max': round(max(run[phase] for run in runs), 2),
+        }
+        for phase in runs[0]
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Chase web cold-start benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='Cold starts per mode')
+    parser.add_argument('--output', help='Optional JSON report file')
+    args = parser.parse_args(argv)
+
+    report: Dict[str, Any] = {}
+    for mode, warm_up in (('lazy', False), ('warm_up', True)):
+        report[mode] = summarize([run_once(warm_up) for _ in range(args.runs)])
+
+    print(f"{'phase':<28}{'lazy ms':>12}{'warm-up ms':>12}")
+    for phase in report['lazy']:
+        print(f"{phase:<28}{report['lazy'][phase]['median']:>12}"
+              f"{report['warm_up'][phase]['median']:>12}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,16 @@
+"""
+chase_stats.py - Общие статистические функции нагрузочных клиентов
+Перцентили задержек для отчетов chase_load.py (HTTP) и chase_telnet.py (TCP);
+модуль без зависимостей, чтобы сервер не тянул за собой HTTP-клиент.
+"""
+
+import math
+from typing import List
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Перцентиль методом ближайшего ранга по отсортированному списку"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+chase_telnet.py - Сетевой (telnet) сервер терминальной версии
+Все сеансы работают в одном цикле asyncio поверх TCP: сеанс ждет строку
+ввода, не занимая поток, поэтому один процесс обслуживает сотни игроков.
+Вывод поля и разбор ходов - те же, что в chase_terminal.py.
+Запуск: python chase_terminal.py --serve=2323; подключение: telnet host 2323.
+Нагрузочный клиент: python chase_telnet.py --port=2323 --clients=300
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from chase_core import ChaseGame
+from chase_pool import build_game
+from chase_stats import percentile
+from chase_terminal import HEADER_LINES, parse_move
+
+logger = logging.getLogger(__name__)
+
+PROMPT = "YOUR MOVE? "
+
+# Команды протокола telnet (RFC 854): IAC и согласование параметров
+IAC = 255
+SB = 250
+SE = 240
+NEGOTIATION = range(251, 255)  # WILL, WONT, DO, DONT
+
+# Самая длинная принимаемая строка ввода
+MAX_LINE = 256
+
+
+def strip_telnet(data: bytes) -> bytes:
+    """Удаление команд telnet из принятых байт (согласование не ведется)"""
+    if IAC not in data:
+        return data
+    output = bytearray()
+    index = 0
+    while index < len(data):
+        byte = data[index]
+        if byte != IAC:
+            output.append(byte)
+            index += 1
+        elif index + 1 < len(data) and data[index + 1] == IAC:
+            output.append(IAC)
+            index += 2
+        elif index + 1 < len(data) and data[index + 1] == SB:
+            end = data.find(bytes([IAC, SE]), index + 2)
+            index = len(data) if end < 0 else end + 2
+        elif index + 1 < len(data) and data[index + 1] in NEGOTIATION:
+            index += 3
+        else:
+            index += 2
+    return bytes(output)
+
+
+class Disconnected(Exception):
+    """Игрок отключился, молчал дольше idle_timeout или прислал слишком длинную строку"""
+
+
+class TelnetSession:
+    """Один игрок: тот же диалог, что ChaseTerminal.run_game_loop, но без блокирующего input()"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 seed: Optional[int] = None, idle_timeout: float = 300.0):
+        self.reader = reader
+        self.writer = writer
+        self.seed = seed
+        self.idle_timeout = idle_timeout
+        self.game = self.new_game()
+        self.moves = 0
+
+    def new_game(self) -> ChaseGame:
+        """Партия с собственным генератором: сеансы не делят глобальный random"""
+        if self.seed is not None:
+            return build_game(self.seed)
+        return ChaseGame(rng=random.Random())
+
+    def write(self, text: str):
+        self.writer.write(text.replace('\n', '\r\n').encode('ascii', 'replace'))
+
+    def print(self, text: str = ""):
+        self.write(text + '\n')
+
+    async def read_line(self, prompt: str) -> str:
+        """Подсказка и строка ввода; медленный клиент притормаживает только свой сеанс"""
+        self.write(prompt)
+        await self.writer.drain()
+        try:
+            line = await asyncio.wait_for(self.reader.readline(), self.idle_timeout)
+        except (asyncio.TimeoutError, ValueError, ConnectionError) as e:
+            raise Disconnected from e
+        if not line:
+            raise Disconnected
+        return strip_telnet(line).decode('ascii', 'replace').strip()
+
+    async def read_move(self) -> int:
+        while True:
+            move, error = parse_move(await self.read_line(PROMPT))
+            if move is not None:
+                return move
+            if error:
+                self.print(error)
+
+    async def ask(self, prompt: str) -> bool:
+        while True:
+            response = (await self.read_line(prompt)).upper()
+            if response in ('Y', 'N'):
+                return response == 'Y'
+            self.print("Please enter Y or N")
+
+    async def run(self):
+        while True:
+            for line in HEADER_LINES:
+                self.print(line)
+            self.print(self.game.get_instructions())
+            while not self.game.game_over:
+                self.print(self.game.get_board_string())
+                result = self.game.process_move(await self.read_move())
+                self.moves += 1
+                if result['message']:
+                    self.print(result['message'])
+                    self.print()
+            if not await self.ask("ANOTHER GAME (Y/N)? "):
+                break
+            if await self.ask("SAME SETUP (Y/N)? "):
+                self.game.reset_to_original()
+            else:
+                self.seed = None
+                self.game = self.new_game()
+        self.print("Thanks for playing Chase!")
+        await self.writer.drain()
+
+
+class ChaseServer:
+    """
+    TCP-сервер сеансов. Сверх max_sessions новые подключения получают
+    отказ сразу, а не ждут в очереди.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 2323, seed: Optional[int] = None,
+                 max_sessions: int = 1000, idle_timeout: float = 300.0):
+        self.host = host
+        self.port = port
+        self.seed = seed
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions = 0
+        self.served = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> int:
+        """Открытие порта; возвращает фактический порт (для port=0)"""
+        self.server = await asyncio.start_server(self.handle, self.host, self.port, limit=MAX_LINE)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self.sessions >= self.max_sessions:
+            writer.write(b"Server is full, try again later\r\n")
+            await self._close(writer)
+            return
+        self.sessions += 1
+        try:
+            await TelnetSession(reader, writer, self.seed, self.idle_timeout).run()
+        except Disconnected:
+            pass
+        except ConnectionError:
+            pass
+        except Exception:  # Ошибка одного сеанса не останавливает сервер
+            logger.exception("session failed")
+        finally:
+            self.sessions -= 1
+            self.served += 1
+            await self._close(writer)
+
+    @staticmethod
+    async def _close(writer: asyncio.StreamWriter):
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+
+def run_server(port: int, host: str = '127.0.0.1', seed: Optional[int] = None):
+    """
+    Запуск из chase_terminal.py --serve. По умолчанию - только локальный
+    адрес: сервер без аутентификации открывается наружу явным --host=0.0.0.0
+    """
+    server = ChaseServer(host, port, seed)
+
+    async def main():
+        await server.start()
+        print(f"Chase server on {host}:{server.port} (telnet {host} {server.port})", file=sys.stderr)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+# Нагрузочный клиент
+
+async def _read_until(reader: asyncio.StreamReader, prompts: List[bytes], timeout: float) -> bytes:
+    data = b''
+    while not any(data.endswith(prompt) for prompt in prompts):
+        chunk = await asyncio.wait_for(reader.read(4096), timeout)
+        if not chunk:
+            raise ConnectionError("connection closed")
+        data += chunk
+    return data
+
+
+async def play_client(host: str, port: int, moves: List[str], latencies: List[float],
+                      timeout: float = 30.0) -> bool:
+    """Один игрок: ходы moves, затем сдача и отказ от новой партии"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        prompts = [PROMPT.encode(), b"(Y/N)? "]
+        data = await _read_until(reader, prompts, timeout)
+        for move in moves + ['-1']:
+            if not data.endswith(PROMPT.encode()):
+                break
+            started = time.perf_counter()
+            writer.write(move.encode() + b'\r\n')
+            data = await _read_until(reader, prompts, timeout)
+            latencies.append(time.perf_counter() - started)
+        writer.write(b'N\r\n')
+        return b"Thanks for playing" in await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def run_clients(host: str, port: int, clients: int = 200,
+                      moves: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    clients одновременных подключений; все соединения открываются до
+    первого хода, чтобы сервер держал их одновременно
+    """
+    moves = moves if moves is not None else ['5'] * 5
+    latencies: List[float] = []
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(play_client(host, port, moves, latencies) for _ in range(clients)),
+        return_exceptions=True
+    )
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    completed = sum(1 for result in results if result is True)
+    return {
+        'clients': clients,
+        'completed': completed,
+        'errors': clients - completed,
+        'moves': len(latencies),
+        'seconds': round(elapsed, 3),
+        'move_p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'move_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Chase telnet server load client')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2323)
+    parser.add_argument('--clients', type=int, default=200, help='Simultaneous connections')
+    parser.add_argument('--moves', default='5 5 5 5 5', help='Moves per client before giving up')
+    args = parser.parse_args(argv)
+    report = asyncio.run(run_clients(args.host, args.port, args.clients, args.moves.split()))
+    print(json.dumps(report, indent=2))
+    return 0 if report['errors'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,46 +3,159 @@ chase_terminal.py - Консольный интерфейс для игры Chas
 Обеспечивает взаимодействие с пользователем через терминал
 """
 
+import argparse
 import sys
 import os
-from typing import Optional, List
+import random
+from typing import IO, Iterable, Iterator, Optional, List, Tuple
 from chase_core import ChaseGame, PLAYER, INTERCEPTOR, WALL, EMPTY
+from chase_logsink import LogSink, ListSink, open_sink
+
+# Очистка экрана и курсор в левый верхний угол
+CLEAR_SCREEN = "\033[2J\033[H"
+
+# Флаг режима консоли Windows: обработка ANSI-последовательностей (Windows 10+)
+ENABLE_VIRTUAL_TERMINAL_PROCESSING = 0x0004
+_vt_mode: Optional[bool] = None
+
+
+def enable_vt_mode() -> bool:
+    """
+    Включение обработки ANSI в консоли Windows; False, если консоль ее
+    не поддерживает (старые версии Windows) или вывод не в консоль.
+    Вне Windows ANSI поддерживается всегда. Результат запоминается.
+    """
+    global _vt_mode
+    if os.name != 'nt':
+        return True
+    if _vt_mode is None:
+        try:
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+            mode = ctypes.c_ulong()
+            _vt_mode = bool(kernel32.GetConsoleMode(handle, ctypes.byref(mode)) and
+                            kernel32.SetConsoleMode(handle, mode.value | ENABLE_VIRTUAL_TERMINAL_PROCESSING))
+        except (AttributeError, OSError):
+            _vt_mode = False
+    return _vt_mode
+
+# Заголовок игры (как в оригинале BASIC)
+HEADER_LINES = [
+    " " * 26 + "CHASE",
+    " " * 20 + "CREATIVE COMPUTING",
+    " " * 18 + "MORRISTOWN, NEW JERSEY",
+    "\n" * 3,
+]
+
+VALID_MOVES = [-1, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+
+
+def parse_move(move_input: str) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Разбор строки хода (общий для терминала и сетевого сервера)
+    
+    Returns:
+        (код хода, None) для допустимого хода, (None, сообщение) для ошибки,
+        (None, None) для пустой строки
+    """
+    move_input = move_input.strip()
+    if not move_input:
+        return None, None
+    try:
+        move = int(move_input)
+    except ValueError:
+        return None, "Please enter a number"
+    if move not in VALID_MOVES:
+        return None, f"Invalid move: {move}. Valid moves are: {VALID_MOVES}"
+    return move, None
+
 
 class ChaseTerminal:
     """Класс для управления терминальным интерфейсом игры"""
     
-    def __init__(self, seed: Optional[int] = None, log_output: bool = False):
+    def __init__(self, seed: Optional[int] = None, log_output: bool = False,
+                 log_sink: Optional[LogSink] = None, quiet: bool = False,
+                 stdin: Optional[IO[str]] = None, stdout: Optional[IO[str]] = None,
+                 rng: Optional[random.Random] = None):
         """
         Инициализация терминального интерфейса
         
         Args:
             seed: Seed для генератора случайных чисел (для воспроизводимости)
             log_output: Если True, вывод будет записываться в лог
+            log_sink: Приемник лога (по умолчанию - список строк в памяти)
+            quiet: Без вывода на экран и без чтения stdin (пакетные прогоны):
+                   исчерпанный сценарий ввода завершает игру
+            stdin, stdout: Потоки ввода и вывода (по умолчанию - sys.stdin
+                   и sys.stdout на момент обращения)
+            rng: Собственный генератор (уже с seed) для этой и следующих партий
+                 вместо глобального random - для параллельных прогонов
         """
-        self.game = ChaseGame(seed)
+        self.rng = rng
+        self.game = ChaseGame(seed, rng=rng)
         self.log_output = log_output
-        self.log_lines: List[str] = []
-        self.input_history: List[str] = []
+        self.log_sink = log_sink if log_sink is not None else ListSink()
+        self.quiet = quiet
+        self.stdin = stdin
+        self.stdout = stdout
+        # Заранее заданный ввод (список, файл, генератор) - читается по строке
+        self.script: Optional[Iterator[str]] = None
         
     def clear_screen(self):
-        """Очистка экрана (кроссплатформенная)"""
-        if os.name == 'nt':  # Windows
+        """
+        Очистка экрана ANSI-последовательностью (без запуска clear/cls).
+        Старая консоль Windows без поддержки ANSI очищается через cls.
+        """
+        stdout = self.stdout or sys.stdout
+        if self.stdout is None and not enable_vt_mode():
+            stdout.flush()
             os.system('cls')
-        else:  # Unix/Linux/MacOS
-            os.system('clear')
+            return
+        stdout.write(CLEAR_SCREEN)
+        stdout.flush()
+    
+    def next_scripted_input(self) -> Optional[str]:
+        """Следующая строка заданного ввода или None, если он исчерпан"""
+        if self.script is None:
+            return None
+        line = next(self.script, None)
+        if line is None:
+            self.script = None
+            return None
+        return line.strip()
+    
+    def read_input(self, prompt: str = "") -> str:
+        """Ввод с клавиатуры; в тихом режиме ввода нет (EOFError)"""
+        if self.quiet:
+            raise EOFError
+        if self.stdin in (None, sys.stdin) and self.stdout in (None, sys.stdout):
+            # Системная консоль: input() с редактированием строки
+            return input(prompt)
+        stdout = self.stdout or sys.stdout
+        stdout.write(prompt)
+        stdout.flush()
+        line = (self.stdin or sys.stdin).readline()
+        if not line:
+            raise EOFError
+        return line.rstrip('\n')
+    
+    @property
+    def log_lines(self) -> List[str]:
+        """Строки лога, сохраненные приемником в памяти"""
+        return self.log_sink.lines()
     
     def print_with_log(self, text: str):
         """Вывод текста с возможностью логирования"""
-        print(text)
+        if not self.quiet:
+            print(text, file=self.stdout)
         if self.log_output:
-            self.log_lines.append(text)
+            self.log_sink.write(text)
     
     def show_header(self):
         """Отображение заголовка игры"""
-        self.print_with_log(" " * 26 + "CHASE")
-        self.print_with_log(" " * 20 + "CREATIVE COMPUTING")
-        self.print_with_log(" " * 18 + "MORRISTOWN, NEW JERSEY")
-        self.print_with_log("\n" * 3)
+        for line in HEADER_LINES:
+            self.print_with_log(line)
     
     def show_instructions(self):
         """Отображение инструкций игры"""
@@ -65,33 +178,25 @@ class ChaseTerminal:
             try:
                 if self.log_output:
                     # Для тестов используем предопределенный ввод
-                    if self.input_history:
-                        move_input = self.input_history.pop(0)
+                    move_input = self.next_scripted_input()
+                    if move_input is not None:
                         self.print_with_log(f"Input (from history): {move_input}")
                     else:
-                        move_input = input().strip()
+                        move_input = self.read_input().strip()
                 else:
-                    move_input = input("YOUR MOVE? ").strip()
+                    move_input = self.read_input("YOUR MOVE? ").strip()
                 
                 # Логируем ввод
-                if self.log_output and move_input not in self.input_history:
-                    self.log_lines.append(f"Input: {move_input}")
+                if self.log_output:
+                    self.log_sink.write(f"Input: {move_input}")
                 
                 # Парсим ввод
-                if not move_input:
-                    continue
-                    
-                move = int(move_input)
-                
-                # Проверка допустимых значений
-                valid_moves = [-1, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
-                if move in valid_moves:
+                move, error = parse_move(move_input)
+                if move is not None:
                     return move
-                else:
-                    self.print_with_log(f"Invalid move: {move}. Valid moves are: {valid_moves}")
+                if error:
+                    self.print_with_log(error)
                     
-            except ValueError:
-                self.print_with_log("Please enter a number")
             except EOFError:
                 self.print_with_log("\nGame interrupted")
                 return None
@@ -122,11 +227,12 @@ class ChaseTerminal:
         """Спрашивает, хочет ли игрок сыграть еще раз"""
         while True:
             try:
-                if self.log_output and self.input_history:
-                    response = self.input_history.pop(0).strip().upper()
+                response = self.next_scripted_input() if self.log_output else None
+                if response is not None:
+                    response = response.upper()
                     self.print_with_log(f"ANOTHER GAME (Y/N)? {response}")
                 else:
-                    response = input("ANOTHER GAME (Y/N)? ").strip().upper()
+                    response = self.read_input("ANOTHER GAME (Y/N)? ").strip().upper()
                 
                 if response in ['Y', 'N']:
                     return response == 'Y'
@@ -142,11 +248,12 @@ class ChaseTerminal:
         """Спрашивает, использовать ли ту же начальную расстановку"""
         while True:
             try:
-                if self.log_output and self.input_history:
-                    response = self.input_history.pop(0).strip().upper()
+                response = self.next_scripted_input() if self.log_output else None
+                if response is not None:
+                    response = response.upper()
                     self.print_with_log(f"SAME SETUP (Y/N)? {response}")
                 else:
-                    response = input("SAME SETUP (Y/N)? ").strip().upper()
+                    response = self.read_input("SAME SETUP (Y/N)? ").strip().upper()
                 
                 if response in ['Y', 'N']:
                     return response == 'Y'
@@ -191,8 +298,9 @@ class ChaseTerminal:
                 play_again = self.ask_play_again()
             else:
                 # В тестовом режиме используем предопределенные ответы
-                if self.input_history:
-                    response = self.input_history.pop(0).strip().upper() if self.input_history else 'N'
+                response = self.next_scripted_input()
+                if response is not None:
+                    response = response.upper()
                     play_again = response == 'Y'
                     self.print_with_log(f"ANOTHER GAME (Y/N)? {response}")
                 else:
@@ -202,35 +310,43 @@ class ChaseTerminal:
                 if same_setup:
                     self.game.reset_to_original()
                 else:
-                    # Создаем новую игру с тем же seed если был указан
-                    seed = self.game.game.seed if hasattr(self.game, 'seed') else None
-                    self.game = ChaseGame(seed)
+                    # Новая расстановка: без seed, иначе получим то же поле
+                    self.game = ChaseGame(rng=self.rng)
             else:
                 game_active = False
     
-    def run_with_inputs(self, inputs: List[str]) -> List[str]:
+    def run_with_inputs(self, inputs: Iterable[str],
+                        log_sink: Optional[LogSink] = None) -> List[str]:
         """
         Запуск игры с предопределенными вводами (для тестирования)
         
         Args:
-            inputs: Список строк ввода
+            inputs: Строки ввода - список, открытый файл, генератор;
+                    читаются по одной по мере надобности
+            log_sink: Приемник лога вместо текущего; с файловым приемником
+                      лог пишется по ходу игры, а не копится в памяти
             
         Returns:
-            Список строк вывода (лог игры)
+            Строки лога, сохраненные приемником в памяти
+            (весь лог для приемника по умолчанию)
         """
         self.log_output = True
-        self.input_history = inputs.copy()
+        self.script = iter(inputs)
+        if log_sink is not None:
+            self.log_sink = log_sink
         
         # Запускаем игру
         try:
             self.run_game_loop()
         except Exception as e:
             self.print_with_log(f"Error during game execution: {e}")
+        finally:
+            self.log_sink.flush()
         
-        return self.log_lines.copy()
+        return self.log_sink.lines()
 
 
-def print_help():
+def print_help(stdout: Optional[IO[str]] = None):
     """Вывод справки по использованию"""
     help_text = """
 Chase Game - Terminal Version
@@ -241,6 +357,19 @@ Usage:
 Options:
     --seed=NUMBER      Set random seed for reproducible games
     --test             Run in test mode (no interactive input)
+    --curses           Redraw only changed cells (for slow SSH links)
+    --script=FILE      Read moves and answers from FILE, one per line ('-' = stdin)
+    --log=FILE         Write the game log of --script runs to FILE
+    --log-max-bytes=N  Rotate the log file after N bytes (keeps 3 old files)
+    --batch=FILE       Run games from a JSON Lines file of {"seed", "inputs"}
+                       without rendering; prints one summary line per game
+    --jobs=N           Worker processes for --batch (default: CPU count)
+    --output=FILE      Summary file for --batch (default: stdout)
+    --log-dir=DIR      Also write a full log per --batch game into DIR
+    --realtime         Interceptors move every tick, keys act immediately
+    --tick=SECONDS     Tick period for --realtime (default 1.0)
+    --serve=PORT       Host games for remote players over TCP (telnet)
+    --host=ADDRESS     Address for --serve (default 127.0.0.1; 0.0.0.0 - all interfaces)
     --help, -h         Show this help message
     --version          Show version information
 
@@ -256,63 +385,180 @@ Game Controls:
 Examples:
     python chase_terminal.py
     python chase_terminal.py --seed=42
+    python chase_terminal.py --seed=42 --script=moves.txt
+    python chase_terminal.py --batch=games.jsonl --jobs=4 --output=summary.jsonl
+    python chase_terminal.py --serve=2323
     """
-    print(help_text)
+    print(help_text, file=stdout)
+
+
+class ArgumentsError(Exception):
+    """Разбор аргументов завершен (ошибка); status - код возврата"""
+
+    def __init__(self, status: int):
+        super().__init__(status)
+        self.status = status
 
 
-def main():
-    """Основная функция запуска"""
-    import argparse
+class CliArgumentParser(argparse.ArgumentParser):
+    """
+    Разбор аргументов для вызова main в том же процессе: сообщения идут в
+    переданные потоки, а не в sys.stdout/sys.stderr, вместо выхода из
+    программы бросается ArgumentsError. Глобальные потоки не подменяются,
+    поэтому параллельные вызовы из разных потоков не смешивают вывод.
+    """
+
+    def __init__(self, *args, stdout: IO[str], stderr: IO[str], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stdout = stdout
+        self.stderr = stderr
+
+    def _print_message(self, message: str, file: Optional[IO[str]] = None):
+        if message:
+            (self.stderr if file is sys.stderr else self.stdout).write(message)
+
+    def exit(self, status: int = 0, message: Optional[str] = None):
+        if message:
+            self.stderr.write(message)
+        raise ArgumentsError(status)
+
+    def error(self, message: str):
+        self.stderr.write(self.format_usage())
+        self.exit(2, f"{self.prog}: error: {message}\n")
+
+
+def main(argv: Optional[List[str]] = None, stdin: Optional[IO[str]] = None,
+         stdout: Optional[IO[str]] = None, stderr: Optional[IO[str]] = None) -> int:
+    """
+    Основная функция запуска. Вызывается и в том же процессе (тесты,
+    прогоны сценариев): аргументы и потоки передаются явно, результат -
+    код возврата, sys.exit не вызывается.
     
-    parser = argparse.ArgumentParser(
+    Args:
+        argv: Аргументы командной строки без имени программы (по умолчанию sys.argv[1:])
+        stdin, stdout, stderr: Потоки (по умолчанию - системные)
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    
+    parser = CliArgumentParser(
         description='Chase Game - Terminal Version',
-        add_help=False
+        add_help=False,
+        prog='chase_terminal.py',
+        stdout=stdout,
+        stderr=stderr
     )
     
     parser.add_argument('--seed', type=int, help='Random seed for reproducible games')
     parser.add_argument('--test', action='store_true', help='Run in test mode')
+    parser.add_argument('--curses', action='store_true', help='Incremental curses display')
+    parser.add_argument('--script', help="Scripted input file, one line per input ('-' = stdin)")
+    parser.add_argument('--log', help='Game log file for --script runs')
+    parser.add_argument('--log-max-bytes', type=int, default=0, help='Rotate the log file at N bytes')
+    parser.add_argument('--batch', help='JSON Lines file of games to run headless')
+    parser.add_argument('--jobs', type=int, help='Worker processes for --batch')
+    parser.add_argument('--output', help='Summary file for --batch')
+    parser.add_argument('--log-dir', help='Per-game log directory for --batch')
+    parser.add_argument('--realtime', action='store_true', help='Real-time mode')
+    parser.add_argument('--tick', type=float, default=1.0, help='Tick period for --realtime, seconds')
+    parser.add_argument('--serve', type=int, metavar='PORT', help='Serve games over TCP on PORT')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Address for --serve (0.0.0.0 - all interfaces)')
     parser.add_argument('--help', '-h', action='store_true', help='Show help message')
     parser.add_argument('--version', action='store_true', help='Show version information')
     
-    args = parser.parse_args()
+    try:
+        args = parser.parse_args(argv)
+    except ArgumentsError as e:
+        return e.status
     
     if args.help:
-        print_help()
-        return
+        print_help(stdout)
+        return 0
     
     if args.version:
-        print("Chase Game v1.0 - Python Port")
-        print("Based on original BASIC version from Creative Computing")
-        return
+        print("Chase Game v1.0 - Python Port", file=stdout)
+        print("Based on original BASIC version from Creative Computing", file=stdout)
+        return 0
     
     if args.test:
         # Режим тестирования - запускаем с предопределенными вводами
-        print("Running in test mode...")
+        print("Running in test mode...", file=stdout)
         test_inputs = ["8", "6", "-1", "N"]  # Пример тестового ввода
-        terminal = ChaseTerminal(seed=args.seed, log_output=True)
+        terminal = ChaseTerminal(seed=args.seed, log_output=True, stdin=stdin, stdout=stdout)
         log = terminal.run_with_inputs(test_inputs)
         
-        print("\n" + "="*50)
-        print("Game Log:")
-        print("="*50)
+        print("\n" + "="*50, file=stdout)
+        print("Game Log:", file=stdout)
+        print("="*50, file=stdout)
         for line in log:
-            print(line)
-        return
+            print(line, file=stdout)
+        return 0
+    
+    if args.batch:
+        from chase_batch import main_batch
+        return main_batch(args.batch, args.output, args.jobs, args.log_dir,
+                          stdin=stdin, stdout=stdout, stderr=stderr)
+    
+    if args.script:
+        # Ввод читается из файла построчно, без загрузки в память целиком
+        script = stdin if args.script == '-' else open(args.script, encoding='utf-8')
+        sink = open_sink(args.log, args.log_max_bytes)
+        try:
+            terminal = ChaseTerminal(seed=args.seed, log_output=True, stdin=stdin, stdout=stdout)
+            terminal.run_with_inputs(script, log_sink=sink)
+        finally:
+            sink.close()
+            if script is not stdin:
+                script.close()
+        return 0
+    
+    if args.serve is not None:
+        from chase_telnet import run_server
+        run_server(args.serve, args.host, args.seed)
+        return 0
+    
+    if args.realtime:
+        # Режим реального времени рисует только ANSI-изменениями
+        if not enable_vt_mode():
+            print("--realtime needs a console with ANSI support (Windows 10 or later)", file=stdout)
+            return 1
+        from chase_realtime import run_realtime
+        try:
+            run_realtime(args.seed, args.tick)
+        except KeyboardInterrupt:
+            print("\nGame interrupted. Goodbye!", file=stdout)
+        return 0
+    
+    if args.curses:
+        from chase_curses import run_curses
+        try:
+            run_curses(args.seed)
+        except ImportError:
+            print("curses is not available (on Windows: pip install windows-curses)", file=stdout)
+            return 1
+        except Exception as e:
+            print(f"\nError: {e}", file=stdout)
+            return 1
+        print("Thanks for playing Chase!", file=stdout)
+        return 0
     
     # Интерактивный режим
     try:
-        terminal = ChaseTerminal(seed=args.seed, log_output=False)
+        terminal = ChaseTerminal(seed=args.seed, log_output=False, stdin=stdin, stdout=stdout)
         terminal.run_game_loop()
         
-        print("\nThanks for playing Chase!")
-        print("Based on original BASIC version from Creative Computing")
+        print("\nThanks for playing Chase!", file=stdout)
+        print("Based on original BASIC version from Creative Computing", file=stdout)
         
     except KeyboardInterrupt:
-        print("\n\nGame interrupted. Goodbye!")
+        print("\n\nGame interrupted. Goodbye!", file=stdout)
     except Exception as e:
-        print(f"\nError: {e}")
-        sys.exit(1)
+        print(f"\nError: {e}", file=stdout)
+        return 1
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
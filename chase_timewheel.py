@@ -0,0 +1,118 @@
+"""
+chase_timewheel.py - Колесо таймеров для тактов партий реального времени
+Одно колесо (и один поток) обслуживает такты всех партий процесса. Таймер
+кладется в ячейку колеса по сроку; за такт колеса просматривается только
+текущая ячейка, поэтому работа на такт зависит от числа сработавших
+таймеров, а не от общего числа живых партий.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Timer:
+    """Запланированный вызов; cancel() снимает его (и повторы)"""
+    __slots__ = ('callback', 'interval', 'rounds', 'cancelled')
+
+    def __init__(self, callback: Callable[[], Optional[bool]], interval: Optional[int]):
+        self.callback = callback
+        self.interval = interval
+        self.rounds = 0
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimingWheel:
+    """
+    Хешированное колесо таймеров: slots ячеек по resolution секунд.
+    Срок дальше одного оборота хранится как число оставшихся оборотов.
+    """
+
+    def __init__(self, resolution: float = 0.05, slots: int = 512,
+                 clock: Callable[[], float] = time.monotonic):
+        self.resolution = resolution
+        self.slots: List[List[Timer]] = [[] for _ in range(slots)]
+        self.clock = clock
+        self.position = 0
+        self.started = clock()
+        self.ticks = 0
+        self.timers = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def _place(self, timer: Timer, ticks: int):
+        ticks = max(1, ticks)
+        timer.rounds = (ticks - 1) // len(self.slots)
+        self.slots[(self.position + ticks) % len(self.slots)].append(timer)
+
+    def schedule(self, delay: float, callback: Callable[[], Optional[bool]],
+                 repeat: bool = False) -> Timer:
+        """
+        Вызов callback через delay секунд (с точностью до resolution).
+        repeat=True - повторять с тем же интервалом, пока callback
+        не вернет False или таймер не будет снят.
+        """
+        ticks = max(1, round(delay / self.resolution))
+        timer = Timer(callback, ticks if repeat else None)
+        with self._lock:
+            self._place(timer, ticks)
+            self.timers += 1
+        return timer
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Проход всех наступивших тактов колеса; возвращает число вызовов"""
+        if now is None:
+            now = self.clock()
+        fired = 0
+        while self.ticks < int((now - self.started) / self.resolution):
+            with self._lock:
+                self.ticks += 1
+                self.position = (self.position + 1) % len(self.slots)
+                slot = self.slots[self.position]
+                due = [timer for timer in slot if timer.rounds == 0 and not timer.cancelled]
+                # Остальные ждут следующего оборота; снятые выбрасываются
+                waiting = [timer for timer in slot if timer.rounds > 0 and not timer.cancelled]
+                for timer in waiting:
+                    timer.rounds -= 1
+                self.slots[self.position] = waiting
+                self.timers -= len(slot) - len(waiting)
+            for timer in due:
+                fired += 1
+                try:
+                    again = timer.callback()
+                except Exception:  # Ошибка одной партии не останавливает колесо
+                    logger.exception("timer callback failed")
+                    again = False
+                if timer.interval is not None and again is not False and not timer.cancelled:
+                    with self._lock:
+                        self._place(timer, timer.interval)
+                        self.timers += 1
+        return fired
+
+    def start(self):
+        """Фоновый поток, продвигающий колесо"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='chase-timewheel', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.advance()
+            next_tick = self.started + (self.ticks + 1) * self.resolution
+            self._stopped.wait(max(0.0, next_tick - self.clock()))
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __len__(self) -> int:
+        return self.timers
@@ -0,0 +1,289 @@
+"""
+chase_tournament.py - Турниры ботов на сервере
+Набор seed разыгрывается встроенной стратегией без интерфейса в пуле
+процессов. Запрос только ставит задание в очередь и сразу получает его id,
+а прогресс и сводные результаты (доля побед, среднее число ходов,
+доверительные интервалы) читаются отдельно. Результаты кэшируются по
+(стратегия, лимит ходов, набор seed): ход бота детерминирован seed партии.
+"""
+
+import hashlib
+import math
+import multiprocessing
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from chase_bots import get_strategy
+from chase_pool import build_game
+
+# Исходы партии бота: победа, гибель, дожил до лимита ходов
+OUTCOMES = ('won', 'lost', 'survived')
+
+# z для двустороннего 95% интервала
+Z_95 = 1.959963984540054
+
+# (seed, исход, число ходов, использован ли прыжок)
+GameResult = Tuple[int, str, int, bool]
+
+
+class TournamentError(ValueError):
+    """Некорректное задание турнира"""
+
+
+def play_game(seed: int, strategy_name: str, max_moves: int) -> GameResult:
+    """Одна партия бота; решения бота воспроизводимы по seed"""
+    strategy = get_strategy(strategy_name)
+    game = build_game(seed)
+    rng = random.Random(seed)
+    while not game.game_over and game.move_count < max_moves:
+        game.process_move(strategy(game.board, game.player_pos, game.interceptors, rng))
+    if game.game_won:
+        outcome = 'won'
+    elif game.game_lost:
+        outcome = 'lost'
+    else:
+        outcome = 'survived'
+    return seed, outcome, game.move_count, game.jump_used
+
+
+def play_chunk(strategy_name: str, seeds: Sequence[int], max_moves: int) -> List[GameResult]:
+    """Пакет партий для одного вызова в процессе пула"""
+    return [play_game(seed, strategy_name, max_moves) for seed in seeds]
+
+
+def wilson_interval(successes: int, total: int, z: float = Z_95) -> Tuple[float, float]:
+    """Доверительный интервал Уилсона для доли (устойчив при 0 и 100%)"""
+    if total == 0:
+        return 0.0, 0.0
+    p = successes / total
+    denominator = 1 + z * z / total
+    center = (p + z * z / (2 * total)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def mean_interval(values: Sequence[float], z: float = Z_95) -> Tuple[float, float, float]:
+    """Среднее и нормальный доверительный интервал (mean, low, high)"""
+    n = len(values)
+    if n == 0:
+        return 0.0, 0.0, 0.0
+    mean = sum(values) / n
+    if n == 1:
+        return mean, mean, mean
+    variance = sum((value - mean) ** 2 for value in values) / (n - 1)
+    margin = z * math.sqrt(variance / n)
+    return mean, mean - margin, mean + margin
+
+
+def summarize(results: Iterable[GameResult]) -> Dict[str, Any]:
+    """Сводка по результатам партий"""
+    results = list(results)
+    games = len(results)
+    counts = {outcome: 0 for outcome in OUTCOMES}
+    for _, outcome, _, _ in results:
+        counts[outcome] += 1
+    win_low, win_high = wilson_interval(counts['won'], games)
+    moves, moves_low, moves_high = mean_interval([result[2] for result in results])
+    return {
+        'games': games,
+        'outcomes': counts,
+        'win_rate': counts['won'] / games if games else 0.0,
+        'win_rate_ci95': [win_low, win_high],
+        'avg_moves': moves,
+        'avg_moves_ci95': [moves_low, moves_high],
+        'jump_rate': sum(1 for result in results if result[3]) / games if games else 0.0,
+    }
+
+
+def cache_key(strategy: str, seeds: Sequence[int], max_moves: int) -> Tuple[str, int, str]:
+    """Ключ кэша: стратегия, лимит ходов и хеш упорядоченного набора seed"""
+    digest = hashlib.blake2b(digest_size=16)
+    for seed in seeds:
+        digest.update(seed.to_bytes(8, 'little', signed=True))
+    return strategy, max_moves, digest.hexdigest()
+
+
+class Job:
+    """Задание турнира и его прогресс"""
+
+    def __init__(self, job_id: str, strategy: str, seeds: List[int], max_moves: int,
+                 key: Tuple[str, int, str]):
+        self.id = job_id
+        self.strategy = strategy
+        self.seeds = seeds
+        self.max_moves = max_moves
+        self.key = key
+        self.status = 'queued'
+        self.results: List[GameResult] = []
+        self.futures: List[Future] = []
+        self.pending = 0
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ('done', 'cancelled', 'failed')
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = len(self.seeds)
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'strategy': self.strategy,
+            'max_moves': self.max_moves,
+            'total': total,
+            'completed': len(self.results),
+            'progress': len(self.results) / total if total else 1.0,
+            'summary': summarize(self.results),
+            'error': self.error,
+            'elapsed_s': round((self.finished or time.time()) - self.created, 3),
+        }
+
+
+class TournamentRunner:
+    """
+    Очередь турниров поверх ProcessPoolExecutor.
+    Задание делится на пакеты по chunk_size seed; прогресс растет по мере
+    завершения пакетов. Пул процессов создается при первом задании.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 25,
+                 max_seeds: int = 10000, max_moves: int = 1000, max_jobs: int = 256):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_seeds = max_seeds
+        self.max_moves = max_moves
+        self.max_jobs = max_jobs
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._cache: Dict[Tuple[str, int, str], str] = {}
+        # RLock: отмена future под блокировкой синхронно вызывает _chunk_done
+        self._lock = threading.RLock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: веб-процесс многопоточный, fork с потоками небезопасен
+            self._executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def _validate(self, strategy: str, seeds: Any, max_moves: Any) -> Tuple[List[int], int]:
+        try:
+            get_strategy(strategy)
+        except ValueError as e:
+            raise TournamentError(str(e)) from None
+        if not isinstance(seeds, list) or not seeds:
+            raise TournamentError("seeds must be a non-empty list")
+        if len(seeds) > self.max_seeds:
+            raise TournamentError(f"Too many seeds: {len(seeds)} > {self.max_seeds}")
+        if not all(type(seed) is int and -2**63 <= seed < 2**63 for seed in seeds):
+            raise TournamentError("seeds must be 64-bit integers")
+        if type(max_moves) is not int or not 1 <= max_moves <= self.max_moves:
+            raise TournamentError(f"max_moves must be in 1..{self.max_moves}")
+        # Набор seed: повторы не разыгрываются дважды, порядок не важен
+        return sorted(set(seeds)), max_moves
+
+    def submit(self, strategy: str, seeds: Any, max_moves: int = 200) -> str:
+        """Постановка турнира в очередь; возвращает id задания (или уже готового)"""
+        seeds, max_moves = self._validate(strategy, seeds, max_moves)
+        key = cache_key(strategy, seeds, max_moves)
+        with self._lock:
+            cached = self._jobs.get(self._cache.get(key, ''))
+            if cached is not None:
+                self._jobs.move_to_end(cached.id)
+                return cached.id
+
+            job = Job(uuid.uuid4().hex, strategy, seeds, max_moves, key)
+            self._jobs[job.id] = job
+            self._cache[key] = job.id
+            self._evict()
+
+            pool = self._pool()
+            chunks = [seeds[i:i + self.chunk_size] for i in range(0, len(seeds), self.chunk_size)]
+            job.pending = len(chunks)
+            job.status = 'running'
+            for chunk in chunks:
+                future = pool.submit(play_chunk, strategy, chunk, max_moves)
+                job.futures.append(future)
+        for future in list(job.futures):
+            future.add_done_callback(lambda future, job=job: self._chunk_done(job, future))
+        return job.id
+
+    def _chunk_done(self, job: Job, future: Future):
+        with self._lock:
+            if job.done:
+                return
+            try:
+                job.results.extend(future.result())
+            except CancelledError:
+                return
+            except Exception as e:  # Ошибка в процессе пула
+                job.status = 'failed'
+                job.error = f"{type(e).__name__}: {e}"
+                job.finished = time.time()
+                self._cache.pop(job.key, None)
+                for pending in job.futures:
+                    pending.cancel()
+                return
+            job.pending -= 1
+            if job.pending == 0:
+                job.results.sort()
+                job.status = 'done'
+                job.finished = time.time()
+
+    def _evict(self):
+        """Удаление самых старых завершенных заданий сверх max_jobs"""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            job = self._jobs[job_id]
+            if job.done:
+                del self._jobs[job_id]
+                if self._cache.get(job.key) == job_id:
+                    del self._cache[job.key]
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Прогресс и сводка задания (None, если задания нет)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job is not None else None
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Отмена задания: пакеты в очереди снимаются, уже выполняемые
+        дорабатывают, но их результаты не учитываются.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if not job.done:
+                job.status = 'cancelled'
+                job.finished = time.time()
+                self._cache.pop(job.key, None)
+                for future in job.futures:
+                    future.cancel()
+            return job.to_dict()
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Ожидание завершения задания (для тестов и командной строки)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.status(job_id)
+            if status is None or status['status'] != 'running':
+                return status
+            if deadline is not None and time.monotonic() >= deadline:
+                return status
+            time.sleep(0.01)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
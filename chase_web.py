@@ -1,88 +1,535 @@
 """
 chase_web.py - Веб-версия игры Chase с использованием Flask
+Приложение создается фабрикой create_app(config). Игровой сервис, таблица
+рекордов и трансляция зрителям создаются при первом обращении, поэтому
+импорт модуля и запуск нового воркера не тратят время на то, что еще
+не понадобилось. Атрибут модуля app (для gunicorn chase_web:app)
+тоже создается при первом обращении.
 """
 import sys
 import os
-from flask import Flask, render_template, jsonify, request
+import time
+import random
+import hashlib
+import threading
+from flask import Flask, Response, current_app, g, render_template, request
 from chase_core import ChaseGame
-import json
+from chase_metrics import ChaseMetrics
+from chase_ratelimit import Backpressure, optional_limiter, retry_after_header
+from chase_service import MAX_TICK_MS, MIN_TICK_MS, is_game_id
+import chase_json
 
-# Кроссплатформенные настройки
-if sys.platform == "win32":
-    # Настройки для Windows
-    os.system('chcp 65001 > nul')  # UTF-8 для Windows консоли
-    TEMPLATE_FOLDER = 'templates'
-else:
-    # Настройки для Linux/macOS
-    TEMPLATE_FOLDER = 'templates'
+TEMPLATE_FOLDER = 'templates'
 
-app = Flask(__name__, template_folder=TEMPLATE_FOLDER)
+def default_config():
+    """Настройки по умолчанию из переменных окружения"""
+    return {
+        # Сессии: горячий уровень в памяти + SQLite с отложенной записью
+        'CHASE_SESSION_DB': os.environ.get('CHASE_SESSION_DB', 'chase_sessions.db'),
+        # Таблица рекордов завершенных партий
+        'CHASE_LEADERBOARD_DB': os.environ.get('CHASE_LEADERBOARD_DB', 'chase_leaderboard.db'),
+        # > 1: партии шардируются по процессам-воркерам
+        'CHASE_WORKERS': int(os.environ.get('CHASE_WORKERS', '1')),
+        # Порог журнала медленных запросов, миллисекунды
+        'CHASE_SLOW_REQUEST_MS': float(os.environ.get('CHASE_SLOW_REQUEST_MS', '250')),
+        # Целевая задержка /api/hint, миллисекунды
+        'CHASE_HINT_SLA_MS': float(os.environ.get('CHASE_HINT_SLA_MS', '100')),
+        # Процессы для турниров ботов (по умолчанию - по числу ядер)
+        'CHASE_TOURNAMENT_WORKERS': int(os.environ.get('CHASE_TOURNAMENT_WORKERS', '0')) or None,
+        # Прогрев при создании приложения (пул полей, шаблоны, базы)
+        'CHASE_WARM_UP': os.environ.get('CHASE_WARM_UP', '') not in ('', '0'),
+        # Токенов в секунду на IP и на партию (0 - без ограничения); емкость - вдвое больше
+        'CHASE_RATE_IP': float(os.environ.get('CHASE_RATE_IP', '50')),
+        'CHASE_RATE_SESSION': float(os.environ.get('CHASE_RATE_SESSION', '20')),
+        # Запросов в обработке и в очереди за ними (0 - без ограничения)
+        'CHASE_MAX_IN_FLIGHT': int(os.environ.get('CHASE_MAX_IN_FLIGHT', '64')),
+        'CHASE_MAX_QUEUED': int(os.environ.get('CHASE_MAX_QUEUED', '64')),
+        # Сколько запрос ждет места в очереди, миллисекунды
+        'CHASE_QUEUE_TIMEOUT_MS': float(os.environ.get('CHASE_QUEUE_TIMEOUT_MS', '500')),
+        # Одновременных зрителей /api/spectate на процесс (0 - без ограничения).
+        # Каждый зритель занимает поток WSGI-сервера: лимит - не больше числа потоков
+        'CHASE_MAX_VIEWERS': int(os.environ.get('CHASE_MAX_VIEWERS', '256')),
+    }
+
+class ChaseState:
+    """Сервисы одного приложения; создаются при первом обращении"""
+
+    def __init__(self, config):
+        self.config = config
+        self.metrics = ChaseMetrics()
+        self.ip_limiter = optional_limiter(config['CHASE_RATE_IP'], config['CHASE_RATE_IP'] * 2)
+        self.session_limiter = optional_limiter(config['CHASE_RATE_SESSION'],
+                                                config['CHASE_RATE_SESSION'] * 2)
+        self.backpressure = None
+        if config['CHASE_MAX_IN_FLIGHT'] > 0:
+            self.backpressure = Backpressure(config['CHASE_MAX_IN_FLIGHT'],
+                                             config['CHASE_MAX_QUEUED'],
+                                             config['CHASE_QUEUE_TIMEOUT_MS'] / 1000)
+        self._service = None
+        self._leaderboard = None
+        self._broadcaster = None
+        self._tournaments = None
+        self._static = None
+        self._lock = threading.Lock()
+
+    @property
+    def service(self):
+        if self._service is None:
+            with self._lock:
+                if self._service is None:
+                    if self.config['CHASE_WORKERS'] > 1:
+                        from chase_shard import ShardRouter
+                        service = ShardRouter(self.config['CHASE_WORKERS'],
+                                              session_db=self.config['CHASE_SESSION_DB'])
+                    else:
+                        from chase_service import GameService
+                        service = GameService(session_db=self.config['CHASE_SESSION_DB'])
+                    # Результаты тактов: из колеса таймеров этого процесса или,
+                    # при шардировании, из потоков чтения каналов шардов
+                    service.on_update = self.on_tick
+                    self._service = service
+        return self._service
+
+    @property
+    def leaderboard(self):
+        if self._leaderboard is None:
+            with self._lock:
+                if self._leaderboard is None:
+                    from chase_leaderboard import Leaderboard
+                    self._leaderboard = Leaderboard(self.config['CHASE_LEADERBOARD_DB'])
+        return self._leaderboard
+
+    @property
+    def broadcaster(self):
+        if self._broadcaster is None:
+            with self._lock:
+                if self._broadcaster is None:
+                    from chase_spectate import Broadcaster
+                    self._broadcaster = Broadcaster(max_viewers=self.config['CHASE_MAX_VIEWERS'])
+        return self._broadcaster
+
+    @property
+    def tournaments(self):
+        if self._tournaments is None:
+            with self._lock:
+                if self._tournaments is None:
+                    from chase_tournament import TournamentRunner
+                    self._tournaments = TournamentRunner(self.config['CHASE_TOURNAMENT_WORKERS'])
+        return self._tournaments
+
+    def on_tick(self, game_id, response):
+        """Такт партии реального времени (из колеса таймеров или канала шарда)"""
+        if response['game_over']:
+            self.metrics.record_finish(response)
+            self.leaderboard.record_response(response)
+        if self.has_viewers(game_id):
+            self.broadcaster.publish(game_id, response)
+
+    def has_viewers(self, game_id):
+        # Пока никто не смотрел партии, модуль трансляции даже не загружается
+        return self._broadcaster is not None and self._broadcaster.has_viewers(game_id)
+
+    @property
+    def static_payload(self):
+        """Неизменяемые данные игры: инструкции и размеры поля (тело, ETag)"""
+        if self._static is None:
+            game = ChaseGame(0, rng=random.Random(0))
+            body = chase_json.dumps({
+                'instructions': game.get_instructions(),
+                'rows': game.rows,
+                'cols': game.cols,
+                'valid_moves': [-1, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+            })
+            self._static = body, hashlib.sha1(body).hexdigest()
+        return self._static
+
+    def close(self):
+        """Остановка фоновых потоков и сброс данных на диск"""
+        if self._service is not None:
+            self._service.close()
+        if self._leaderboard is not None:
+            self._leaderboard.close()
+        if self._tournaments is not None:
+            self._tournaments.close()
+
+def chase_state():
+    """Сервисы текущего приложения"""
+    return current_app.extensions['chase']
+
+def warm_up(app):
+    """
+    Прогрев перед приемом запросов: пул полей (или процессы-шарды),
+    шаблон главной страницы, статические данные и база рекордов.
+    """
+    state = app.extensions['chase']
+    service = state.service
+    if hasattr(service, 'board_pool'):
+        service.board_pool.fill()
+        service.board_pool.start()
+    else:
+        service.start()
+    app.jinja_env.get_template('index.html')
+    state.static_payload
+    state.leaderboard.top()
 
-app = Flask(__name__)
-game = None
+def start_timer():
+    g.request_started = time.perf_counter()
 
-def create_game(seed=None):
-    """Создание новой игры"""
-    global game
-    game = ChaseGame(seed=seed)
-    return game
+def record_request(response):
+    """Учет задержки, статуса и медленных запросов"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        duration = time.perf_counter() - started
+        endpoint = request.endpoint or 'unknown'
+        metrics = chase_state().metrics
+        metrics.record_request(endpoint, request.method, response.status_code, duration)
+        if duration * 1000 >= current_app.config['CHASE_SLOW_REQUEST_MS']:
+            metrics.slow_requests.inc(endpoint=endpoint)
+            current_app.logger.warning(
+                "slow request: %s %s endpoint=%s status=%d duration_ms=%.1f",
+                request.method, request.path, endpoint, response.status_code, duration * 1000
+            )
+    return response
 
-@app.route('/')
+def json_response(payload, status=200):
+    """Ответ JSON через быстрый кодировщик chase_json"""
+    return Response(chase_json.dumps(payload), status=status, mimetype='application/json')
+
+# Стоимость запроса в токенах для ограничиваемых обработчиков: новая партия
+# генерирует поле, подсказка ищет до SLA, турнир занимает пул процессов.
+# Остальные (главная, статика, метрики, зрители) не ограничиваются.
+RATE_COSTS = {
+    'new_game': 5,
+    'make_move': 1,
+    'get_state': 1,
+    'get_hint': 5,
+    'replay': 2,
+    'start_tournament': 20,
+}
+
+# Retry-After при переполненной очереди, секунды
+OVERLOAD_RETRY_AFTER = 1
+
+def too_many_requests(message, wait):
+    response = json_response({'success': False, 'message': message}, 429)
+    response.headers['Retry-After'] = retry_after_header(wait)
+    return response
+
+def request_game_id():
+    """id партии из тела JSON или параметров запроса"""
+    data = request.get_json(silent=True) if request.method == 'POST' else None
+    if isinstance(data, dict) and 'game_id' in data:
+        return data['game_id']
+    return request.args.get('game_id')
+
+def admit_request():
+    """
+    Ограничение частоты по IP и по партии и очередь запросов.
+    Выполняется до обработчика, поэтому отклоненный запрос не касается ChaseGame.
+    """
+    cost = RATE_COSTS.get(request.endpoint)
+    if cost is None:
+        return None
+    state = chase_state()
+    if state.ip_limiter is not None:
+        wait = state.ip_limiter.acquire(request.remote_addr or '', cost)
+        if wait:
+            state.metrics.rate_limited.inc(scope='ip', endpoint=request.endpoint)
+            return too_many_requests('Rate limit exceeded', wait)
+    game_id = request_game_id()
+    if state.session_limiter is not None and is_game_id(game_id):
+        wait = state.session_limiter.acquire(game_id, cost)
+        if wait:
+            state.metrics.rate_limited.inc(scope='session', endpoint=request.endpoint)
+            return too_many_requests('Rate limit exceeded', wait)
+    if state.backpressure is not None:
+        if not state.backpressure.enter():
+            state.metrics.overloaded.inc(endpoint=request.endpoint)
+            return too_many_requests('Server busy', OVERLOAD_RETRY_AFTER)
+        g.admitted = True
+    return None
+
+def release_request(exc):
+    if g.pop('admitted', False):
+        chase_state().backpressure.leave()
+
+def parse_seed(value):
+    """Seed из запроса: целое число в пределах 64 бит или None"""
+    if value is None or value == '':
+        return None
+    seed = int(value)
+    if not -2**63 <= seed < 2**63:
+        raise ValueError(f"Seed out of range: {seed}")
+    return seed
+
+# Маршруты регистрируются в приложении фабрикой create_app()
+_ROUTES = []
+
+def route(rule, **options):
+    def decorator(view):
+        _ROUTES.append((rule, view, options))
+        return view
+    return decorator
+
+@route('/')
 def index():
     """Главная страница"""
     return render_template('index.html')
 
-@app.route('/api/new_game', methods=['POST'])
+@route('/api/new_game', methods=['POST'])
 def new_game():
-    """Создание новой игры"""
-    data = request.json
-    seed = data.get('seed')
-    create_game(seed)
-    
-    return jsonify({
-        'success': True,
-        'board': game.get_board_string(),
-        'instructions': game.get_instructions(),
-        'player_pos': game.player_pos,
-        'interceptors': game.interceptors
-    })
+    """
+    Создание новой игры. {"tick_ms": 1000} - партия реального времени:
+    перехватчики ходят по такту, ход игрока их не двигает.
+    """
+    data = request.json or {}
+    try:
+        seed = parse_seed(data.get('seed'))
+    except (TypeError, ValueError):
+        return json_response({'success': False, 'message': 'Invalid seed'}, 400)
+    tick_ms = data.get('tick_ms')
+    if tick_ms is not None and (type(tick_ms) is not int
+                                or not MIN_TICK_MS <= tick_ms <= MAX_TICK_MS):
+        return json_response({
+            'success': False,
+            'message': f'tick_ms must be an integer in {MIN_TICK_MS}..{MAX_TICK_MS}'
+        }, 400)
+
+    state = chase_state()
+    response = state.service.new_game(seed, tick_ms=tick_ms)
+    state.metrics.games_created.inc()
+    return json_response(response)
 
-@app.route('/api/move', methods=['POST'])
+@route('/api/move', methods=['POST'])
 def make_move():
     """Выполнение хода"""
-    data = request.json
+    data = request.json or {}
     move = data.get('move')
-    
-    if game is None:
-        create_game()
-    
-    result = game.process_move(move)
-    
-    response = {
-        'success': result['valid_move'],
-        'message': result['message'],
-        'board': game.get_board_string(),
-        'game_over': result['game_over'],
-        'game_won': result.get('game_won', False),
-        'game_lost': result.get('player_destroyed', False),
-        'player_pos': game.player_pos,
-        'interceptors': game.interceptors
-    }
-    
-    return jsonify(response)
+    # Только целое JSON-число: true, 3.9 и "5" не приводятся молча
+    if type(move) is not int:
+        return json_response({'success': False, 'message': 'Invalid move'}, 400)
+
+    state = chase_state()
+    response = state.service.move(data.get('game_id'), move)
+    if response.pop('created', False):
+        state.metrics.games_created.inc()
+    # Учитываются только примененные ходы существующих партий: повтор после
+    # конца партии ("Game is already over") и ходы по чужим id не считаются
+    elif response['success']:
+        state.metrics.record_move(response)
+        if response['game_over']:
+            state.leaderboard.record_response(response)
+    if state.has_viewers(response['game_id']):
+        state.broadcaster.publish(response['game_id'], response)
+    return json_response(response)
 
-@app.route('/api/state', methods=['GET'])
+@route('/api/state', methods=['GET'])
 def get_state():
     """Получение текущего состояния игры"""
-    if game is None:
-        create_game()
-    
-    return jsonify({
-        'board': game.get_board_string(),
-        'game_over': game.game_over,
-        'player_pos': game.player_pos,
-        'move_count': game.move_count
+    return json_response(chase_state().service.state(request.args.get('game_id')))
+
+# Доля SLA подсказки, отдаваемая поиску; остальное - на разбор запроса и ответ
+HINT_SEARCH_SHARE = 0.8
+
+@route('/api/hint', methods=['GET'])
+def get_hint():
+    """Рекомендуемый ход и оценка вероятности выжить (?game_id=...)"""
+    budget = current_app.config['CHASE_HINT_SLA_MS'] * HINT_SEARCH_SHARE / 1000
+    game_id = request.args.get('game_id')
+    hint = chase_state().service.hint(game_id, budget) if is_game_id(game_id) else None
+    if hint is None:
+        return json_response({'success': False, 'message': 'Game not found'}, 404)
+    if hint.get('success') is False:
+        return json_response(hint, 409)
+    return json_response(dict(hint, success=True))
+
+@route('/api/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """Лучшие результаты: общие или по seed (?seed=...&limit=...)"""
+    try:
+        seed = parse_seed(request.args.get('seed'))
+        limit = int(request.args.get('limit', 10))
+    except (TypeError, ValueError):
+        return json_response({'success': False, 'message': 'Invalid seed or limit'}, 400)
+    return json_response({
+        'success': True,
+        'seed': seed,
+        'results': chase_state().leaderboard.top(seed, limit)
     })
 
+@route('/api/spectate/<game_id>', methods=['GET'])
+def spectate(game_id):
+    """
+    Поток событий партии для зрителей (Server-Sent Events). Зритель
+    занимает поток сервера; сверх CHASE_MAX_VIEWERS - 503.
+    """
+    from chase_spectate import TooManyViewers
+
+    state = chase_state()
+    initial = state.service.view(game_id) if is_game_id(game_id) else None
+    if initial is None:
+        return json_response({'success': False, 'message': 'Game not found'}, 404)
+    broadcaster = state.broadcaster
+    try:
+        subscriber = broadcaster.open(game_id, initial)
+    except TooManyViewers:
+        response = json_response({'success': False, 'message': 'Too many viewers'}, 503)
+        response.headers['Retry-After'] = retry_after_header(OVERLOAD_RETRY_AFTER)
+        return response
+    response = Response(
+        broadcaster.events(subscriber),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Генератор, закрытый до первого события, не выполняет finally - место возвращается здесь
+    response.call_on_close(lambda: broadcaster.close(subscriber))
+    return response
+
+@route('/api/replay/<game_id>', methods=['GET'])
+def replay(game_id):
+    """
+    Потоковое воспроизведение партии в NDJSON, по событию на ход.
+    Продолжение с хода k: заголовок "Range: moves=k-" или параметр ?from=k.
+    """
+    from chase_replay import (NDJSON_MIMETYPE, RANGE_UNIT, RangeNotSatisfiable,
+                              ndjson_stream, parse_range)
+
+    history = chase_state().service.history(game_id) if is_game_id(game_id) else None
+    if history is None or history['seed'] is None:
+        return json_response({'success': False, 'message': 'Game not found'}, 404)
+
+    moves = history['moves']
+    total = len(moves)
+    range_header = request.headers.get('Range')
+    if range_header is None and request.args.get('from'):
+        start = request.args['from']
+        # Неверный параметр - ошибка запроса; 416 - только номер хода за концом партии
+        if not (start.isascii() and start.isdigit()):
+            return json_response({'success': False, 'message': 'Invalid from'}, 400)
+        range_header = f"{RANGE_UNIT}={start}-"
+    try:
+        span = parse_range(range_header, total)
+    except RangeNotSatisfiable:
+        response = json_response({'success': False, 'message': 'Range not satisfiable'}, 416)
+        response.headers['Content-Range'] = f'{RANGE_UNIT} */{total}'
+        return response
+
+    start, end = span if span is not None else (0, total)
+    response = Response(ndjson_stream(history['seed'], moves, start, end),
+                        status=206 if span is not None else 200,
+                        mimetype=NDJSON_MIMETYPE)
+    response.headers['Accept-Ranges'] = RANGE_UNIT
+    if span is not None:
+        response.headers['Content-Range'] = f'{RANGE_UNIT} {start}-{end}/{total}'
+    return response
+
+@route('/api/tournament', methods=['POST'])
+def start_tournament():
+    """
+    Турнир бота по набору seed в фоновых процессах.
+    Тело: {"strategy": "lure", "seeds": [1, 2, ...], "max_moves": 200}.
+    Сразу возвращает id задания; прогресс - GET /api/tournament/<id>.
+    """
+    from chase_tournament import TournamentError
+
+    data = request.json or {}
+    try:
+        job_id = chase_state().tournaments.submit(
+            data.get('strategy', 'lure'), data.get('seeds'), data.get('max_moves', 200)
+        )
+    except TournamentError as e:
+        return json_response({'success': False, 'message': str(e)}, 400)
+    response = json_response({
+        'success': True,
+        'job_id': job_id,
+        'status_url': f'/api/tournament/{job_id}'
+    }, 202)
+    response.headers['Location'] = f'/api/tournament/{job_id}'
+    return response
+
+@route('/api/tournament/<job_id>', methods=['GET', 'DELETE'])
+def tournament_status(job_id):
+    """Прогресс и результаты турнира; DELETE отменяет задание"""
+    tournaments = chase_state().tournaments
+    if request.method == 'DELETE':
+        status = tournaments.cancel(job_id)
+    else:
+        status = tournaments.status(job_id)
+    if status is None:
+        return json_response({'success': False, 'message': 'Job not found'}, 404)
+    return json_response(dict(status, success=True))
+
+@route('/api/static', methods=['GET'])
+def get_static():
+    """Инструкции и размеры поля - отдаются один раз и кэшируются клиентом"""
+    body, etag = chase_state().static_payload
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response.make_conditional(request)
+
+@route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Метрики в текстовом формате Prometheus"""
+    state = chase_state()
+    state.metrics.update_sessions(state.service.stats())
+    if state.backpressure is not None:
+        state.metrics.update_backpressure(state.backpressure.active, state.backpressure.waiting)
+    return Response(state.metrics.render(), content_type=ChaseMetrics.CONTENT_TYPE)
+
+def create_app(config=None):
+    """
+    Создание приложения
+
+    Args:
+        config: Настройки поверх default_config() (ключи CHASE_*)
+                и обычные настройки Flask
+    """
+    app = Flask(__name__, template_folder=TEMPLATE_FOLDER)
+    app.config.update(default_config())
+    if config:
+        app.config.update(config)
+
+    app.extensions['chase'] = ChaseState(app.config)
+    app.before_request(start_timer)
+    app.before_request(admit_request)
+    app.after_request(record_request)
+    app.teardown_request(release_request)
+    for rule, view, options in _ROUTES:
+        app.add_url_rule(rule, view_func=view, **options)
+
+    if app.config['CHASE_WARM_UP']:
+        warm_up(app)
+    return app
+
+_app_lock = threading.Lock()
+
+def __getattr__(name):
+    """Приложение по умолчанию (chase_web.app) создается при первом обращении"""
+    if name == 'app':
+        with _app_lock:
+            if 'app' not in globals():
+                globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def run_dev_server():
+    """
+    Отладочный сервер (python chase_web.py). Перезагрузчик Flask запускает
+    модуль дважды - в следящем процессе и в обслуживающем (WERKZEUG_RUN_MAIN);
+    прогрев и создание сервисов выполняются только в обслуживающем.
+    """
+    app = create_app({'CHASE_WARM_UP': False})
+    # При шардировании перезагрузчик Flask запустил бы второй набор воркеров
+    use_reloader = app.config['CHASE_WORKERS'] == 1
+    if not use_reloader or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warm_up(app)
+    app.run(debug=True, port=5000, use_reloader=use_reloader)
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    if sys.platform == "win32":
+        # UTF-8 для журнала в консоли Windows (вместо запуска chcp 65001)
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    run_dev_server()
@@ -2,27 +2,188 @@
 """
 Генератор эталонных логов для игры Chase
 Генерирует логи, соответствующие оригинальной BASIC версии
+
+Сценарии генерируются и проверяются в пуле процессов (--jobs); у каждого
+сценария свой генератор случайных чисел с его seed, поэтому лог не зависит
+ни от порядка сценариев, ни от процесса, в котором он получен. Кроме
+встроенных сценариев можно загрузить свои из файла JSON Lines (--scenarios).
+С --store логи пишутся в хранилище с адресацией по содержимому
+(chase_golden.py), и проверка сравнивает хеши вместо файлов.
 """
 
+import argparse
+import json
 import os
 import sys
 import random
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional, Tuple
 
 # Добавляем путь к модулям игры
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from chase_core import ChaseGame
+from chase_golden import GoldenStore
+from chase_logsink import is_safe_log_name
 from chase_terminal import ChaseTerminal
 
 
+def normalize_log(log_lines: List[str]) -> List[str]:
+    """
+    Нормализация лога для сравнения
+    - Удаление лишних пробелов
+    - Стандартизация переносов строк
+    """
+    normalized = []
+    for line in log_lines:
+        # Убираем пробелы в конце строки
+        line = line.rstrip()
+        # Заменяем множественные пробелы на один
+        line = ' '.join(line.split())
+        # Пропускаем полностью пустые строки (но сохраняем структуру)
+        if line or len(normalized) == 0 or normalized[-1] != "":
+            normalized.append(line)
+    return normalized
+
+
+def run_scenario(scenario: Dict[str, Any]) -> List[str]:
+    """
+    Нормализованный лог сценария. Партия получает собственный генератор
+    с seed сценария и не трогает глобальный random (тот же лог, что
+    ChaseTerminal(seed) в отдельном процессе)
+    """
+    terminal = ChaseTerminal(seed=scenario['seed'], log_output=True, quiet=True,
+                             rng=random.Random(scenario['seed']))
+    return normalize_log(terminal.run_with_inputs(scenario['inputs']))
+
+
+def generate_job(job: Tuple[Dict[str, Any], str, Optional[str]]) -> Dict[str, Any]:
+    """
+    Генерация и сохранение лога одного сценария; вызывается в процессе пула.
+    С хранилищем (store_root) лог кладется в него, а хеш возвращается
+    в 'digest' - манифест пишет вызывающий процесс.
+    """
+    scenario, output_dir, store_root = job
+    result: Dict[str, Any] = {'name': scenario['name'], 'lines': 0, 'missing': [], 'error': None}
+    try:
+        normalized_log = run_scenario(scenario)
+        if store_root:
+            result['digest'] = GoldenStore(store_root).put(normalized_log)
+        else:
+            output_file = Path(output_dir) / f"{scenario['name']}.log"
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(''.join(line + '\n' for line in normalized_log))
+        log_text = '\n'.join(normalized_log)
+        result['lines'] = len(normalized_log)
+        result['missing'] = [expected for expected in scenario.get('expected_lines', [])
+                             if expected not in log_text]
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def verify_job(job: Tuple[Dict[str, Any], str]) -> Dict[str, Any]:
+    """Сравнение нового лога сценария с эталоном; вызывается в процессе пула"""
+    scenario, golden_dir = job
+    golden_file = Path(golden_dir) / f"{scenario['name']}.log"
+    if not golden_file.exists():
+        return {'name': scenario['name'], 'passed': False,
+                'message': f"Эталон не найден: {golden_file.name}"}
+    try:
+        lines = run_scenario(scenario)
+    except Exception as e:
+        return {'name': scenario['name'], 'passed': False, 'message': f"Ошибка: {e}"}
+    with open(golden_file, 'r', encoding='utf-8') as f:
+        golden = [line.rstrip() for line in f]
+    for i, (expected, actual) in enumerate(zip(golden, lines)):
+        if expected != actual:
+            return {'name': scenario['name'], 'passed': False,
+                    'message': f"Различие в строке {i+1}:\n  Эталон: {expected}\n  Получено: {actual}"}
+    if len(golden) != len(lines):
+        return {'name': scenario['name'], 'passed': False,
+                'message': f"Разная длина: {len(golden)} vs {len(lines)}"}
+    return {'name': scenario['name'], 'passed': True, 'message': "Логи идентичны"}
+
+
+def verify_store_job(job: Tuple[Dict[str, Any], str, Optional[str]]) -> Dict[str, Any]:
+    """Сравнение с эталоном из хранилища по хешу (expected - хеш из манифеста)"""
+    scenario, store_root, expected = job
+    if expected is None:
+        return {'name': scenario['name'], 'passed': False, 'message': "Эталон не найден в манифесте"}
+    try:
+        lines = run_scenario(scenario)
+    except Exception as e:
+        return {'name': scenario['name'], 'passed': False, 'message': f"Ошибка: {e}"}
+    passed, message = GoldenStore(store_root).check(expected, lines)
+    return {'name': scenario['name'], 'passed': passed, 'message': message}
+
+
+def map_scenarios(function: Callable[[Any], Dict[str, Any]], jobs_list: List[Any],
+                  jobs: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Результаты function по заданиям в порядке заданий.
+    jobs=1 - в текущем процессе, иначе в пуле из jobs процессов.
+    """
+    if jobs == 1 or len(jobs_list) <= 1:
+        yield from map(function, jobs_list)
+        return
+    workers = jobs or os.cpu_count() or 1
+    # Крупные пачки на большом числе сценариев, но не меньше 4 пачек на процесс
+    chunk_size = max(1, min(64, len(jobs_list) // (workers * 4)))
+    with ProcessPoolExecutor(workers) as executor:
+        yield from executor.map(function, jobs_list, chunksize=chunk_size)
+
+
+def load_scenarios(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Сценарии из JSON Lines, по сценарию на строку:
+        {"name": "s1", "seed": 42, "inputs": ["8", "-1", "N"], "expected_lines": ["GIVE UP, EH."]}
+    inputs - список или строка через пробел; description и expected_lines необязательны
+    """
+    scenarios = []
+    names = set()
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        name = str(record.get('name', ''))
+        if not is_safe_log_name(name):
+            raise ValueError(f"line {number}: bad scenario name {name!r}")
+        if name in names:
+            raise ValueError(f"line {number}: duplicate scenario name {name!r}")
+        if type(record.get('seed')) is not int:
+            raise ValueError(f"line {number}: seed must be an integer")
+        inputs = record.get('inputs', [])
+        if isinstance(inputs, str):
+            inputs = inputs.split()
+        names.add(name)
+        scenarios.append({
+            "name": name,
+            "description": record.get('description', ''),
+            "inputs": [str(item) for item in inputs],
+            "seed": record['seed'],
+            "expected_lines": list(record.get('expected_lines', [])),
+        })
+    return scenarios
+
+
 class GoldenMasterGenerator:
     """Генератор эталонных логов"""
     
-    def __init__(self, output_dir: str = "test_data/golden_master"):
+    def __init__(self, output_dir: str = "test_data/golden_master", jobs: Optional[int] = None,
+                 verbose: bool = True, store_dir: Optional[str] = None):
+        """
+        Args:
+            output_dir: Каталог логов
+            jobs: Процессы для генерации и проверки (1 - без пула, None - по числу ядер)
+            verbose: Печатать подробности по каждому сценарию (иначе только сводку)
+            store_dir: Хранилище с адресацией по содержимому вместо файла на сценарий
+        """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.jobs = jobs
+        self.verbose = verbose
+        self.store = GoldenStore(store_dir) if store_dir else None
         
         # Тестовые сценарии
         self.scenarios = [
@@ -85,63 +246,41 @@ class GoldenMasterGenerator:
         ]
     
     def normalize_log(self, log_lines: List[str]) -> List[str]:
-        """
-        Нормализация лога для сравнения
-        - Удаление лишних пробелов
-        - Стандартизация переносов строк
-        """
-        normalized = []
-        for line in log_lines:
-            # Убираем пробелы в конце строки
-            line = line.rstrip()
-            # Заменяем множественные пробелы на один
-            line = ' '.join(line.split())
-            # Пропускаем полностью пустые строки (но сохраняем структуру)
-            if line or len(normalized) == 0 or normalized[-1] != "":
-                normalized.append(line)
-        return normalized
+        """Нормализация лога для сравнения (см. normalize_log)"""
+        return normalize_log(log_lines)
+    
+    def report_scenario(self, scenario: Dict[str, Any], result: Dict[str, Any]) -> bool:
+        """Вывод итогов сценария; True - лог сохранен и все ожидаемые строки найдены"""
+        if self.verbose:
+            print(f"\nГенерация сценария: {scenario['name']}")
+            print(f"Описание: {scenario['description']}")
+            print(f"Входные данные: {scenario['inputs']}")
+        if result['error'] is not None:
+            print(f"  ОШИБКА ({scenario['name']}): {result['error']}")
+            return False
+        for expected in result['missing']:
+            print(f"  ВНИМАНИЕ ({scenario['name']}): Ожидаемая строка не найдена: '{expected}'")
+        if self.verbose and 'digest' in result:
+            print(f"  Успешно сохранен: {self.store.object_path(result['digest'])}")
+        elif self.verbose:
+            print(f"  Успешно сохранен: {self.output_dir / (scenario['name'] + '.log')}")
+            print(f"  Количество строк: {result['lines']}")
+        return not result['missing']
     
     def generate_scenario(self, scenario: Dict[str, Any]) -> bool:
         """Генерация лога для одного сценария"""
-        print(f"\nГенерация сценария: {scenario['name']}")
-        print(f"Описание: {scenario['description']}")
-        print(f"Входные данные: {scenario['inputs']}")
-        
-        try:
-            # Создаем терминал с фиксированным seed
-            terminal = ChaseTerminal(seed=scenario['seed'], log_output=True)
-            
-            # Запускаем игру с заданными вводами
-            log_lines = terminal.run_with_inputs(scenario['inputs'])
-            
-            # Нормализуем лог
-            normalized_log = self.normalize_log(log_lines)
-            
-            # Сохраняем лог
-            output_file = self.output_dir / f"{scenario['name']}.log"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                for line in normalized_log:
-                    f.write(line + '\n')
-            
-            # Проверяем ожидаемые строки
-            log_text = '\n'.join(normalized_log)
-            all_found = True
-            for expected in scenario['expected_lines']:
-                if expected not in log_text:
-                    print(f"  ВНИМАНИЕ: Ожидаемая строка не найдена: '{expected}'")
-                    all_found = False
-            
-            print(f"  Успешно сохранен: {output_file}")
-            print(f"  Количество строк: {len(normalized_log)}")
-            
-            return all_found
-            
-        except Exception as e:
-            print(f"  ОШИБКА: {e}")
-            return False
+        result = generate_job((scenario, str(self.output_dir), self.store_root))
+        if 'digest' in result:
+            self.store.manifest[scenario['name']] = result['digest']
+            self.store.save()
+        return self.report_scenario(scenario, result)
+    
+    @property
+    def store_root(self) -> Optional[str]:
+        return self.store.root if self.store is not None else None
     
     def generate_all(self) -> Dict[str, bool]:
-        """Генерация всех сценариев"""
+        """Генерация всех сценариев (в пуле процессов, итоги - в порядке сценариев)"""
         print("=" * 60)
         print("Генерация эталонных логов Golden Master")
         print("=" * 60)
@@ -149,8 +288,11 @@ class GoldenMasterGenerator:
         results = {}
         successful = 0
         
-        for scenario in self.scenarios:
-            success = self.generate_scenario(scenario)
+        jobs_list = [(scenario, str(self.output_dir), self.store_root) for scenario in self.scenarios]
+        for scenario, result in zip(self.scenarios, map_scenarios(generate_job, jobs_list, self.jobs)):
+            if 'digest' in result:
+                self.store.manifest[scenario['name']] = result['digest']
+            success = self.report_scenario(scenario, result)
             results[scenario['name']] = success
             if success:
                 successful += 1
@@ -162,13 +304,51 @@ class GoldenMasterGenerator:
         print(f"Всего сценариев: {len(self.scenarios)}")
         print(f"Успешно: {successful}")
         print(f"С ошибками: {len(self.scenarios) - successful}")
+        if self.store is not None:
+            # Манифест - ровно текущий набор сценариев; логи удаленных сценариев
+            # и прежние версии логов больше не нужны
+            current = {scenario['name'] for scenario in self.scenarios}
+            for name in [name for name in self.store.manifest if name not in current]:
+                del self.store.manifest[name]
+            self.store.save()
+            pruned = self.store.prune()
+            stats = self.store.stats()
+            print(f"Хранилище: {stats['scenarios']} сценариев, {stats['objects']} разных логов, "
+                  f"{stats['bytes']} байт; удалено устаревших логов: {pruned}")
         
-        for name, success in results.items():
-            status = "✓ УСПЕХ" if success else "✗ ОШИБКА"
-            print(f"  {name}: {status}")
+        if self.verbose:
+            for name, success in results.items():
+                status = "✓ УСПЕХ" if success else "✗ ОШИБКА"
+                print(f"  {name}: {status}")
         
         return results
     
+    def verify_all(self, golden_dir: Optional[str] = None) -> Dict[str, bool]:
+        """
+        Проверка: логи всех сценариев генерируются заново (в пуле процессов)
+        и сравниваются с эталонами в golden_dir (по умолчанию - output_dir).
+        С хранилищем сравниваются хеши из манифеста, diff - только при несовпадении.
+        """
+        if self.store is not None and golden_dir is None:
+            manifest = self.store.manifest
+            function = verify_store_job
+            jobs_list = [(scenario, self.store.root, manifest.get(scenario['name']))
+                         for scenario in self.scenarios]
+        else:
+            function = verify_job
+            golden_dir = str(golden_dir or self.output_dir)
+            jobs_list = [(scenario, golden_dir) for scenario in self.scenarios]
+        results = {}
+        for result in map_scenarios(function, jobs_list, self.jobs):
+            results[result['name']] = result['passed']
+            if not result['passed']:
+                print(f"  ✗ {result['name']}: {result['message']}")
+            elif self.verbose:
+                print(f"  ✓ {result['name']}: {result['message']}")
+        failed = sum(1 for passed in results.values() if not passed)
+        print(f"Проверено сценариев: {len(results)}, с различиями: {failed}")
+        return results
+    
     def create_verification_script(self):
         """Создание скрипта для верификации логов"""
         script_content = '''#!/usr/bin/env python3
@@ -271,12 +451,32 @@ if __name__ == "__main__":
                 for inp in scenario['inputs']:
                     f.write(inp + '\n')
             
-            print(f"Файл входных данных создан: {input_file}")
+            if self.verbose:
+                print(f"Файл входных данных создан: {input_file}")
 
 
-def main():
+def main(argv: Optional[List[str]] = None) -> int:
     """Основная функция"""
-    generator = GoldenMasterGenerator()
+    parser = argparse.ArgumentParser(description='Chase golden master generator')
+    parser.add_argument('--jobs', type=int, help='Worker processes (1 = no pool, default: CPU count)')
+    parser.add_argument('--scenarios', help='JSON Lines file of scenarios instead of the built-in ones')
+    parser.add_argument('--output-dir', default='test_data/golden_master', help='Directory for logs')
+    parser.add_argument('--verify', action='store_true',
+                        help='Regenerate all scenarios and compare with the logs in --output-dir')
+    parser.add_argument('--quiet', action='store_true', help='Print only the summary and problems')
+    parser.add_argument('--store', help='Content-addressed log store with a manifest '
+                                        'instead of one .log file per scenario')
+    args = parser.parse_args(argv)
+    
+    generator = GoldenMasterGenerator(args.output_dir, jobs=args.jobs, verbose=not args.quiet,
+                                      store_dir=args.store)
+    if args.scenarios:
+        with open(args.scenarios, encoding='utf-8') as f:
+            generator.scenarios = load_scenarios(f)
+    
+    if args.verify:
+        results = generator.verify_all()
+        return 0 if all(results.values()) else 1
     
     # Генерируем все логи
     results = generator.generate_all()
@@ -306,8 +506,41 @@ def main():
 7. **same_setup_restart** - Перезапуск с той же расстановкой
 8. **new_game_restart** - Перезапуск с новой расстановкой
 
+Свои сценарии - файл JSON Lines, по строке на сценарий:
+`{"name": "s1", "seed": 42, "inputs": ["8", "-1", "N"], "expected_lines": ["GIVE UP, EH."]}`
+
 ## Использование
 
 1. Генерация эталонных логов:
    ```bash
-   python generate_golden_master.py
\ No newline at end of file
+   python generate_golden_master.py --jobs 8
+   python generate_golden_master.py --scenarios scenarios.jsonl --quiet
+   ```
+
+2. Проверка текущей версии по эталонам (сценарии генерируются заново в пуле процессов):
+   ```bash
+   python generate_golden_master.py --verify
+   ```
+
+3. Хранилище с адресацией по содержимому: одинаковые логи хранятся один раз,
+   `manifest.json` сопоставляет сценарию хеш лога, проверка сравнивает хеши:
+   ```bash
+   python generate_golden_master.py --scenarios scenarios.jsonl --store test_data/golden_store
+   python generate_golden_master.py --scenarios scenarios.jsonl --store test_data/golden_store --verify
+   ```
+
+4. Сравнение каталогов `golden_master/` и `generated/`:
+   ```bash
+   python test_data/verify_logs.py
+   ```
+"""
+    readme_file = generator.output_dir.parent / "README.md"
+    with open(readme_file, 'w', encoding='utf-8') as f:
+        f.write(readme_content)
+    print(f"README создан: {readme_file}")
+    
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
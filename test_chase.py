@@ -7,6 +7,7 @@ import unittest
 import os
 import sys
 import tempfile
+import json
 import subprocess
 from pathlib import Path
 from typing import List, Tuple, Dict, Any
@@ -433,6 +434,26 @@ class TestChaseTerminal(unittest.TestCase):
         self.assertIn("GIVE UP, EH.", log_text)
         self.assertIn("ANOTHER GAME", log_text)
     
+    def test_scripted_input_from_iterator(self):
+        """Ввод из файла или генератора дает тот же лог, что и из списка"""
+        import io
+        inputs = ["8", "6", "-1", "N"]
+        expected = ChaseTerminal(seed=42).run_with_inputs(inputs)
+        from_file = ChaseTerminal(seed=42).run_with_inputs(io.StringIO("8\n6\n-1\nN\n"))
+        from_generator = ChaseTerminal(seed=42).run_with_inputs(line for line in inputs)
+        self.assertEqual(from_file, expected)
+        self.assertEqual(from_generator, expected)
+
+    def test_scripted_input_is_lazy(self):
+        """Ввод читается по мере надобности: бесконечный сценарий не мешает"""
+        import itertools
+        consumed = []
+        script = itertools.chain(["-1", "N"], itertools.repeat("8"))
+        log = ChaseTerminal(seed=42).run_with_inputs(
+            consumed.append(line) or line for line in script)
+        self.assertEqual(consumed, ["-1", "N"])
+        self.assertIn("GIVE UP, EH.", log)
+
     def test_game_flow_random_jump(self):
         """Тест потока игры со случайным прыжком"""
         test_inputs = ["0", "-1", "N"]
@@ -446,6 +467,411 @@ class TestChaseTerminal(unittest.TestCase):
         self.assertIn("ANOTHER GAME", log_text)
 
 
+class TestLogSinks(unittest.TestCase):
+    """Тесты приемников лога (chase_logsink.py)"""
+
+    INPUTS = ["8", "6", "-1", "N"]
+
+    def test_file_sink_matches_list(self):
+        """Файловый приемник пишет тот же лог, не держа его в памяти"""
+        from chase_logsink import BufferedFileSink
+        expected = ChaseTerminal(seed=42).run_with_inputs(self.INPUTS)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'game.log')
+            with BufferedFileSink(path, batch_size=4) as sink:
+                returned = ChaseTerminal(seed=42).run_with_inputs(self.INPUTS, log_sink=sink)
+            self.assertEqual(returned, [])
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(f.read(), '\n'.join(expected) + '\n')
+
+    def test_ring_buffer_keeps_tail(self):
+        from chase_logsink import RingBufferSink
+        expected = ChaseTerminal(seed=42).run_with_inputs(self.INPUTS)
+        tail = ChaseTerminal(seed=42).run_with_inputs(self.INPUTS, log_sink=RingBufferSink(5))
+        self.assertEqual(tail, expected[-5:])
+
+    def test_batched_writes(self):
+        """Поток получает строки пачками, а не по одной"""
+        import io
+        from chase_logsink import BufferedFileSink
+
+        class CountingStream(io.StringIO):
+            writes = 0
+
+            def write(self, data):
+                CountingStream.writes += 1
+                return super().write(data)
+
+        stream = CountingStream()
+        sink = BufferedFileSink(stream, batch_size=10)
+        for index in range(25):
+            sink.write(str(index))
+        self.assertEqual(CountingStream.writes, 2)
+        sink.close()
+        self.assertEqual(stream.getvalue().split(), [str(i) for i in range(25)])
+
+    def test_rotation(self):
+        from chase_logsink import RotatingFileSink
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'game.log')
+            with RotatingFileSink(path, max_bytes=100, backup_count=2, batch_size=5) as sink:
+                for index in range(200):
+                    sink.write(f'line {index:04d}')
+            files = sorted(os.listdir(tmp))
+            self.assertEqual(files, ['game.log', 'game.log.1', 'game.log.2'])
+            with open(path, encoding='utf-8') as f:
+                self.assertTrue(f.read().endswith('line 0199\n'))
+            self.assertTrue(all(os.path.getsize(os.path.join(tmp, name)) < 200 for name in files))
+
+
+class TestBatch(unittest.TestCase):
+    """Тесты пакетного прогона (chase_batch.py)"""
+
+    SCRIPT = "\n".join([
+        '{"id": "surrender", "seed": 42, "inputs": ["-1", "N"]}',
+        '{"seed": 1, "inputs": "4 4 4"}',
+        '{"seed": 7, "inputs": ["8"]}',
+        '',
+        'not json',
+    ]) + "\n"
+
+    def run_batch(self, jobs, log_dir=None):
+        import io
+        from chase_batch import run_batch
+        output = io.StringIO()
+        counts = run_batch(io.StringIO(self.SCRIPT), output, jobs=jobs, log_dir=log_dir)
+        return counts, [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_summaries(self):
+        counts, summaries = self.run_batch(jobs=1)
+        self.assertEqual([s.get('outcome') for s in summaries],
+                         ['gave_up', 'lost', 'interrupted', None])
+        self.assertEqual(summaries[0]['id'], 'surrender')
+        self.assertEqual(summaries[1]['moves'], 3)
+        self.assertEqual(summaries[3]['line'], 5)
+        self.assertIn('error', summaries[3])
+        self.assertEqual(counts, {'gave_up': 1, 'lost': 1, 'interrupted': 1, 'error': 1})
+
+    def test_process_pool_matches_in_process(self):
+        """Итоги в пуле процессов те же и в том же порядке"""
+        self.assertEqual(self.run_batch(jobs=2), self.run_batch(jobs=1))
+
+    def test_logs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            _, summaries = self.run_batch(jobs=1, log_dir=tmp)
+            with open(os.path.join(tmp, summaries[0]['log']), encoding='utf-8') as f:
+                log = f.read()
+        self.assertEqual(summaries[0]['log'], 'surrender.log')
+        expected = ChaseTerminal(seed=42).run_with_inputs(["-1", "N"])
+        self.assertEqual(log, "\n".join(expected) + "\n")
+
+    def test_log_open_error_is_per_game(self):
+        """Неоткрываемый лог дает ошибку в итогах своей партии, прогон продолжается"""
+        with tempfile.TemporaryDirectory() as tmp:
+            os.mkdir(os.path.join(tmp, 'surrender.log'))
+            counts, summaries = self.run_batch(jobs=1, log_dir=tmp)
+        self.assertEqual(len(summaries), 4)
+        self.assertIn('cannot open log', summaries[0]['error'])
+        self.assertNotIn('outcome', summaries[0])
+        self.assertEqual(summaries[1]['outcome'], 'lost')
+        self.assertEqual(counts, {'error': 2, 'lost': 1, 'interrupted': 1})
+
+    def test_rerun_replaces_logs(self):
+        """Повторный прогон заменяет лог партии, а не дописывает вторую"""
+        with tempfile.TemporaryDirectory() as tmp:
+            self.run_batch(jobs=1, log_dir=tmp)
+            _, summaries = self.run_batch(jobs=1, log_dir=tmp)
+            with open(os.path.join(tmp, summaries[0]['log']), encoding='utf-8') as f:
+                log = f.read()
+        expected = ChaseTerminal(seed=42).run_with_inputs(["-1", "N"])
+        self.assertEqual(log, "\n".join(expected) + "\n")
+
+
+class TestRealtime(unittest.TestCase):
+    """Тесты режима реального времени (ChaseGame.tick, chase_realtime.py)"""
+
+    def test_tick_moves_only_interceptors(self):
+        game = ChaseGame(seed=42)
+        player, interceptors = game.player_pos, list(game.interceptors)
+        game.tick()
+        self.assertEqual(game.player_pos, player)
+        self.assertNotEqual(game.interceptors, interceptors)
+        self.assertEqual(game.move_count, 0)
+
+    def test_player_only_move(self):
+        game = ChaseGame(seed=42)
+        interceptors = list(game.interceptors)
+        game.process_move(6, advance_interceptors=False)
+        self.assertEqual(game.interceptors, interceptors)
+        self.assertEqual(game.player_pos, (2, 3))
+
+    def test_history_replays_ticks(self):
+        """История с тактами, ходами без перехватчиков и неверными ходами воспроизводится"""
+        game = ChaseGame(seed=42)
+        game.process_move(6, advance_interceptors=False)
+        game.tick()
+        game.process_move(99)
+        game.process_move(3)
+        game.tick()
+        replayed = ChaseGame(seed=42)
+        for code in game.move_history:
+            replayed.replay_move(code)
+        self.assertEqual(replayed.get_board_string(), game.get_board_string())
+        self.assertEqual(replayed.move_count, game.move_count)
+
+    def test_play_realtime(self):
+        """Такты идут и без ввода; клавиши действуют сразу"""
+        import io
+        from chase_realtime import play_realtime
+        now = [0.0]
+
+        class FakeKeyboard:
+            keys = ['6', None, None, 'x', None, 'q']
+
+            def read(self, timeout):
+                key = self.keys.pop(0)
+                if key is None:
+                    now[0] += timeout
+                return key
+
+        game = play_realtime(ChaseGame(seed=42), FakeKeyboard(), io.StringIO(),
+                             tick=1.0, clock=lambda: now[0])
+        self.assertTrue(game.give_up)
+        self.assertEqual(game.move_history.count(11), 3)
+        self.assertEqual(game.move_count, 2)
+
+
+class TestTelnetServer(unittest.TestCase):
+    """Тесты сетевого сервера (chase_telnet.py)"""
+
+    def test_parse_move(self):
+        from chase_terminal import parse_move
+        self.assertEqual(parse_move(" 8 "), (8, None))
+        self.assertEqual(parse_move(""), (None, None))
+        self.assertEqual(parse_move("x"), (None, "Please enter a number"))
+        self.assertIn("Invalid move: 11", parse_move("11")[1])
+
+    def test_strip_telnet(self):
+        from chase_telnet import strip_telnet
+        self.assertEqual(strip_telnet(b'\xff\xfb\x018\r\n'), b'8\r\n')
+        self.assertEqual(strip_telnet(b'\xff\xfa\x18\x00xterm\xff\xf06'), b'6')
+
+    def test_local_only_by_default(self):
+        """--serve без --host слушает только 127.0.0.1; HTTP-нагрузочник не загружается"""
+        from unittest import mock
+        with mock.patch('chase_telnet.run_server') as run_server:
+            from chase_terminal import main
+            self.assertEqual(main(["--serve=0"]), 0)
+        run_server.assert_called_once_with(0, '127.0.0.1', None)
+        code = "import sys, chase_telnet; print('chase_load' in sys.modules)"
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        self.assertEqual(result.stdout.strip(), 'False')
+
+    def test_many_sessions(self):
+        """Сотни одновременных сеансов в одном цикле, поле как в терминале"""
+        import asyncio
+        from chase_telnet import ChaseServer, run_clients
+
+        async def scenario():
+            server = ChaseServer(port=0, seed=42)
+            port = await server.start()
+            report = await run_clients('127.0.0.1', port, clients=200, moves=['5', 'x', '5'])
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'-1\r\nN\r\n')
+            transcript = (await reader.read()).decode()
+            writer.close()
+            await server.stop()
+            return report, transcript, server
+
+        report, transcript, server = asyncio.run(scenario())
+        self.assertEqual((report['completed'], report['errors']), (200, 0))
+        self.assertEqual(server.served, 201)
+        self.assertEqual(server.sessions, 0)
+        board = ChaseGame(seed=42).get_board_string()
+        self.assertIn(board.replace('\n', '\r\n'), transcript)
+        self.assertIn("GIVE UP", transcript)
+
+    def test_server_full(self):
+        import asyncio
+        from chase_telnet import ChaseServer
+
+        async def scenario():
+            server = ChaseServer(port=0, max_sessions=0)
+            port = await server.start()
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            data = await reader.read()
+            writer.close()
+            await server.stop()
+            return data
+
+        self.assertIn(b"Server is full", asyncio.run(scenario()))
+
+
+class FakeScreen:
+    """Замена окна curses: запоминает вывод"""
+
+    def __init__(self):
+        self.writes = []
+        self.refreshes = 0
+
+    def addstr(self, row, col, text):
+        self.writes.append((row, col, text))
+
+    def move(self, row, col):
+        pass
+
+    def clrtoeol(self):
+        pass
+
+    def refresh(self):
+        self.refreshes += 1
+
+
+class TestCursesRenderer(unittest.TestCase):
+    """Тесты инкрементальной отрисовки (chase_curses.py)"""
+
+    def test_only_changed_cells_redrawn(self):
+        """После хода перерисовываются только клетки игрока и перехватчиков"""
+        from chase_curses import BOARD_TOP, CursesRenderer
+        game = ChaseGame(seed=42)
+        screen = FakeScreen()
+        renderer = CursesRenderer(screen)
+        renderer.draw_frame(game)
+        screen.writes.clear()
+        before = game.get_board_string()
+        game.process_move(5)
+        renderer.update(game)
+        after = game.get_board_string().split('\n')
+        self.assertEqual(
+            sorted(screen.writes),
+            sorted((BOARD_TOP + row, col, after[row][col])
+                   for row, line in enumerate(before.split('\n'))
+                   for col, cell in enumerate(line) if cell != after[row][col])
+        )
+        self.assertTrue(all(len(text) == 1 for _, _, text in screen.writes))
+
+    def test_message_redrawn_on_change(self):
+        from chase_curses import CursesRenderer
+        game = ChaseGame(seed=42)
+        screen = FakeScreen()
+        renderer = CursesRenderer(screen)
+        renderer.draw_frame(game)
+        renderer.show_message("HIGH VOLTAGE!!!!!!!!!!\n***** ZAP *****  YOU'RE DEAD!!!")
+        screen.writes.clear()
+        renderer.show_message("HIGH VOLTAGE!!!!!!!!!!\n***** ZAP *****  YOU'RE DEAD!!!")
+        self.assertEqual(screen.writes, [])
+
+    def test_terminal_renderers_skip_web_modules(self):
+        """curses- и ANSI-отрисовка не загружают модуль веб-трансляции"""
+        code = ("import sys, chase_curses, chase_ansi; "
+                "print('chase_spectate' in sys.modules, 'asyncio' in sys.modules)")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        self.assertEqual(result.stdout.split(), ['False', 'False'])
+
+    def test_clear_screen_without_subprocess(self):
+        """Очистка экрана - ANSI-последовательность, а не clear/cls"""
+        import io
+        from unittest import mock
+        terminal = ChaseTerminal(seed=42)
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout, \
+                mock.patch('os.system') as system:
+            terminal.clear_screen()
+        system.assert_not_called()
+        self.assertEqual(stdout.getvalue(), "\033[2J\033[H")
+
+    def test_clear_screen_legacy_windows_console(self):
+        """Консоль без поддержки ANSI очищается через cls, а не мусором"""
+        import io
+        from unittest import mock
+        terminal = ChaseTerminal(seed=42)
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout, \
+                mock.patch('chase_terminal.enable_vt_mode', return_value=False), \
+                mock.patch('os.system') as system:
+            terminal.clear_screen()
+        system.assert_called_once_with('cls')
+        self.assertEqual(stdout.getvalue(), "")
+
+
+def apply_ansi(screen, cursor, data):
+    """Минимальный эмулятор терминала для последовательностей chase_ansi"""
+    import re
+    row, col = cursor
+    for match in re.finditer(r'\033\[(\d*)(?:;(\d+))?([ABCDHJ])|(.)', data, re.S):
+        arg, arg2, code, char = match.groups()
+        if char == '\r':
+            col = 0
+        elif char == '\n':
+            row += 1
+        elif char == '\b':
+            col -= 1
+        elif char is not None:
+            screen.setdefault(row, {})[col] = char
+            col += 1
+        elif code == 'J':
+            screen.clear()
+        elif code == 'H':
+            row, col = (int(arg) - 1, int(arg2) - 1) if arg else (0, 0)
+        else:
+            count = int(arg or 1)
+            row += {'A': -count, 'B': count}.get(code, 0)
+            col += {'C': count, 'D': -count}.get(code, 0)
+    return row, col
+
+
+def screen_text(screen, rows, cols):
+    return '\n'.join(''.join(screen.get(r, {}).get(c, ' ') for c in range(cols))
+                     for r in range(rows))
+
+
+class TestAnsiStream(unittest.TestCase):
+    """Тесты потока ANSI-изменений и записи asciicast (chase_ansi.py)"""
+
+    def test_stream_reproduces_frames(self):
+        """Экран после применения потока совпадает с каждым кадром поля"""
+        from chase_ansi import AnsiDiffRenderer
+        from chase_pool import build_game
+        game = build_game(7)
+        renderer = AnsiDiffRenderer()
+        screen, cursor = {}, (0, 0)
+        for move in [8, 6, 3, 2, 4, 9, 1, 7, 0, 6, 6, 2]:
+            cursor = apply_ansi(screen, cursor, renderer.render(game.get_board_string()))
+            self.assertEqual(screen_text(screen, game.rows, game.cols), game.get_board_string())
+            if game.game_over:
+                break
+            game.process_move(move)
+
+    def test_cursor_move_is_short(self):
+        from chase_ansi import cursor_move
+        self.assertEqual(cursor_move(3, 5, 3, 4), '\b')
+        self.assertEqual(cursor_move(3, 5, 4, 5), '\033[B')
+        self.assertEqual(cursor_move(0, 0, 8, 15), '\033[9;16H')
+
+    def test_record_and_play(self):
+        """Запись воспроизводится с любой скоростью; изменения в разы короче кадров"""
+        import io
+        from chase_ansi import play_cast, record_game
+        cast = io.StringIO()
+        # Сдача (-1) поле не меняет - события для нее нет
+        streamed, full = record_game(42, [8, 6, 4, 2, -1], cast, interval=0.5)
+        self.assertLess(streamed * 3, full)
+        delays = []
+        for speed, expected in ((2.0, [0.25] * 4), (0, [])):
+            cast.seek(0)
+            delays.clear()
+            output = io.StringIO()
+            self.assertEqual(play_cast(cast, output, speed, sleep=delays.append), 5)
+            self.assertEqual(delays, expected)
+        screen = {}
+        apply_ansi(screen, (0, 0), output.getvalue())
+        game = ChaseGame(seed=42)
+        for move in [8, 6, 4, 2, -1]:
+            if not game.game_over:
+                game.process_move(move)
+        self.assertEqual(screen_text(screen, game.rows, game.cols), game.get_board_string())
+
+
 class TestIntegration(unittest.TestCase):
     """Интеграционные тесты - сравнение с эталонными логами"""
     
@@ -582,46 +1008,265 @@ class TestIntegration(unittest.TestCase):
                 # self.assertEqual(ref_filtered, new_filtered)
 
 
+class TestGoldenMaster(unittest.TestCase):
+    """Тесты генератора эталонных логов (generate_golden_master.py)"""
+
+    def generate(self, jobs, scenarios=None):
+        import contextlib
+        import io
+        from generate_golden_master import GoldenMasterGenerator
+        import shutil
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        output_dir = Path(root) / "golden_master"
+        generator = GoldenMasterGenerator(str(output_dir), jobs=jobs, verbose=False)
+        if scenarios is not None:
+            generator.scenarios = scenarios
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = generator.generate_all()
+        return generator, results
+
+    def test_parallel_matches_sequential(self):
+        """Пул процессов дает те же логи и тот же порядок итогов"""
+        generator, sequential = self.generate(jobs=1)
+        parallel_generator, parallel = self.generate(jobs=2)
+        names = [scenario['name'] for scenario in generator.scenarios]
+        self.assertEqual(list(sequential), names)
+        self.assertEqual(list(parallel), names)
+        for name in names:
+            self.assertEqual((generator.output_dir / f"{name}.log").read_text(encoding='utf-8'),
+                             (parallel_generator.output_dir / f"{name}.log").read_text(encoding='utf-8'))
+
+    def test_rng_isolated(self):
+        """Лог сценария не зависит от глобального random и от соседних сценариев"""
+        import random
+        from generate_golden_master import normalize_log, run_scenario
+        scenario = {"name": "jump", "seed": 42, "inputs": ["0", "0", "-1", "Y", "N", "-1", "N"]}
+        first = run_scenario(scenario)
+        random.seed(7)
+        random.random()
+        self.assertEqual(run_scenario(scenario), first)
+        terminal = ChaseTerminal(seed=42, log_output=True, quiet=True)
+        self.assertEqual(normalize_log(terminal.run_with_inputs(scenario['inputs'])), first)
+
+    def test_verify(self):
+        import contextlib
+        import io
+        generator, _ = self.generate(jobs=1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(all(generator.verify_all().values()))
+            log_file = generator.output_dir / "multiple_moves.log"
+            log_file.write_text(log_file.read_text(encoding='utf-8').replace("X", "Y", 1), encoding='utf-8')
+            (generator.output_dir / "wall_collision.log").unlink()
+            results = generator.verify_all()
+        self.assertEqual([name for name, passed in results.items() if not passed],
+                         ["wall_collision", "multiple_moves"])
+
+    def test_load_scenarios(self):
+        from generate_golden_master import load_scenarios
+        scenarios = load_scenarios(['{"name": "a", "seed": 1, "inputs": "8 -1 N"}', ''])
+        self.assertEqual(scenarios[0]['inputs'], ["8", "-1", "N"])
+        for bad in (['{"name": "../x", "seed": 1}'], ['{"name": "a", "seed": "1"}'],
+                    ['{"name": "a", "seed": 1}', '{"name": "a", "seed": 2}']):
+            with self.assertRaises(ValueError):
+                load_scenarios(bad)
+
+
+class TestGoldenStore(unittest.TestCase):
+    """Тесты хранилища эталонных логов (chase_golden.py)"""
+
+    def setUp(self):
+        import shutil
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_dedup_and_manifest(self):
+        """Одинаковые логи хранятся один раз; манифест читается новым хранилищем"""
+        from chase_golden import GoldenStore
+        store = GoldenStore(self.root)
+        lines = ["CHASE", "", "GIVE UP, EH."]
+        first = store.record("a", lines)
+        self.assertEqual(store.record("b", list(lines)), first)
+        store.record("c", ["CHASE"])
+        store.save()
+        self.assertEqual(store.stats()['objects'], 2)
+
+        reopened = GoldenStore(self.root)
+        self.assertEqual(reopened.manifest, {"a": first, "b": first, "c": store.manifest["c"]})
+        self.assertEqual(reopened.get(first), lines)
+        self.assertEqual(reopened.verify("b", lines), (True, "Логи идентичны"))
+
+    def test_diff_only_on_mismatch(self):
+        from chase_golden import GoldenStore
+        store = GoldenStore(self.root)
+        store.record("a", ["one", "two"])
+        passed, message = store.verify("a", ["one", "three"])
+        self.assertFalse(passed)
+        self.assertIn("-two", message)
+        self.assertIn("+three", message)
+        self.assertFalse(store.verify("missing", ["one"])[0])
+
+    def test_prune(self):
+        from chase_golden import GoldenStore
+        store = GoldenStore(self.root)
+        store.record("a", ["old"])
+        store.record("a", ["new"])
+        self.assertEqual(store.prune(), 1)
+        self.assertEqual(store.get(store.manifest["a"]), ["new"])
+
+    def test_prune_skips_stray_files(self):
+        """Посторонние файлы в objects/ не мешают очистке"""
+        from chase_golden import GoldenStore
+        store = GoldenStore(self.root)
+        store.record("a", ["old"])
+        digest = store.record("a", ["new"])
+        Path(store.objects, ".DS_Store").write_bytes(b"")
+        Path(store.objects, digest[:2], ".tmp-write").write_bytes(b"")
+        self.assertEqual(store.prune(), 1)
+        self.assertTrue(Path(store.objects, digest[:2], ".tmp-write").exists())
+
+    def test_generator_with_store(self):
+        """Сотни одинаковых сдач - один лог в хранилище; проверка по хешам"""
+        import contextlib
+        import io
+        from generate_golden_master import GoldenMasterGenerator
+        generator = GoldenMasterGenerator(os.path.join(self.root, "golden_master"), jobs=2,
+                                          verbose=False, store_dir=os.path.join(self.root, "store"))
+        generator.scenarios = [{"name": f"s{i}", "description": "", "seed": 42,
+                                "inputs": ["-1", "N"], "expected_lines": ["GIVE UP, EH."]}
+                               for i in range(200)]
+        generator.scenarios.append({"name": "moves", "description": "", "seed": 42,
+                                    "inputs": ["8", "-1", "N"], "expected_lines": []})
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(all(generator.generate_all().values()))
+            self.assertEqual(generator.store.stats()['objects'], 2)
+            self.assertTrue(all(generator.verify_all().values()))
+            generator.scenarios[-1]['seed'] = 43
+            results = generator.verify_all()
+        self.assertEqual([name for name, passed in results.items() if not passed], ["moves"])
+        self.assertEqual(list(Path(self.root, "golden_master").glob("*.log")), [])
+
+    def test_regeneration_prunes_stale_logs(self):
+        """Повторная генерация оставляет в манифесте только текущие сценарии и чистит логи"""
+        import contextlib
+        import io
+        from generate_golden_master import GoldenMasterGenerator
+        store_dir = os.path.join(self.root, "store")
+        generator = GoldenMasterGenerator(os.path.join(self.root, "golden_master"), jobs=1,
+                                          verbose=False, store_dir=store_dir)
+        surrender = {"name": "surrender", "description": "", "seed": 42,
+                     "inputs": ["-1", "N"], "expected_lines": []}
+        moves = {"name": "moves", "description": "", "seed": 42,
+                 "inputs": ["8", "-1", "N"], "expected_lines": []}
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator.scenarios = [surrender, moves]
+            generator.generate_all()
+            generator.scenarios = [surrender, dict(moves, seed=43)]
+            generator.generate_all()
+            self.assertEqual(generator.store.stats()['objects'], 2)
+            generator.scenarios = [surrender]
+            generator.generate_all()
+        from chase_golden import GoldenStore
+        reopened = GoldenStore(store_dir)
+        self.assertEqual(list(reopened.manifest), ["surrender"])
+        objects = [path for path in Path(store_dir, "objects").rglob("*") if path.is_file()]
+        self.assertEqual(len(objects), 1)
+
+
 class TestCommandLine(unittest.TestCase):
-    """Тесты командной строки"""
+    """Тесты командной строки (main вызывается в том же процессе)"""
+    
+    def run_main(self, argv, stdin_text=""):
+        """Запуск main с заданными аргументами и вводом; (код, stdout, stderr)"""
+        import io
+        from chase_terminal import main
+        stdout, stderr = io.StringIO(), io.StringIO()
+        code = main(argv, stdin=io.StringIO(stdin_text), stdout=stdout, stderr=stderr)
+        return code, stdout.getvalue(), stderr.getvalue()
     
     def test_help_command(self):
         """Тест вывода справки"""
-        result = subprocess.run(
-            [sys.executable, "chase_terminal.py", "--help"],
-            capture_output=True,
-            text=True,
-            cwd=os.path.dirname(os.path.abspath(__file__))
-        )
+        code, stdout, _ = self.run_main(["--help"])
         
-        self.assertEqual(result.returncode, 0)
-        self.assertIn("Usage:", result.stdout)
-        self.assertIn("Chase Game", result.stdout)
+        self.assertEqual(code, 0)
+        self.assertIn("Usage:", stdout)
+        self.assertIn("Chase Game", stdout)
     
     def test_version_command(self):
         """Тест вывода версии"""
-        result = subprocess.run(
-            [sys.executable, "chase_terminal.py", "--version"],
-            capture_output=True,
-            text=True,
-            cwd=os.path.dirname(os.path.abspath(__file__))
-        )
+        code, stdout, _ = self.run_main(["--version"])
         
-        self.assertEqual(result.returncode, 0)
-        self.assertIn("Chase Game v1.0", result.stdout)
+        self.assertEqual(code, 0)
+        self.assertIn("Chase Game v1.0", stdout)
     
     def test_test_mode(self):
         """Тест режима тестирования"""
+        code, stdout, _ = self.run_main(["--test"])
+        
+        self.assertEqual(code, 0)
+        self.assertIn("Running in test mode", stdout)
+        self.assertIn("Game Log:", stdout)
+    
+    def test_bad_argument(self):
+        """Ошибка разбора аргументов - код 2 и сообщение в переданный stderr"""
+        code, stdout, stderr = self.run_main(["--seed=abc"])
+        self.assertEqual(code, 2)
+        self.assertEqual(stdout, "")
+        self.assertIn("invalid int value", stderr)
+    
+    def test_parallel_argument_errors(self):
+        """Ошибки разбора из параллельных потоков не перемешиваются и не трогают sys.stderr"""
+        from concurrent.futures import ThreadPoolExecutor
+        saved_stderr = sys.stderr
+        values = [f"bad{index}" for index in range(32)]
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda value: self.run_main([f"--seed={value}"]), values))
+        self.assertIs(sys.stderr, saved_stderr)
+        for value, (code, stdout, stderr) in zip(values, results):
+            self.assertEqual(code, 2)
+            self.assertEqual(stdout, "")
+            self.assertEqual(stderr.count("error:"), 1)
+            self.assertIn(f"'{value}'", stderr)
+    
+    def test_interactive_from_stream(self):
+        """Интерактивный режим читает ввод из переданного потока"""
+        code, stdout, _ = self.run_main(["--seed=42"], "x\n-1\nN\n")
+        self.assertEqual(code, 0)
+        self.assertIn(ChaseGame(seed=42).get_board_string(), stdout)
+        self.assertIn("YOUR MOVE? Please enter a number", stdout)
+        self.assertIn("GIVE UP", stdout)
+        self.assertIn("Thanks for playing Chase!", stdout)
+    
+    def test_script_from_stdin(self):
+        """--script=- читает сценарий из переданного stdin"""
+        code, stdout, _ = self.run_main(["--seed=42", "--script=-"], "8\n6\n-1\nN\n")
+        self.assertEqual(code, 0)
+        self.assertIn("Input (from history): 6", stdout)
+        self.assertIn("GIVE UP", stdout)
+        self.assertIn("ANOTHER GAME (Y/N)? N", stdout)
+    
+    def test_script_log_replaced_on_rerun(self):
+        """--log заменяет файл лога: после двух прогонов в нем одна партия"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "game.log")
+            for _ in range(2):
+                code, _, _ = self.run_main(["--seed=42", "--script=-", f"--log={path}"], "-1\nN\n")
+                self.assertEqual(code, 0)
+            with open(path, encoding="utf-8") as f:
+                log = f.read()
+        expected = ChaseTerminal(seed=42).run_with_inputs(["-1", "N"])
+        self.assertEqual(log, "\n".join(expected) + "\n")
+    
+    def test_entry_point(self):
+        """Запуск скрипта целиком: код возврата main передается в sys.exit"""
         result = subprocess.run(
-            [sys.executable, "chase_terminal.py", "--test"],
+            [sys.executable, "chase_terminal.py", "--seed=abc"],
             capture_output=True,
             text=True,
             cwd=os.path.dirname(os.path.abspath(__file__))
         )
         
-        self.assertEqual(result.returncode, 0)
-        self.assertIn("Running in test mode", result.stdout)
-        self.assertIn("Game Log:", result.stdout)
+        self.assertEqual(result.returncode, 2)
 
 
 class TestCrossPlatform(unittest.TestCase):
@@ -0,0 +1,1151 @@
+"""
+test_web.py - Тесты веб-версии игры Chase и ее вспомогательных модулей
+"""
+
+import unittest
+import os
+import sys
+import json
+import asyncio
+import time
+import threading
+import random
+
+# Добавляем путь к модулям игры
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Сессии тестового сервера не должны попадать в файл
+os.environ.setdefault('CHASE_SESSION_DB', ':memory:')
+os.environ.setdefault('CHASE_LEADERBOARD_DB', ':memory:')
+# Ограничение частоты проверяется отдельно (TestRateLimit)
+os.environ.setdefault('CHASE_RATE_IP', '0')
+os.environ.setdefault('CHASE_RATE_SESSION', '0')
+
+from chase_core import ChaseGame, board_changes
+from chase_pool import BoardPool, build_game
+from chase_sessions import (SessionStore, SQLiteBackend, encode_game, decode_game,
+                            compact_game, is_compact)
+from chase_service import GameService
+from chase_shard import HashRing, ShardRouter
+from chase_metrics import Registry
+from chase_bots import STRATEGIES, safe_moves
+import chase_load
+import chase_json
+from chase_leaderboard import Leaderboard
+from chase_replay import RangeNotSatisfiable, parse_range, replay_events
+from chase_tournament import (TournamentError, TournamentRunner, play_game,
+                              summarize, wilson_interval)
+from chase_hint import HintEngine, state_key
+from chase_spectate import Broadcaster, Subscriber, TooManyViewers, CLOSED
+from chase_ratelimit import Backpressure, RateLimiter, retry_after_header
+from chase_timewheel import TimingWheel
+import chase_web
+
+
+class TestBoardPool(unittest.TestCase):
+    """Тесты пула заранее сгенерированных полей (chase_pool.py)"""
+
+    def setUp(self):
+        self.pool = BoardPool(size=4, seed_cache_size=2)
+
+    def tearDown(self):
+        self.pool.stop()
+
+    def test_seeded_board_matches_engine(self):
+        """Партия из кэша совпадает с ChaseGame(seed)"""
+        reference = ChaseGame(seed=42)
+        game = self.pool.acquire(42)
+        self.assertEqual(game.get_board_string(), reference.get_board_string())
+        self.assertEqual(game.interceptors, reference.interceptors)
+
+    def test_seeded_copies_are_independent(self):
+        """Выданные копии не разделяют изменяемое состояние"""
+        first = self.pool.acquire(7)
+        first.process_move(0)
+        second = self.pool.acquire(7)
+        self.assertEqual(second.move_count, 0)
+        self.assertEqual(second.get_board_string(), ChaseGame(seed=7).get_board_string())
+
+        # Прыжок детерминирован для одинакового seed
+        third = self.pool.acquire(7)
+        third.process_move(0)
+        self.assertEqual(first.get_board_string(), third.get_board_string())
+
+    def test_seed_cache_is_bounded(self):
+        """LRU-кэш не растет больше заданного размера"""
+        for seed in range(5):
+            self.pool.acquire(seed)
+        self.assertEqual(len(self.pool._seeded), 2)
+        self.assertEqual(list(self.pool._seeded), [3, 4])
+
+    def test_unseeded_games_are_reproducible(self):
+        """Партии без seed получают seed и не трогают глобальный random"""
+        random.seed(1)
+        expected = random.random()
+        random.seed(1)
+
+        self.pool.fill()
+        self.assertEqual(len(self.pool), 4)
+        game = self.pool.acquire()
+        self.assertEqual(random.random(), expected)
+        self.assertIsNotNone(game.seed)
+        self.assertEqual(game.get_board_string(), ChaseGame(seed=game.seed).get_board_string())
+
+
+class TestSessions(unittest.TestCase):
+    """Тесты хранилища сессий (chase_sessions.py)"""
+
+    def test_encode_roundtrip(self):
+        """Кодирование сохраняет состояние и генератор партии"""
+        game = build_game(42)
+        game.process_move(8)
+        data = encode_game(game)
+        self.assertLess(len(data), 200)
+
+        restored = decode_game(data)
+        self.assertEqual(restored.get_game_state(), game.get_game_state())
+        self.assertEqual(restored.original_board, game.original_board)
+        self.assertEqual(restored.move_history, [8])
+
+        # Прыжок после восстановления идет тем же путем
+        game.process_move(0)
+        restored.process_move(0)
+        self.assertEqual(restored.get_game_state(), game.get_game_state())
+
+    def test_write_behind(self):
+        """Изменения попадают в бэкенд при сбросе и читаются новым хранилищем"""
+        backend = SQLiteBackend(':memory:')
+        store = SessionStore(backend, flush_interval=60)
+        game = build_game(7)
+        game_id = store.create(game)
+        self.assertIsNone(backend.load(game_id))
+
+        store.flush()
+        self.assertIsNotNone(backend.load(game_id))
+
+        cold = SessionStore(backend)
+        self.assertEqual(cold.get(game_id).get_board_string(), game.get_board_string())
+        self.assertIsNone(cold.get('missing'))
+        store.close()
+
+    def test_finished_games_are_compacted(self):
+        """Завершенная партия хранится как (seed, ходы) и восстанавливается повтором"""
+        backend = SQLiteBackend(':memory:')
+        store = SessionStore(backend, flush_interval=60)
+        game = build_game(31)
+        for move in (4, 0, 6, 99):
+            game.process_move(move)
+        game.process_move(-1)
+        game_id = store.create(game)
+        self.assertTrue(is_compact(store._hot[game_id]))
+
+        restored = store.get(game_id)
+        self.assertEqual(restored.get_game_state(), game.get_game_state())
+        self.assertEqual(restored.rng.draws, game.rng.draws)
+
+        # В бэкенд уходит та же сжатая запись
+        store.flush()
+        self.assertEqual(backend.load(game_id), compact_game(game))
+        self.assertEqual(SessionStore(backend).get(game_id).get_game_state(),
+                         game.get_game_state())
+        store.close()
+
+    def test_idle_games_are_compacted(self):
+        """Партия без обращений сжимается и при чтении снова становится живой"""
+        store = SessionStore(SQLiteBackend(':memory:'), flush_interval=60, idle_after=60)
+        game = build_game(32)
+        game.process_move(5)
+        game_id = store.create(game)
+        fresh_id = store.create(build_game(33))
+        self.assertEqual(store.compact_idle(), 0)
+
+        self.assertEqual(store.compact_idle(now=time.monotonic() + 120), 2)
+        self.assertEqual(store.stats()['compact_sessions'], 2)
+        restored = store.get(game_id)
+        self.assertFalse(is_compact(store._hot[game_id]))
+        self.assertIs(store.get(game_id), restored)
+        self.assertEqual(restored.get_board_string(), game.get_board_string())
+        self.assertTrue(is_compact(store._hot[fresh_id]))
+        store.close()
+
+    def test_incomplete_history_is_not_compacted(self):
+        """Партия из записи без истории ходов повтором не восстанавливается"""
+        game = build_game(34)
+        game.process_move(5)
+        game.move_history = []
+        self.assertIsNone(compact_game(game))
+        self.assertIsNone(compact_game(ChaseGame(seed=34)))
+
+    def test_eviction_keeps_dirty_games(self):
+        """Вытесненная из памяти несохраненная партия не теряется"""
+        store = SessionStore(SQLiteBackend(':memory:'), hot_capacity=1, flush_interval=60)
+        first = store.create(build_game(1))
+        store.create(build_game(2))
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.get(first).seed, 1)
+        store.close()
+
+
+class TestGameLocking(unittest.TestCase):
+    """Тесты блокировок партий и снимков для читателей (chase_service.py)"""
+
+    def setUp(self):
+        self.service = GameService()
+        self.addCleanup(self.service.close)
+
+    def test_readers_do_not_wait_for_moves(self):
+        """Чтение состояния идет из снимка, даже пока ход держит блокировку партии"""
+        game_id = self.service.new_game(seed=12)['game_id']
+        with self.service._lock(game_id):
+            reader = threading.Thread(target=self.service.state, args=(game_id,))
+            reader.start()
+            reader.join(timeout=2)
+            self.assertFalse(reader.is_alive())
+
+    def test_readers_see_only_whole_moves(self):
+        """Читатели видят только состояния между ходами, ходы одной партии не теряются"""
+        game_id = self.service.new_game(seed=13)['game_id']
+        published = {self.service.state(game_id)['board']}
+        seen = set()
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                seen.add(self.service.state(game_id)['board'])
+
+        def write(moves):
+            for move in moves:
+                published.add(self.service.move(game_id, move)['board'])
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        writers = [threading.Thread(target=write, args=([5, 10] * 20,)) for _ in range(3)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        done.set()
+        for thread in readers:
+            thread.join()
+
+        self.assertLessEqual(seen, published)
+        state = self.service.state(game_id)
+        self.assertTrue(state['game_over'] or state['move_count'] == 120)
+
+
+class TestSharding(unittest.TestCase):
+    """Тесты шардирования партий по процессам (chase_shard.py)"""
+
+    def test_ring_is_consistent(self):
+        """Добавление узла переносит только часть ключей"""
+        keys = [SessionStore.new_id() for _ in range(2000)]
+        ring = HashRing([0, 1, 2])
+        before = {key: ring.node_for(key) for key in keys}
+        self.assertEqual(set(before.values()), {0, 1, 2})
+
+        ring.add(3)
+        moved = [key for key in keys if ring.node_for(key) != before[key]]
+        self.assertTrue(all(ring.node_for(key) == 3 for key in moved))
+        self.assertLess(len(moved), len(keys) / 2)
+
+    def test_router_keeps_games_on_owner(self):
+        """Партии живут в своих процессах и продолжаются между запросами"""
+        router = ShardRouter(workers=3)
+        try:
+            games = [router.new_game(seed) for seed in range(12)]
+            for seed, created in enumerate(games):
+                self.assertEqual(created['board'], ChaseGame(seed=seed).get_board_string())
+                moved = router.move(created['game_id'], 5)
+                self.assertEqual(moved['game_id'], created['game_id'])
+                state = router.state(created['game_id'])
+                self.assertEqual(state['move_count'], 1)
+
+            stats = router.stats()
+            self.assertEqual(stats['live_sessions'], 12)
+            owners = {router.owner(game['game_id']) for game in games}
+            per_shard = [shard['live_sessions'] for shard in stats['shards']]
+            self.assertEqual(sum(1 for count in per_shard if count), len(owners))
+        finally:
+            router.close()
+
+
+class TestMetrics(unittest.TestCase):
+    """Тесты метрик (chase_metrics.py)"""
+
+    def test_prometheus_format(self):
+        """Счетчики и гистограммы выводятся в текстовом формате Prometheus"""
+        registry = Registry()
+        counter = registry.counter('demo_total', 'Demo counter', ('kind',))
+        histogram = registry.histogram('demo_seconds', 'Demo latency', buckets=(0.1, 1.0))
+        counter.inc(kind='a')
+        counter.inc(2, kind='a')
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        text = registry.render()
+        self.assertIn('# TYPE demo_total counter', text)
+        self.assertIn('demo_total{kind="a"} 3', text)
+        self.assertIn('demo_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('demo_seconds_bucket{le="1"} 2', text)
+        self.assertIn('demo_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn('demo_seconds_count 3', text)
+
+    def test_metrics_endpoint(self):
+        """Эндпоинт /metrics учитывает запросы и исходы партий"""
+        client = chase_web.app.test_client()
+        metrics = chase_web.app.extensions['chase'].metrics
+        finished = metrics.games_finished.value(outcome='abandoned')
+        game_id = client.post('/api/new_game', json={'seed': 3}).get_json()['game_id']
+        client.post('/api/move', json={'game_id': game_id, 'move': -1})
+        self.assertEqual(metrics.games_finished.value(outcome='abandoned'), finished + 1)
+
+        response = client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        text = response.get_data(as_text=True)
+        self.assertIn('chase_http_request_duration_seconds_bucket{endpoint="make_move"', text)
+        self.assertIn('chase_games_created_total', text)
+        self.assertIn('chase_live_sessions', text)
+
+
+    def test_only_applied_moves_counted(self):
+        """Повтор хода после конца партии и ход по неизвестному id не учитываются"""
+        client = chase_web.app.test_client()
+        metrics = chase_web.app.extensions['chase'].metrics
+        game_id = client.post('/api/new_game', json={'seed': 3}).get_json()['game_id']
+        moves = metrics.moves.value()
+        finished = metrics.games_finished.value(outcome='abandoned')
+        client.post('/api/move', json={'game_id': game_id, 'move': -1})
+        retry = client.post('/api/move', json={'game_id': game_id, 'move': -1}).get_json()
+        self.assertFalse(retry['success'])
+        created = metrics.games_created.value()
+        unknown = client.post('/api/move',
+                              json={'game_id': SessionStore.new_id(), 'move': -1}).get_json()
+        self.assertNotIn('created', unknown)
+        self.assertEqual(metrics.moves.value(), moves + 1)
+        self.assertEqual(metrics.games_finished.value(outcome='abandoned'), finished + 1)
+        self.assertEqual(metrics.games_created.value(), created + 1)
+
+class TestLoadHarness(unittest.TestCase):
+    """Тесты нагрузочного теста и ботов (chase_load.py, chase_bots.py)"""
+
+    def test_percentile(self):
+        values = [i / 100 for i in range(1, 101)]
+        self.assertEqual(chase_load.percentile(values, 0.50), 0.50)
+        self.assertEqual(chase_load.percentile(values, 0.99), 0.99)
+        self.assertEqual(chase_load.percentile([], 0.5), 0.0)
+
+    def test_bots_make_safe_moves(self):
+        """Боты не ходят на стены и перехватчиков"""
+        game = ChaseGame(seed=42)
+        board = game.get_board_string().split('\n')
+        safe = safe_moves(board, game.player_pos, game.interceptors)
+        rng = random.Random(0)
+        for name, strategy in STRATEGIES.items():
+            with self.subTest(strategy=name):
+                self.assertIn(strategy(board, game.player_pos, game.interceptors, rng), safe)
+
+    def test_run_against_local_server(self):
+        """Прогон против локального сервера дает отчет по эндпоинтам"""
+        server, url = chase_load.start_local_server()
+        try:
+            report = chase_load.run_load(url, players=4, games=2, max_moves=5)
+        finally:
+            server.shutdown()
+
+        self.assertEqual(report['games_finished'], 8)
+        self.assertEqual(report['games_failed'], 0)
+        self.assertGreater(report['games_per_s'], 0)
+        self.assertEqual(report['endpoints']['new_game']['requests'], 8)
+        self.assertEqual(report['endpoints']['new_game']['errors'], 0)
+        self.assertEqual(report['endpoints']['move']['errors'], 0)
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+            self.assertIn(key, report['endpoints']['move'])
+
+
+    def test_failed_games_not_finished(self):
+        """Партии, прерванные ошибкой запроса, не считаются завершенными"""
+        import socket
+        with socket.socket() as listener:
+            listener.bind(('127.0.0.1', 0))
+            port = listener.getsockname()[1]
+        report = chase_load.run_load(f'http://127.0.0.1:{port}', players=2, games=2)
+        self.assertEqual(report['games_finished'], 0)
+        self.assertEqual(report['games_failed'], 4)
+        self.assertEqual(report['games_per_s'], 0)
+
+
+class TestFastJson(unittest.TestCase):
+    """Тесты быстрого кодировщика ответов (chase_json.py)"""
+
+    def test_matches_standard_json(self):
+        """Результат совпадает со стандартным json после разбора"""
+        game = ChaseGame(seed=42)
+        payload = {
+            'success': True,
+            'game_id': 'abc',
+            'message': "HIGH VOLTAGE!!!!!!!!!!\n***** ZAP *****  YOU'RE DEAD!!!",
+            'board': game.get_board_string(),
+            'game_over': False,
+            'player_pos': game.player_pos,
+            'interceptors': game.interceptors,
+            'move_count': 0,
+            'empty': [],
+            'seed': None,
+        }
+        encoded = chase_json._encode_object(payload)
+        self.assertEqual(json.loads(encoded), json.loads(json.dumps(payload)))
+        self.assertEqual(json.loads(chase_json.dumps(payload)), json.loads(encoded))
+
+
+class TestLeaderboard(unittest.TestCase):
+    """Тесты таблицы рекордов (chase_leaderboard.py)"""
+
+    def setUp(self):
+        self.board = Leaderboard(':memory:', cache_depth=3)
+        self.addCleanup(self.board.close)
+
+    def test_ranking(self):
+        """Победы по возрастанию ходов, затем поражения по убыванию, затем сдавшиеся"""
+        self.board.record(1, 30, 'lost', False)
+        self.board.record(2, 50, 'abandoned', False)
+        self.board.record(1, 40, 'won', True)
+        self.board.record(3, 12, 'won', False)
+        self.board.record(1, 45, 'lost', False)
+        top = self.board.top(limit=10)
+        self.assertEqual([(r['outcome'], r['move_count']) for r in top],
+                         [('won', 12), ('won', 40), ('lost', 45)])
+        self.assertEqual([r['move_count'] for r in self.board.top(seed=1)], [40, 45, 30])
+        self.assertEqual(self.board.count(), 5)
+
+    def test_cache_updated_incrementally(self):
+        """Закэшированный топ обновляется новыми результатами без запроса к базе"""
+        self.board.record(7, 20, 'lost', False)
+        self.assertEqual(len(self.board.top(seed=7)), 1)
+        self.board._query = None  # Повторный запрос к базе сломал бы тест
+        self.board.record(7, 25, 'lost', False)
+        self.board.record(8, 99, 'lost', False)
+        self.assertEqual([r['move_count'] for r in self.board.top(seed=7)], [25, 20])
+
+    def test_results_survive_restart(self):
+        path = os.path.join(self._tmpdir(), 'leaderboard.db')
+        board = Leaderboard(path)
+        board.record(5, 10, 'won', False)
+        board.close()
+        board = Leaderboard(path)
+        board.record(5, 8, 'won', False)
+        self.assertEqual([r['move_count'] for r in board.top(seed=5)], [8, 10])
+        board.close()
+
+    def _tmpdir(self):
+        import tempfile
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return directory.name
+
+
+class TestReplay(unittest.TestCase):
+    """Тесты воспроизведения партий (chase_replay.py)"""
+
+    def test_replay_matches_live_game(self):
+        """Воспроизведение из seed проходит через те же состояния, включая прыжок"""
+        game = build_game(99)
+        boards = [game.get_board_string()]
+        for move in (6, 0, 4, 15, 2):
+            game.process_move(move)
+            boards.append(game.get_board_string())
+
+        events = list(replay_events(99, game.move_history))
+        self.assertEqual([event['board'] for event in events], boards)
+        self.assertEqual([event['move'] for event in events], list(range(6)))
+
+        resumed = list(replay_events(99, game.move_history, start=3))
+        self.assertEqual([event['board'] for event in resumed], boards[3:])
+
+    def test_parse_range(self):
+        self.assertIsNone(parse_range(None, 10))
+        self.assertEqual(parse_range('moves=4-', 10), (4, 10))
+        self.assertEqual(parse_range('moves=2-50', 10), (2, 10))
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range('moves=11-', 10)
+
+
+class TestTournament(unittest.TestCase):
+    """Тесты турниров ботов (chase_tournament.py)"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.runner = TournamentRunner(workers=2, chunk_size=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.runner.close()
+
+    def test_play_game_is_deterministic(self):
+        self.assertEqual(play_game(11, 'cautious', 40), play_game(11, 'cautious', 40))
+        seed, outcome, moves, _ = play_game(11, 'cautious', 40)
+        self.assertIn(outcome, ('won', 'lost', 'survived'))
+        self.assertLessEqual(moves, 40)
+
+    def test_summary(self):
+        summary = summarize([(1, 'won', 10, False), (2, 'lost', 20, True),
+                             (3, 'survived', 30, False), (4, 'lost', 40, False)])
+        self.assertEqual(summary['outcomes'], {'won': 1, 'lost': 2, 'survived': 1})
+        self.assertEqual(summary['win_rate'], 0.25)
+        self.assertEqual(summary['avg_moves'], 25)
+        low, high = summary['avg_moves_ci95']
+        self.assertLess(low, 25)
+        self.assertGreater(high, 25)
+        self.assertEqual(wilson_interval(0, 10)[0], 0.0)
+        self.assertGreater(wilson_interval(0, 10)[1], 0.0)
+
+    def test_job_runs_and_is_cached(self):
+        """Задание выполняется в пуле процессов, повтор набора seed берется из кэша"""
+        seeds = list(range(1, 9))
+        job_id = self.runner.submit('random', seeds, 30)
+        status = self.runner.wait(job_id, timeout=60)
+        self.assertEqual(status['status'], 'done')
+        self.assertEqual(status['completed'], 8)
+        expected = summarize(play_game(seed, 'random', 30) for seed in seeds)
+        self.assertEqual(status['summary'], expected)
+
+        # Тот же набор в другом порядке и с повтором - то же задание
+        self.assertEqual(self.runner.submit('random', seeds[::-1] + [1], 30), job_id)
+        self.assertNotEqual(self.runner.submit('random', seeds, 31), job_id)
+
+    def test_cancel(self):
+        job_id = self.runner.submit('lure', list(range(100, 400)), 1000)
+        status = self.runner.cancel(job_id)
+        self.assertEqual(status['status'], 'cancelled')
+        self.assertLess(status['completed'], 300)
+        # Отмененное задание не попадает в кэш
+        again = self.runner.submit('lure', list(range(100, 400)), 1000)
+        self.assertNotEqual(again, job_id)
+        self.runner.cancel(again)
+
+    def test_validation(self):
+        with self.assertRaises(TournamentError):
+            self.runner.submit('nope', [1], 10)
+        with self.assertRaises(TournamentError):
+            self.runner.submit('random', [], 10)
+        with self.assertRaises(TournamentError):
+            self.runner.submit('random', ['1'], 10)
+
+
+class TestHint(unittest.TestCase):
+    """Тесты подсказки хода (chase_hint.py)"""
+
+    def test_hint_is_safe_and_cached_by_position(self):
+        """Подсказка - безопасный ход; та же позиция после SAME SETUP берется из кэша"""
+        engine = HintEngine(horizon=4, rollouts=3)
+        game = build_game(21)
+        hint = engine.hint(game, budget=10)
+        self.assertTrue(hint['complete'])
+        self.assertIn(hint['move'], safe_moves(game.board, game.player_pos, game.interceptors) + [0])
+        self.assertGreaterEqual(hint['survival'], 0.0)
+
+        game.process_move(hint['move'])
+        self.assertFalse(engine.hint(game, budget=10)['cached'])
+        game.reset_to_original()
+        again = engine.hint(game, budget=10)
+        self.assertTrue(again['cached'])
+        self.assertEqual(again['move'], hint['move'])
+
+    def test_deadline_returns_best_so_far(self):
+        engine = HintEngine(horizon=50, rollouts=1000)
+        hint = engine.hint(build_game(22), budget=0.005)
+        self.assertFalse(hint['complete'])
+        self.assertIsNotNone(hint['move'])
+        self.assertLess(hint['elapsed_ms'], 200)
+
+    def test_same_shape_when_game_over(self):
+        """Ответ для оконченной партии содержит те же поля, что и обычный"""
+        engine = HintEngine(horizon=3, rollouts=2)
+        game = build_game(24)
+        live = engine.hint(game, budget=10)
+        game.process_move(-1)
+        over = engine.hint(game, budget=10)
+        self.assertEqual(set(over), set(live))
+        self.assertIsNone(over['move'])
+
+    def test_hint_does_not_touch_game(self):
+        game = build_game(23)
+        key, draws = state_key(game), game.rng.draws
+        HintEngine(horizon=3, rollouts=2).hint(game, budget=10)
+        self.assertEqual((state_key(game), game.rng.draws), (key, draws))
+
+
+class TestSpectate(unittest.TestCase):
+    """Тесты трансляции партии зрителям (chase_spectate.py)"""
+
+    def test_board_changes(self):
+        self.assertEqual(board_changes("X *\n+ X", "X  \n +X"),
+                         [[0, 2, ' '], [1, 0, ' '], [1, 1, '+']])
+
+    def test_slow_subscriber_skips_ahead_then_drops(self):
+        """Переполненная очередь заменяется снимком, хронический отстающий отключается"""
+        async def scenario():
+            subscriber = Subscriber('g', queue_size=2, max_overflows=1)
+            subscriber.offer(b'd1', b's1')
+            subscriber.offer(b'd2', b's2')
+            subscriber.offer(b'd3', b's3')
+            self.assertEqual(await subscriber.get(), b's3')
+
+            # Догнал трансляцию - счетчик переполнений сброшен
+            for index in range(4, 7):
+                subscriber.offer(b'd%d' % index, b's%d' % index)
+            self.assertFalse(subscriber.closed)
+            # Снова отстал, не разобрав очередь
+            subscriber.offer(b'd7', b's7')
+            subscriber.offer(b'd8', b's8')
+            self.assertTrue(subscriber.closed)
+            self.assertEqual(await subscriber.get(), CLOSED)
+
+        asyncio.run(scenario())
+
+    def test_fanout_encodes_once(self):
+        """Все зрители получают одни и те же байты события"""
+        broadcaster = Broadcaster()
+        game = ChaseGame(seed=42)
+        initial = {'board': game.get_board_string(), 'move_count': 0}
+        viewers = [broadcaster.open('g', initial) for _ in range(3)]
+        first = [broadcaster.next_event(viewer, 1.0) for viewer in viewers]
+        self.assertTrue(first[0].startswith(b'event: snapshot'))
+
+        game.process_move(5)
+        broadcaster.publish('g', {
+            'board': game.get_board_string(), 'move_count': 1, 'message': '',
+            'player_pos': game.player_pos, 'interceptors': game.interceptors,
+            'game_over': False,
+        })
+        events = [broadcaster.next_event(viewer, 1.0) for viewer in viewers]
+        self.assertTrue(events[0].startswith(b'event: delta'))
+        self.assertTrue(all(event is events[0] for event in events))
+
+        for viewer in viewers:
+            broadcaster.close(viewer)
+        self.assertFalse(broadcaster.has_viewers('g'))
+
+    def test_publish_order(self):
+        """Устаревший результат отбрасывается, после пропуска - снимок, а не дельта"""
+        broadcaster = Broadcaster()
+        game = ChaseGame(seed=42)
+        viewer = broadcaster.open('g', {'board': game.get_board_string(), 'move_count': 0,
+                                        'version': 0})
+        broadcaster.next_event(viewer, 1.0)
+
+        def publish():
+            broadcaster.publish('g', {
+                'board': game.get_board_string(), 'move_count': game.move_count, 'message': '',
+                'player_pos': game.player_pos, 'interceptors': game.interceptors,
+                'game_over': game.game_over, 'version': len(game.move_history),
+            })
+
+        game.process_move(5)
+        publish()
+        self.assertTrue(broadcaster.next_event(viewer, 1.0).startswith(b'event: delta'))
+        # Такт и ход пришли в обратном порядке: второй результат старше
+        game.tick()
+        tick_board = game.get_board_string()
+        game.process_move(5, advance_interceptors=False)
+        publish()
+        game.move_history.pop()
+        publish()
+        event = broadcaster.next_event(viewer, 1.0)
+        self.assertTrue(event.startswith(b'event: snapshot'))
+        self.assertNotIn(tick_board.encode(), event)
+        self.assertIsNone(broadcaster.next_event(viewer, 0.05))
+        broadcaster.close(viewer)
+
+    def test_concurrent_publish(self):
+        """Параллельные такты и ходы не портят поле зрителя"""
+        service = GameService()
+        self.addCleanup(service.close)
+        broadcaster = Broadcaster(queue_size=10000)
+        service._wheel = TimingWheel(clock=lambda: 0.0)
+        game_id = service.new_game(seed=42, tick_ms=100)['game_id']
+        viewer = broadcaster.open(game_id, service.view(game_id))
+
+        # Такты публикуются из on_update, как в ChaseState.on_tick
+        service.on_update = broadcaster.publish
+
+        def moves():
+            for _ in range(200):
+                broadcaster.publish(game_id, service.move(game_id, 5))
+
+        def ticks():
+            for _ in range(200):
+                service.tick(game_id)
+
+        # Частое переключение потоков, чтобы гонка проявлялась
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-6)
+        threads = [threading.Thread(target=moves), threading.Thread(target=ticks)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        board = None
+        while True:
+            event = broadcaster.next_event(viewer, 0.1)
+            if event is None:
+                break
+            kind, data = event.split(b'\n', 1)
+            payload = json.loads(data[len(b'data: '):])
+            if kind == b'event: snapshot':
+                board = [list(line) for line in payload['board'].split('\n')]
+            else:
+                for row, col, cell in payload['changes']:
+                    board[row][col] = cell
+        self.assertEqual('\n'.join(''.join(line) for line in board),
+                         service.view(game_id)['board'])
+        broadcaster.close(viewer)
+
+    def test_viewer_limit(self):
+        broadcaster = Broadcaster(max_viewers=2)
+        initial = {'board': 'X', 'move_count': 0}
+        viewers = [broadcaster.open('g', initial), broadcaster.open('h', initial)]
+        with self.assertRaises(TooManyViewers):
+            broadcaster.open('g', initial)
+        broadcaster.close(viewers[0])
+        broadcaster.close(viewers[0])
+        self.assertEqual(broadcaster.total_viewers, 1)
+        broadcaster.close(broadcaster.open('g', initial))
+        broadcaster.close(viewers[1])
+        self.assertEqual(broadcaster.total_viewers, 0)
+
+    def test_spectate_endpoint(self):
+        """SSE-эндпоинт отдает снимок, затем дельты ходов"""
+        client = chase_web.app.test_client()
+        game_id = client.post('/api/new_game', json={'seed': 42}).get_json()['game_id']
+        self.assertEqual(client.get('/api/spectate/' + '0' * 32).status_code, 404)
+
+        response = client.get(f'/api/spectate/{game_id}', buffered=False)
+        stream = iter(response.response)
+        self.assertIn(b'event: snapshot', next(stream))
+        client.post('/api/move', json={'game_id': game_id, 'move': 5})
+        self.assertIn(b'event: delta', next(stream))
+        response.close()
+
+
+class TestRateLimit(unittest.TestCase):
+    """Тесты ограничения частоты и очереди запросов (chase_ratelimit.py)"""
+
+    def test_token_bucket(self):
+        now = [0.0]
+        limiter = RateLimiter(rate=2, burst=4, clock=lambda: now[0])
+        self.assertEqual([limiter.acquire('a') for _ in range(4)], [0.0] * 4)
+        self.assertAlmostEqual(limiter.acquire('a'), 0.5)
+        # Другой ключ - своя корзина
+        self.assertEqual(limiter.acquire('b'), 0.0)
+        now[0] = 1.0
+        self.assertEqual(limiter.acquire('a', cost=2), 0.0)
+        self.assertGreater(limiter.acquire('a'), 0)
+
+    def test_bounded_keys(self):
+        limiter = RateLimiter(rate=1, burst=1, max_keys=3)
+        for key in 'abcde':
+            limiter.acquire(key)
+        self.assertEqual(len(limiter), 3)
+
+    def test_backpressure(self):
+        """Сверх очереди запрос отклоняется сразу, из очереди - по таймауту"""
+        gate = Backpressure(max_active=1, max_waiting=1, wait_timeout=0.05)
+        self.assertTrue(gate.enter())
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(gate.enter()))
+        waiter.start()
+        deadline = time.monotonic() + 5
+        while gate.waiting == 0 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        started = time.perf_counter()
+        self.assertFalse(gate.enter())
+        self.assertLess(time.perf_counter() - started, 0.05)
+        waiter.join()
+        self.assertEqual(results, [False])
+        gate.leave()
+        self.assertTrue(gate.enter())
+
+    def test_retry_after(self):
+        self.assertEqual(retry_after_header(0.01), '1')
+        self.assertEqual(retry_after_header(2.5), '3')
+
+
+class TestRealtime(unittest.TestCase):
+    """Тесты колеса таймеров и партий реального времени (chase_timewheel.py, chase_service.py)"""
+
+    def make_wheel(self, **kwargs):
+        now = [0.0]
+        wheel = TimingWheel(clock=lambda: now[0], **kwargs)
+        return wheel, now
+
+    def test_wheel_order_repeat_cancel(self):
+        wheel, now = self.make_wheel(resolution=0.1, slots=8)
+        fired = []
+        wheel.schedule(0.3, lambda: fired.append('a'))
+        wheel.schedule(0.1, lambda: fired.append('b'))
+        # Дальше одного оборота колеса
+        wheel.schedule(1.5, lambda: fired.append('far'))
+        repeating = wheel.schedule(0.2, lambda: fired.append('r'), repeat=True)
+        self.assertEqual(wheel.advance(0.35), 3)
+        self.assertEqual(fired, ['b', 'r', 'a'])
+        repeating.cancel()
+        wheel.advance(1.0)
+        self.assertEqual(fired, ['b', 'r', 'a'])
+        wheel.advance(1.55)
+        self.assertEqual(fired[-1], 'far')
+        self.assertEqual(len(wheel), 0)
+
+    def test_repeat_stops_on_false(self):
+        wheel, _ = self.make_wheel(resolution=0.1, slots=8)
+        calls = []
+        wheel.schedule(0.1, lambda: calls.append(1) or len(calls) < 3, repeat=True)
+        wheel.advance(10.0)
+        self.assertEqual(len(calls), 3)
+
+    def test_tick_work_is_flat(self):
+        """Такт колеса вызывает только наступившие таймеры, а не все живые"""
+        wheel, _ = self.make_wheel(resolution=0.01, slots=512)
+        calls = [0]
+
+        def callback():
+            calls[0] += 1
+
+        for index in range(5000):
+            wheel.schedule(1.0 + (index % 100) * 0.01, callback, repeat=True)
+        self.assertEqual(wheel.advance(1.005), 50)
+        self.assertEqual(len(wheel), 5000)
+
+    def test_service_realtime_game(self):
+        """Ход игрока не двигает перехватчиков, такт - двигает"""
+        service = GameService()
+        self.addCleanup(service.close)
+        service._wheel, now = self.make_wheel()
+        game_id = service.new_game(seed=42, tick_ms=500)['game_id']
+        before = service.state(game_id)
+        moved = service.move(game_id, 6)
+        self.assertEqual(moved['move_count'], 1)
+        self.assertNotEqual(moved['board'], before['board'])
+
+        updates = []
+        service.on_update = lambda gid, response: updates.append(gid)
+        service._wheel.advance(0.55)
+        self.assertEqual(updates, [game_id])
+        after = service.state(game_id)
+        self.assertEqual(after['move_count'], 1)
+        self.assertNotEqual(after['board'], moved['board'])
+        self.assertEqual(service.stats()['realtime_games'], 1)
+        with self.assertRaises(ValueError):
+            service.new_game(tick_ms=5)
+
+    def test_realtime_survives_restart(self):
+        """Период тактов хранится в сессии: после перезапуска таймер заводится снова"""
+        import tempfile
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'sessions.db')
+        service = GameService(session_db=path)
+        service._wheel, _ = self.make_wheel()
+        game_id = service.new_game(seed=42, tick_ms=500)['game_id']
+        service.close()
+
+        restarted = GameService(session_db=path)
+        self.addCleanup(restarted.close)
+        restarted._wheel, _ = self.make_wheel()
+        expected = build_game(42)
+        expected.process_move(6, advance_interceptors=False)
+        moved = restarted.move(game_id, 6)
+        self.assertEqual(moved['board'], expected.get_board_string())
+        self.assertEqual(restarted.stats()['realtime_games'], 1)
+
+        updates = []
+        restarted.on_update = lambda gid, response: updates.append(gid)
+        restarted._wheel.advance(0.55)
+        self.assertEqual(updates, [game_id])
+
+    def test_session_keeps_tick_period(self):
+        """tick_ms переживает полное и сжатое кодирование"""
+        game = build_game(5)
+        game.tick_ms = 250
+        game.process_move(4, advance_interceptors=False)
+        self.assertEqual(decode_game(encode_game(game)).tick_ms, 250)
+        game.process_move(-1)
+        self.assertEqual(decode_game(compact_game(game)).tick_ms, 250)
+        self.assertIsNone(decode_game(encode_game(build_game(5))).tick_ms)
+
+    def test_reused_id_keeps_new_timer(self):
+        """Запоздалый такт прежней партии не снимает таймер новой с тем же id"""
+        service = GameService()
+        self.addCleanup(service.close)
+        service._wheel, _ = self.make_wheel()
+        game_id = service.new_game(seed=1, tick_ms=500)['game_id']
+        old_timer = service._realtime[game_id]
+        service.move(game_id, -1)
+        service.new_game(seed=2, game_id=game_id, tick_ms=500)
+        new_timer = service._realtime[game_id]
+        self.assertTrue(old_timer.cancelled)
+        self.assertFalse(service.tick(game_id, old_timer))
+        self.assertIs(service._realtime[game_id], new_timer)
+        self.assertTrue(service.tick(game_id, new_timer))
+
+    def test_shard_reports_ticks(self):
+        """Такты в процессе-шарде доходят до on_update маршрутизатора"""
+        router = ShardRouter(workers=1)
+        self.addCleanup(router.close)
+        updates = []
+        finished = threading.Event()
+
+        def on_update(game_id, response):
+            updates.append(game_id)
+            finished.set()
+
+        router.on_update = on_update
+        game_id = router.new_game(seed=3, tick_ms=100)['game_id']
+        self.assertTrue(finished.wait(10))
+        self.assertEqual(updates[0], game_id)
+
+    def test_compact_with_ticks(self):
+        """Сжатая партия с тактами восстанавливается повтором"""
+        game = build_game(31)
+        game.process_move(4, advance_interceptors=False)
+        game.tick()
+        game.process_move(6, advance_interceptors=False)
+        game.tick()
+        game.process_move(-1)
+        data = compact_game(game)
+        self.assertIsNotNone(data)
+        self.assertEqual(decode_game(data).get_game_state(), game.get_game_state())
+
+
+class TestAppFactory(unittest.TestCase):
+    """Тесты фабрики приложения и ленивой инициализации (chase_web.py)"""
+
+    def make_app(self, **config):
+        config.setdefault('CHASE_SESSION_DB', ':memory:')
+        config.setdefault('CHASE_LEADERBOARD_DB', ':memory:')
+        app = chase_web.create_app(config)
+        self.addCleanup(app.extensions['chase'].close)
+        return app
+
+    def test_spectate_viewer_limit(self):
+        """Сверх CHASE_MAX_VIEWERS зритель получает 503; закрытый поток освобождает место"""
+        client = self.make_app(CHASE_MAX_VIEWERS=1).test_client()
+        game_id = client.post('/api/new_game', json={'seed': 5}).get_json()['game_id']
+        first = client.get(f'/api/spectate/{game_id}', buffered=False)
+        self.assertEqual(first.status_code, 200)
+        rejected = client.get(f'/api/spectate/{game_id}', buffered=False)
+        self.assertEqual(rejected.status_code, 503)
+        self.assertIn('Retry-After', rejected.headers)
+        # Закрыт, не прочитав ни одного события
+        first.close()
+        second = client.get(f'/api/spectate/{game_id}', buffered=False)
+        self.assertEqual(second.status_code, 200)
+        second.close()
+
+    def test_dev_server_warms_up_only_serving_process(self):
+        """С перезагрузчиком прогрев идет только в обслуживающем процессе"""
+        from unittest import mock
+        for serving, expected in ((False, 0), (True, 1)):
+            with self.subTest(serving=serving), \
+                    mock.patch.dict(os.environ, {'CHASE_WORKERS': '1', 'CHASE_WARM_UP': '1'}), \
+                    mock.patch.object(chase_web.Flask, 'run') as run, \
+                    mock.patch('chase_web.warm_up') as warm_up:
+                # Следящий процесс перезагрузчика - без WERKZEUG_RUN_MAIN
+                os.environ.pop('WERKZEUG_RUN_MAIN', None)
+                if serving:
+                    os.environ['WERKZEUG_RUN_MAIN'] = 'true'
+                chase_web.run_dev_server()
+            self.assertEqual(warm_up.call_count, expected)
+            self.assertTrue(run.call_args.kwargs['use_reloader'])
+
+    def test_services_created_on_demand(self):
+        """Сервисы создаются при первом запросе, а не при создании приложения"""
+        app = self.make_app(CHASE_SLOW_REQUEST_MS=10000)
+        state = app.extensions['chase']
+        self.assertIsNone(state._service)
+        client = app.test_client()
+        game_id = client.post('/api/new_game', json={'seed': 5}).get_json()['game_id']
+        client.post('/api/move', json={'game_id': game_id, 'move': 5})
+        self.assertIsNotNone(state._service)
+        # Ни зрителей, ни завершенных партий - трансляция и рекорды не нужны
+        self.assertIsNone(state._broadcaster)
+        self.assertIsNone(state._leaderboard)
+
+    def test_apps_are_independent(self):
+        first, second = self.make_app(), self.make_app()
+        game_id = first.test_client().post('/api/new_game', json={}).get_json()['game_id']
+        self.assertIsNone(second.extensions['chase'].service.view(game_id))
+
+    def test_tournament_endpoint(self):
+        """Турнир ставится в очередь и опрашивается по id"""
+        app = self.make_app(CHASE_TOURNAMENT_WORKERS=1)
+        client = app.test_client()
+        response = client.post('/api/tournament',
+                               json={'strategy': 'cautious', 'seeds': [1, 2, 3], 'max_moves': 20})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()['job_id']
+        app.extensions['chase'].tournaments.wait(job_id, timeout=60)
+        data = client.get(f'/api/tournament/{job_id}').get_json()
+        self.assertEqual((data['status'], data['completed']), ('done', 3))
+        self.assertEqual(client.get('/api/tournament/' + '0' * 32).status_code, 404)
+        self.assertEqual(client.post('/api/tournament', json={'seeds': 'x'}).status_code, 400)
+
+    def test_rate_limit(self):
+        """Лишние запросы получают 429 и Retry-After до работы с партией"""
+        app = self.make_app(CHASE_RATE_IP=1, CHASE_RATE_SESSION=0)
+        client = app.test_client()
+        self.assertEqual(client.post('/api/new_game', json={}).status_code, 200)
+        response = client.post('/api/new_game', json={})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '2')
+        # Метрики и статика не ограничиваются
+        self.assertEqual(client.get('/api/static').status_code, 200)
+        metrics = client.get('/metrics').get_data(as_text=True)
+        self.assertIn('chase_rate_limited_total{scope="ip",endpoint="new_game"} 1', metrics)
+
+    def test_session_rate_limit(self):
+        app = self.make_app(CHASE_RATE_IP=0, CHASE_RATE_SESSION=1)
+        client = app.test_client()
+        game_id = client.post('/api/new_game', json={'seed': 3}).get_json()['game_id']
+        statuses = [client.post('/api/move', json={'game_id': game_id, 'move': 5}).status_code
+                    for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        # Другая партия с того же адреса не затронута
+        other = client.post('/api/new_game', json={}).get_json()['game_id']
+        self.assertEqual(client.get(f'/api/state?game_id={other}').status_code, 200)
+        self.assertEqual(app.extensions['chase'].service.view(game_id)['move_count'], 2)
+
+    def test_overload(self):
+        """При занятой очереди запрос отклоняется, а место освобождается после ответа"""
+        app = self.make_app(CHASE_RATE_IP=0, CHASE_RATE_SESSION=0,
+                            CHASE_MAX_IN_FLIGHT=1, CHASE_MAX_QUEUED=0)
+        client = app.test_client()
+        gate = app.extensions['chase'].backpressure
+        self.assertEqual(client.post('/api/new_game', json={}).status_code, 200)
+        self.assertEqual(gate.active, 0)
+        self.assertTrue(gate.enter())
+        response = client.post('/api/new_game', json={})
+        self.assertEqual((response.status_code, response.headers['Retry-After']), (429, '1'))
+        gate.leave()
+        metrics = client.get('/metrics').get_data(as_text=True)
+        self.assertIn('chase_overload_rejected_total{endpoint="new_game"} 1', metrics)
+        self.assertIn('chase_requests_in_flight 0', metrics)
+
+    def test_new_game_tick_validation(self):
+        client = self.make_app().test_client()
+        for tick_ms in (1, 'fast', 10 ** 6):
+            response = client.post('/api/new_game', json={'tick_ms': tick_ms})
+            self.assertEqual(response.status_code, 400)
+        data = client.post('/api/new_game', json={'seed': 4, 'tick_ms': 1000}).get_json()
+        self.assertEqual(data['tick_ms'], 1000)
+
+    def test_warm_up(self):
+        """Прогрев заполняет пул полей до первого запроса"""
+        app = self.make_app(CHASE_WARM_UP=True)
+        state = app.extensions['chase']
+        self.assertEqual(len(state.service.board_pool), state.service.board_pool.size)
+        self.assertIsNotNone(state._static)
+
+
+class TestWebApi(unittest.TestCase):
+    """Тесты HTTP API (chase_web.py)"""
+
+    def setUp(self):
+        self.client = chase_web.app.test_client()
+
+    def test_new_game_with_seed(self):
+        """Новая игра с seed воспроизводит поле"""
+        response = self.client.post('/api/new_game', json={'seed': 42})
+        data = response.get_json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['board'], ChaseGame(seed=42).get_board_string())
+
+    def test_move(self):
+        """Ход в игре, созданной по id"""
+        game_id = self.client.post('/api/new_game', json={'seed': 42}).get_json()['game_id']
+        response = self.client.post('/api/move', json={'game_id': game_id, 'move': -1})
+        data = response.get_json()
+        self.assertEqual(data['game_id'], game_id)
+        self.assertTrue(data['game_over'])
+        self.assertIn("GIVE UP", data['message'])
+
+        state = self.client.get('/api/state', query_string={'game_id': game_id}).get_json()
+        self.assertTrue(state['game_over'])
+
+    def test_move_must_be_integer(self):
+        """true, 3.9 и "5" не приводятся к ходу - 400"""
+        game_id = self.client.post('/api/new_game', json={'seed': 42}).get_json()['game_id']
+        for move in (True, False, 3.9, 5.0, "5", None):
+            with self.subTest(move=move):
+                response = self.client.post('/api/move', json={'game_id': game_id, 'move': move})
+                self.assertEqual(response.status_code, 400)
+        state = self.client.get('/api/state', query_string={'game_id': game_id}).get_json()
+        self.assertEqual(state['move_count'], 0)
+
+    def test_static_payload_is_cacheable(self):
+        """Инструкции отдаются отдельно, с ETag и кэшированием"""
+        response = self.client.get('/api/static')
+        data = response.get_json()
+        self.assertEqual(data['instructions'], ChaseGame(seed=1).get_instructions())
+        self.assertEqual((data['rows'], data['cols']), (10, 20))
+        self.assertIn('max-age', response.headers['Cache-Control'])
+
+        cached = self.client.get('/api/static', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(cached.status_code, 304)
+
+        new_game = self.client.post('/api/new_game', json={'seed': 1}).get_json()
+        self.assertNotIn('instructions', new_game)
+
+    def test_invalid_seed(self):
+        """Некорректный seed отклоняется"""
+        response = self.client.post('/api/new_game', json={'seed': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_leaderboard_endpoint(self):
+        """Сдавшаяся партия попадает в таблицу рекордов своего seed"""
+        game_id = self.client.post('/api/new_game', json={'seed': 4242}).get_json()['game_id']
+        self.client.post('/api/move', json={'game_id': game_id, 'move': 5})
+        self.client.post('/api/move', json={'game_id': game_id, 'move': -1})
+        data = self.client.get('/api/leaderboard?seed=4242').get_json()
+        self.assertEqual(data['results'][0]['outcome'], 'abandoned')
+        self.assertEqual(self.client.get('/api/leaderboard?limit=x').status_code, 400)
+
+    def test_hint_endpoint(self):
+        game_id = self.client.post('/api/new_game', json={'seed': 42}).get_json()['game_id']
+        data = self.client.get('/api/hint', query_string={'game_id': game_id}).get_json()
+        self.assertTrue(data['success'])
+        self.assertIn(data['move'], range(10))
+        self.assertEqual(self.client.get('/api/hint?game_id=' + 'e' * 32).status_code, 404)
+
+        realtime = self.client.post('/api/new_game', json={'seed': 42, 'tick_ms': 10000}).get_json()
+        response = self.client.get('/api/hint', query_string={'game_id': realtime['game_id']})
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(response.get_json()['success'])
+
+    def test_replay_endpoint(self):
+        """NDJSON-воспроизведение целиком и с продолжения"""
+        game_id = self.client.post('/api/new_game', json={'seed': 42}).get_json()['game_id']
+        boards = []
+        for move in (5, 0, 5):
+            boards.append(self.client.post(
+                '/api/move', json={'game_id': game_id, 'move': move}).get_json()['board'])
+
+        response = self.client.get(f'/api/replay/{game_id}')
+        self.assertEqual(response.status_code, 200)
+        events = [json.loads(line) for line in response.data.splitlines()]
+        self.assertEqual(len(events), 4)
+        self.assertEqual([event['board'] for event in events[1:]], boards)
+
+        partial = self.client.get(f'/api/replay/{game_id}', headers={'Range': 'moves=2-'})
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.headers['Content-Range'], 'moves 2-3/3')
+        self.assertEqual([json.loads(line)['move'] for line in partial.data.splitlines()], [2, 3])
+
+        self.assertEqual(self.client.get(f'/api/replay/{game_id}?from=9').status_code, 416)
+        for start in ('x', '-1', '2-3', '1.5'):
+            self.assertEqual(self.client.get(f'/api/replay/{game_id}?from={start}').status_code, 400)
+        self.assertEqual(self.client.get('/api/replay/' + 'f' * 32).status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()